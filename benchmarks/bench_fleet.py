@@ -0,0 +1,97 @@
+"""
+Fleet benchmark: per-car vs batched lane detection and steering.
+
+Spreads N cars around a track (TrafficSimulation.spawn_evenly) and times one
+tick of steering for the whole fleet two ways: a Python loop over
+PurePursuitLKA.calculate_steering, and one PurePursuitLKA.calculate_steering_batch
+call. Also checks the two against each other and exits with status 1 if a
+car steers in one but not the other, or if the commands differ by more than
+TOLERANCES: nothing with the NumPy kernels, last-bit trig differences with
+Numba (its libm can round differently).
+
+Usage:
+    python benchmarks/bench_fleet.py [--cars 10 100 1000] [--track procedural]
+        [--lookahead arc_length] [--backend numpy]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from robotics_lab import KERNELS, ProceduralTrack, SaoPauloTrack, TrafficSimulation  # noqa: E402
+from robotics_lab.controllers import LOOKAHEAD_MODES  # noqa: E402
+
+DEFAULT_CARS = [10, 100, 1000, 10000]
+
+# Largest allowed |per-car - batched| steering difference in radians, by kernel backend
+TOLERANCES = {"numpy": 0.0, "numba": 1e-9}
+
+
+def time_call(function, reps):
+    """Seconds per call, averaged over reps calls after one warm-up call"""
+    function()
+    start = time.perf_counter()
+    for _ in range(reps):
+        function()
+    return (time.perf_counter() - start) / reps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, nargs="+", default=DEFAULT_CARS, help="fleet sizes")
+    parser.add_argument("--reps", type=int, default=5, help="timed ticks per fleet size")
+    parser.add_argument("--track", choices=["saopaulo", "procedural"], default="saopaulo")
+    parser.add_argument("--lookahead", choices=LOOKAHEAD_MODES, default="nearest")
+    parser.add_argument("--backend", choices=["auto", "numba", "numpy"], default="auto")
+    args = parser.parse_args()
+
+    KERNELS.select(args.backend)
+    tolerance = TOLERANCES["numba" if KERNELS.use_jit else "numpy"]
+    track = SaoPauloTrack(offset_x=50, offset_y=50) if args.track == "saopaulo" else ProceduralTrack(5000)
+    print(f"kernels: {'numba' if KERNELS.use_jit else 'numpy'}, track: {args.track} "
+          f"({len(track.centerline)} vertices), lookahead: {args.lookahead}")
+    print(f"{'cars':>6} {'per-car':>11} {'batched':>11} {'speedup':>8} {'max diff':>9}  result")
+
+    failures = []
+    for count in sorted(args.cars):
+        sim = TrafficSimulation(track)
+        sim.spawn_evenly(count, allow_overlap=True)  # Steering only: the fleet never steps
+        for lka in sim.controllers:
+            lka.lookahead_mode = args.lookahead
+
+        def per_car():
+            return [lka.calculate_steering(track) for lka in sim.controllers]
+
+        # Loop timing grows with N; fewer reps keep large fleets quick
+        loop = time_call(per_car, max(1, args.reps * 100 // count))
+        batched = time_call(sim.batch_steering, args.reps)
+
+        expected = np.array([np.nan if s is None else s for s in per_car()])
+        steering = sim.batch_steering()
+        steers = ~np.isnan(expected)
+        diff = float(np.abs(expected[steers] - steering[steers]).max(initial=0.0))
+        mismatched = np.flatnonzero(steers != ~np.isnan(steering))
+        problem = None
+        if len(mismatched):
+            problem = f"batched steering is missing or extra for car {mismatched[0]}"
+        elif diff > tolerance:
+            problem = f"max diff {diff:.3g} above {tolerance:g}"
+        if problem:
+            failures.append(f"{count} cars: {problem}")
+        print(f"{count:6d} {loop * 1e3:9.2f}ms {batched * 1e3:9.2f}ms {loop / batched:7.1f}x {diff:9.1e}  "
+              f"{'FAIL' if problem else 'ok'}")
+
+    if failures:
+        print("\n" + "\n".join(f"FAIL {failure}" for failure in failures))
+        sys.exit(1)
+    print(f"\nbatched steering matches the per-car loop for all {len(args.cars)} fleet sizes")
+
+
+if __name__ == "__main__":
+    main()
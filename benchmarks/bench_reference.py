@@ -0,0 +1,396 @@
+"""
+Differential harness: optimized hot paths against their frozen references.
+
+Runs the same inputs through robotics_lab.reference (the original Python
+loops) and through the optimized code, checks that every result agrees
+within TOLERANCES, and times both sides. It exits with status 1 if any
+check fails, so it can gate CI; a performance change ships with a run of
+this harness showing zero failures.
+
+Inputs are randomized (car poses on and off a track, random polylines, random
+driver inputs and timesteps) and recorded: a scripted drive whose per-tick
+states are checked one by one and whose inputs are replayed closed-loop
+through both stacks ("rollout": detection, steering, Car.update and
+collisions), comparing the whole trajectory. --save-inputs writes the
+recording to an .npz file and --inputs replays one, so a drive that once
+exposed a difference can be kept and re-run.
+
+Checks (optimized side):
+    offset_line           Track._offset_line (KERNELS.offset_line)
+    detect_lane_boundary  CameraSensor._detect_lane_boundary
+    detect_lanes          CameraSensor.update (lanes, flags, center offset)
+    is_on_track           Car.is_on_track
+    calculate_steering    PurePursuitLKA.calculate_steering ("nearest")
+    update                Car.update via Car.drive (Euler and arc integrators)
+    rollout               all of the above closed-loop over the recorded inputs
+
+Usage:
+    python benchmarks/bench_reference.py [--backend numpy] [--poses 300]
+        [--track procedural] [--save-inputs drive.npz | --inputs drive.npz]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from robotics_lab import KERNELS, Car, CameraSensor, ProceduralTrack, PurePursuitLKA, SaoPauloTrack  # noqa: E402
+from robotics_lab import reference  # noqa: E402
+from robotics_lab.config import FPS  # noqa: E402
+
+CHECKS = ["offset_line", "detect_lane_boundary", "detect_lanes", "is_on_track", "calculate_steering",
+          "update", "rollout"]
+
+# Largest allowed absolute difference of any coordinate, angle or speed (px, rad, px/s).
+# Counts, detection flags, lanes, None results and collisions must match exactly.
+TOLERANCES = {
+    "offset_line": 1e-9,
+    "detect_lane_boundary": 1e-9,
+    "detect_lanes": 1e-9,
+    "is_on_track": 0.0,
+    "calculate_steering": 1e-9,
+    "update": 1e-9,
+    "rollout": 1e-6,  # Last-bit differences (Numba's libm) may compound over the drive
+}
+
+RECORD_FIELDS = ("x", "y", "theta", "velocity", "steering_angle", "throttle", "steer", "toggle")
+
+
+class Mismatch(Exception):
+    """Results differ in structure (count, flag, lane or None), not just by a rounding amount"""
+
+
+def difference(expected, actual):
+    """Largest absolute difference between two results of the same shape
+
+    Results are numbers, booleans, strings, None or nested tuples/lists/arrays
+    of them. Raises Mismatch when the structure or a non-numeric value differs.
+    """
+    if expected is None or actual is None or isinstance(expected, (bool, np.bool_, str)):
+        if not (expected is None and actual is None) and expected != actual:
+            raise Mismatch(f"{expected!r} != {actual!r}")
+        return 0.0
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.size == 0 and actual.size == 0:
+        return 0.0  # An empty list and an empty (0, 3) array both mean no detections
+    if expected.shape != actual.shape:
+        raise Mismatch(f"shape {expected.shape} != {actual.shape}")
+    return float(np.abs(expected - actual).max())
+
+
+def records(lane):
+    """DETECTION_DTYPE array as (N, 3) rows"""
+    return np.column_stack([lane["x"], lane["y"], lane["bearing"]]) if len(lane) else np.empty((0, 3))
+
+
+def random_poses(track, count, rng):
+    """(x, y, theta, velocity, steering_angle) rows spread over and beyond the track
+
+    Lateral offsets reach a full track width past the centerline either way, so
+    some cars are off track or see only one lane; headings scatter around the
+    track direction and a few point backwards.
+    """
+    points, next_points = track.get_boundary_segments(0)
+    index = rng.integers(len(points), size=count)
+    along = rng.random(count)[:, None]
+    base = points[index] + along * (next_points[index] - points[index])
+    direction = next_points[index] - points[index]
+    angle = np.arctan2(direction[:, 1], direction[:, 0])
+    lateral = rng.uniform(-track.track_width, track.track_width, count)
+    base += lateral[:, None] * np.column_stack([-np.sin(angle), np.cos(angle)])
+    theta = angle + rng.normal(0.0, 0.3, count) + np.pi * (rng.random(count) < 0.05)
+    theta = np.arctan2(np.sin(theta), np.cos(theta))
+    velocity = rng.uniform(-60.0, 120.0, count)
+    steering = rng.uniform(-np.radians(35), np.radians(35), count)
+    return np.column_stack([base, theta, velocity, steering])
+
+
+def random_polylines(count, rng):
+    """Closed random polylines, some with repeated vertices (zero-length segments)"""
+    lines = []
+    for _ in range(count):
+        points = rng.uniform(-500.0, 500.0, (rng.integers(3, 60), 2))
+        if rng.random() < 0.5:
+            points[rng.integers(1, len(points))] = points[0]
+        lines.append(points)
+    return lines
+
+
+def make_stack(track, pose, integrator="euler"):
+    """Car, CameraSensor and PurePursuitLKA (active) at pose (x, y, theta, velocity, steering_angle)"""
+    car = Car(0.0, 0.0, 0.0)
+    car.track = track
+    camera = CameraSensor(car)
+    stack = car, camera, PurePursuitLKA(car, camera)
+    return place(stack, pose, integrator)
+
+
+def place(stack, pose, integrator="euler"):
+    """Reset a stack from make_stack to a fresh state at pose, returns it"""
+    car, camera, lka = stack
+    car.x, car.y, car.theta, car.velocity, car.steering_angle = pose
+    car.integrator = integrator
+    car.prev_x = car.prev_y = None
+    camera.lane_center_offset = None  # Stays None when a lane is missing, like the reference's
+    lka.active = True
+    lka.was_manually_overridden = False
+    lka.lookahead_point = lka.lookahead_distance = None
+    return stack
+
+
+def record_drive(track, seconds, dt, rng):
+    """Scripted drive with the optimized code: LKA on and speed held at 60, with a 0.3 s
+    manual steer pulse every 2-4 s (which turns LKA off) and LKA back on a second later
+
+    Returns {field: (ticks,) array} for RECORD_FIELDS; "toggle" marks ticks that
+    start by toggling LKA. States are the car's at the start of each tick.
+    """
+    car, camera, lka = make_stack(track, (*track.get_start_position(1), 60.0, 0.0))
+    steps = int(round(seconds / dt))
+    rows = np.zeros((steps, len(RECORD_FIELDS)))
+    next_pulse = rng.uniform(2.0, 4.0)
+    pulse_end = None
+    pulse_steer = 0.0
+    resume_at = np.inf
+    for step in range(steps):
+        t = step * dt
+        toggle = not lka.active and t >= resume_at
+        if toggle:
+            lka.toggle()
+            resume_at = np.inf
+        steer = 0.0
+        if t >= next_pulse:
+            if pulse_end is None:
+                pulse_end = t + 0.3
+                pulse_steer = rng.choice([-1.0, 1.0])
+            if t < pulse_end:
+                steer = pulse_steer
+            else:
+                pulse_end = None
+                next_pulse = t + rng.uniform(2.0, 4.0)
+                resume_at = t + 1.0
+        throttle = min(max((60.0 - car.velocity) / (car.acceleration * dt), -1.0), 1.0)
+        rows[step] = car.x, car.y, car.theta, car.velocity, car.steering_angle, throttle, steer, toggle
+
+        lka_steering = lka.calculate_steering(track) if lka.active else None
+        car.drive(dt, throttle, steer, lka_steering, lka)
+        if not car.is_on_track(track):
+            car.handle_collision()
+    return {name: rows[:, k] for k, name in enumerate(RECORD_FIELDS)}
+
+
+def rollout_optimized(track, recording, dt):
+    """Replay the recorded inputs through the optimized stack, returns (ticks, 5) states"""
+    first = [recording[name][0] for name in RECORD_FIELDS[:5]]
+    car, camera, lka = make_stack(track, first)
+    states = np.empty((len(recording["x"]), 5))
+    for step in range(len(states)):
+        if recording["toggle"][step]:
+            lka.toggle()
+        lka_steering = lka.calculate_steering(track) if lka.active else None
+        car.drive(dt, recording["throttle"][step], recording["steer"][step], lka_steering, lka)
+        if not car.is_on_track(track):
+            car.handle_collision()
+        states[step] = car.x, car.y, car.theta, car.velocity, car.steering_angle
+    return states
+
+
+def rollout_reference(track, recording, dt):
+    """The same replay through the frozen references"""
+    first = [recording[name][0] for name in RECORD_FIELDS[:5]]
+    car, camera, lka = make_stack(track, first)
+    states = np.empty((len(recording["x"]), 5))
+    for step in range(len(states)):
+        if recording["toggle"][step]:
+            lka.active = not lka.active
+        command = reference.calculate_steering(lka, reference.detect_lanes(camera, track)) if lka.active else None
+        x, y, theta, velocity, steering, moved, deactivates = reference.update(
+            car, dt, recording["throttle"][step], recording["steer"][step],
+            None if command is None else command[0], lka.active)
+        if deactivates:
+            lka.active = False
+        if moved:
+            car.prev_x, car.prev_y = car.x, car.y
+        car.x, car.y, car.theta, car.velocity, car.steering_angle = x, y, theta, velocity, steering
+        if not reference.is_on_track(car, track) and car.prev_x is not None:
+            car.x, car.y, car.velocity = car.prev_x, car.prev_y, 0
+        states[step] = car.x, car.y, car.theta, car.velocity, car.steering_angle
+    return states
+
+
+def build_cases(track, poses, rng, recording, dt):
+    """{check: (cases, reference_function, optimized_function)}; each function maps a case to a result
+
+    Each side reuses one car, camera and controller, reset to the case's pose,
+    so timings measure the calls rather than object construction.
+    """
+    lane = track.lane_width
+    boundary = track.get_boundary_segments(-lane)[0]
+    expected_stack = make_stack(track, poses[0])
+    actual_stack = make_stack(track, poses[0])
+    out = np.empty((len(boundary), 3))
+
+    def camera_pose(stack, pose):
+        camera = place(stack, pose)[1]
+        return camera, (*camera.get_camera_position(), pose[2])
+
+    def ref_boundary(pose):
+        camera, view = camera_pose(expected_stack, pose)
+        return reference.detect_lane_boundary(boundary, *view, camera.min_range, camera.max_range,
+                                              camera.field_of_view)
+
+    def opt_boundary(pose):
+        camera, view = camera_pose(actual_stack, pose)
+        return out[:camera._detect_lane_boundary(boundary, *view, out)].copy()
+
+    def ref_lanes(pose):
+        left, right, center, state = reference.detect_lanes(place(expected_stack, pose)[1], track)
+        return (left, right, center, state["left_lane_detected"], state["right_lane_detected"],
+                state["current_lane"], state["lane_center_offset"])
+
+    def opt_lanes(pose):
+        camera = place(actual_stack, pose)[1]
+        left, right, center = camera.update(track)
+        return (records(left), records(right), records(center), camera.left_lane_detected,
+                camera.right_lane_detected, camera.current_lane, camera.lane_center_offset)
+
+    def ref_steering(pose):
+        _, camera, lka = place(expected_stack, pose)
+        return reference.calculate_steering(lka, reference.detect_lanes(camera, track))
+
+    def opt_steering(pose):
+        lka = place(actual_stack, pose)[2]
+        steering = lka.calculate_steering(track)
+        if steering is None:
+            return None
+        return steering, lka.lookahead_point, lka.lookahead_distance
+
+    controls = [(pose, rng.choice([-1.0, 0.0, 1.0, rng.uniform(-1, 1)]), rng.choice([-1.0, 0.0, 0.0, 1.0]),
+                 rng.choice([None, rng.uniform(-0.7, 0.7)]), rng.choice([1 / FPS, 1 / 30, 0.1]),
+                 rng.choice(["euler", "arc"])) for pose in poses]
+
+    def ref_update(case):
+        pose, throttle, steer, lka_steering, step, integrator = case
+        car, _, lka = place(expected_stack, pose, integrator)
+        return reference.update(car, step, throttle, steer, lka_steering, lka.active)
+
+    def opt_update(case):
+        pose, throttle, steer, lka_steering, step, integrator = case
+        car, _, lka = place(actual_stack, pose, integrator)
+        car.drive(step, throttle, steer, lka_steering, lka)
+        return (car.x, car.y, car.theta, car.velocity, car.steering_angle, car.prev_x is not None,
+                lka.was_manually_overridden)
+
+    def ref_on_track(pose):
+        return reference.is_on_track(place(expected_stack, pose)[0], track)
+
+    def opt_on_track(pose):
+        return place(actual_stack, pose)[0].is_on_track(track)
+
+    # Writable copies: Numba compiles a separate version for the track's read-only arrays
+    lines = random_polylines(len(poses) // 4, rng) + [np.array(track.centerline, dtype=float)] * 4
+    offsets = rng.uniform(-2 * lane, 2 * lane, len(lines))
+    return {
+        "offset_line": (list(zip(lines, offsets)), lambda case: reference.offset_line(*case),
+                        lambda case: track._offset_line(*case)),
+        "detect_lane_boundary": (poses, ref_boundary, opt_boundary),
+        "detect_lanes": (poses, ref_lanes, opt_lanes),
+        "is_on_track": (poses, ref_on_track, opt_on_track),
+        "calculate_steering": (poses, ref_steering, opt_steering),
+        "update": (controls, ref_update, opt_update),
+        "rollout": ([recording], lambda rec: rollout_reference(track, rec, dt),
+                    lambda rec: rollout_optimized(track, rec, dt)),
+    }
+
+
+def run_check(cases, reference_function, optimized_function):
+    """(max difference, first mismatch message or None, reference s/call, optimized s/call)"""
+    reference_function(cases[0])  # Warm-up (JIT compilation, caches)
+    optimized_function(cases[0])
+    start = time.perf_counter()
+    expected = [reference_function(case) for case in cases]
+    reference_time = (time.perf_counter() - start) / len(cases)
+    start = time.perf_counter()
+    actual = [optimized_function(case) for case in cases]
+    optimized_time = (time.perf_counter() - start) / len(cases)
+
+    worst = 0.0
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        try:
+            worst = max(worst, max(difference(w, g) for w, g in zip(*_parts(want, got))))
+        except Mismatch as e:
+            return worst, f"case {index}: {e}", reference_time, optimized_time
+    return worst, None, reference_time, optimized_time
+
+
+def _parts(want, got):
+    """Pair up the components of two results (tuples compare field by field)"""
+    if isinstance(want, tuple) and isinstance(got, tuple):
+        if len(want) != len(got):
+            raise Mismatch(f"{len(want)} fields != {len(got)}")
+        return want, got
+    return (want,), (got,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--poses", type=int, default=300, help="randomized car poses per check")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--track", choices=["saopaulo", "procedural"], default="saopaulo")
+    parser.add_argument("--backend", choices=["auto", "numba", "numpy"], default="auto")
+    parser.add_argument("--record-seconds", type=float, default=20.0, help="length of the scripted drive")
+    parser.add_argument("--inputs", help="replay a recorded drive from this .npz instead of recording one")
+    parser.add_argument("--save-inputs", help="write the recorded drive to this .npz")
+    parser.add_argument("--checks", nargs="+", choices=CHECKS, default=CHECKS)
+    args = parser.parse_args()
+
+    KERNELS.select(args.backend)
+    rng = np.random.default_rng(args.seed)
+    dt = 1.0 / FPS
+    recording = None
+    if args.inputs:
+        with np.load(args.inputs) as data:
+            recording = {name: data[name] for name in RECORD_FIELDS}
+            dt = float(data["dt"])
+            args.track = str(data["track"])  # A drive only makes sense on the track it was recorded on
+    track = SaoPauloTrack(offset_x=50, offset_y=50) if args.track == "saopaulo" else ProceduralTrack()
+    if recording is None:
+        recording = record_drive(track, args.record_seconds, dt, rng)
+    if args.save_inputs:
+        np.savez(args.save_inputs, dt=dt, track=args.track, **recording)
+        print(f"recorded drive written to {args.save_inputs}")
+
+    # Randomized poses plus every tenth recorded state
+    recorded = np.column_stack([recording[name] for name in RECORD_FIELDS[:5]])[::10]
+    poses = list(np.vstack([random_poses(track, args.poses, rng), recorded]))
+    cases = build_cases(track, poses, rng, recording, dt)
+
+    print(f"kernels: {'numba' if KERNELS.use_jit else 'numpy'}, track: {args.track} "
+          f"({len(track.centerline)} vertices), {len(poses)} poses, {len(recording['x'])} recorded ticks")
+    print(f"{'check':>20} {'cases':>6} {'max diff':>9} {'tolerance':>9} {'reference':>11} {'optimized':>11} "
+          f"{'speedup':>8}  result")
+    failures = []
+    for name in args.checks:
+        worst, problem, reference_time, optimized_time = run_check(*cases[name])
+        if problem is None and worst > TOLERANCES[name]:
+            problem = f"max diff {worst:.3g} above {TOLERANCES[name]:g}"
+        if problem:
+            failures.append(f"{name}: {problem}")
+        print(f"{name:>20} {len(cases[name][0]):6d} {worst:9.1e} {TOLERANCES[name]:9.0e} "
+              f"{reference_time * 1e3:9.3f}ms {optimized_time * 1e3:9.3f}ms "
+              f"{reference_time / optimized_time:7.1f}x  {'FAIL' if problem else 'ok'}")
+
+    if failures:
+        print("\n" + "\n".join(f"FAIL {failure}" for failure in failures))
+        sys.exit(1)
+    print(f"\nall {len(args.checks)} checks match their references")
+
+
+if __name__ == "__main__":
+    main()
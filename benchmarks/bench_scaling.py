@@ -0,0 +1,188 @@
+"""
+Scaling benchmark: per-tick cost of sensing, collision and control against track size.
+
+Builds ProceduralTrack loops from 10^2 to 10^6 vertices at a fixed vertex
+spacing, so the number of points in the camera's view stays the same and any
+growth in cost comes from work that scans the whole track. Each path's times
+are fitted to t ~ n^slope on a log-log scale: a slope near 0 is constant per
+tick, near 1 is a linear scan. Fixed per-call overhead flattens the fit at
+small sizes, so the slope over the three largest sizes is reported as well.
+
+Paths:
+    sensing          CameraSensor.update, full vertex scan
+    sensing_tracked  update with a LaneTracker (windowed search)
+    sensing_raycast  update in "raycast" mode
+    collision        Car.is_on_track without a distance field
+    control          PurePursuitLKA.calculate_steering on a replayed detection
+
+Usage:
+    python benchmarks/bench_scaling.py [--sizes 100 1000 ...] [--backend numpy]
+        [--csv out.csv] [--plot out.png] [--max-slope 0.2 --paths sensing_tracked control]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from robotics_lab import KERNELS, Car, CameraSensor, LaneTracker, ProceduralTrack, PurePursuitLKA  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+PATHS = ["sensing", "sensing_tracked", "sensing_raycast", "collision", "control"]
+POSITIONS = 8  # Car placements spread around each track
+
+
+class ReplayCamera(CameraSensor):
+    """Camera that returns one precomputed detection, so control is timed without sensing"""
+    def __init__(self, car, track):
+        super().__init__(car)
+        CameraSensor.update(self, track)
+
+    def update(self, track):
+        return self.detections
+
+    def detect_lanes(self, track):
+        return self.detections
+
+
+def place_car(track, index):
+    """Car in lane 1 at centerline vertex index, heading along the track"""
+    points = np.asarray(track.centerline, dtype=float)
+    start, following = points[index], points[(index + 1) % len(points)]
+    theta = np.arctan2(*(following - start)[::-1])
+    x, y = start + (-track.lane_width / 2) * np.array([-np.sin(theta), np.cos(theta)])
+    car = Car(x, y, theta)
+    car.track = track
+    return car
+
+
+def time_call(function, reps):
+    """Seconds per call, averaged over reps calls after one warm-up call"""
+    function()
+    start = time.perf_counter()
+    for _ in range(reps):
+        function()
+    return (time.perf_counter() - start) / reps
+
+
+def measure(track, reps):
+    """Median seconds per call of each path over POSITIONS car placements"""
+    samples = {path: [] for path in PATHS}
+    count = len(track.centerline)
+    for index in np.linspace(0, count, POSITIONS, endpoint=False).astype(int):
+        car = place_car(track, index)
+        camera = CameraSensor(car)
+        samples["sensing"].append(time_call(lambda: camera.update(track), reps))
+        samples["collision"].append(time_call(lambda: car.is_on_track(track), reps))
+
+        lka = PurePursuitLKA(car, ReplayCamera(car, track))
+        lka.toggle()
+        samples["control"].append(time_call(lambda: lka.calculate_steering(track), reps))
+
+        tracked = CameraSensor(car)
+        tracked.tracker = LaneTracker()
+        samples["sensing_tracked"].append(time_call(lambda: tracked.update(track), reps))
+
+        raycast = CameraSensor(car)
+        raycast.detection_mode = "raycast"
+        samples["sensing_raycast"].append(time_call(lambda: raycast.update(track), max(reps // 10, 1)))
+    return {path: float(np.median(times)) if times else None for path, times in samples.items()}
+
+
+def fit_slope(sizes, times):
+    """Exponent b of t ~ n^b by least squares on log-log, None with fewer than two points"""
+    points = [(n, t) for n, t in zip(sizes, times) if t]
+    if len(points) < 2:
+        return None
+    log_n, log_t = np.log10(np.array(points, dtype=float)).T
+    return float(np.polyfit(log_n, log_t, 1)[0])
+
+
+def plot(sizes, results, path):
+    """Log-log plot of microseconds per tick (needs matplotlib)"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print(f"matplotlib is not installed; skipping {path}")
+        return
+    fig, ax = plt.subplots(figsize=(7, 5))
+    for name in PATHS:
+        points = [(n, results[n][name] * 1e6) for n in sizes if results[n][name]]
+        if points:
+            ax.loglog(*zip(*points), marker="o", label=name)
+    ax.set_xlabel("track vertices")
+    ax.set_ylabel("us per tick")
+    ax.set_title(f"Per-tick cost vs track size ({'numba' if KERNELS.use_jit else 'numpy'} kernels)")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend()
+    fig.savefig(path, dpi=120, bbox_inches="tight")
+    print(f"plot written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="track vertex counts")
+    parser.add_argument("--reps", type=int, default=50, help="calls timed per path and car placement")
+    parser.add_argument("--segment-length", type=float, default=20.0, help="vertex spacing in px")
+    parser.add_argument("--curvature", type=float, default=1 / 250, help="peak curvature of the bends, 1/px")
+    parser.add_argument("--backend", choices=["auto", "numba", "numpy"], default="auto")
+    parser.add_argument("--csv", help="write microseconds per tick to this file")
+    parser.add_argument("--plot", help="write a log-log plot to this image (needs matplotlib)")
+    parser.add_argument("--max-slope", type=float,
+                        help="exit 1 if a checked path's slope over the largest sizes is above this")
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=PATHS,
+                        help="paths checked against --max-slope (all are measured)")
+    args = parser.parse_args()
+
+    KERNELS.select(args.backend)
+    sizes = sorted(args.sizes)
+    results = {}
+    print(f"kernels: {'numba' if KERNELS.use_jit else 'numpy'}, spacing {args.segment_length:g} px")
+    print(f"{'vertices':>9} {'build':>8}  " + "  ".join(f"{name:>15}" for name in PATHS))
+    for n in sizes:
+        start = time.perf_counter()
+        track = ProceduralTrack(n, segment_length=args.segment_length, curvature=args.curvature)
+        build = time.perf_counter() - start
+        results[n] = measure(track, args.reps)
+        cells = [f"{results[n][name] * 1e6:13.1f}us" if results[n][name] is not None else f"{'-':>15}"
+                 for name in PATHS]
+        print(f"{n:9d} {build:7.2f}s  " + "  ".join(cells))
+
+    print("\nfitted slope (t ~ n^slope; 0 = constant, 1 = linear):")
+    print(f"  {'path':>15}  {'all':>5}  {'largest 3':>9}")
+    slopes = {}  # Largest-3 slopes, the ones checked by --max-slope
+    for name in PATHS:
+        times = [results[n][name] for n in sizes]
+        overall = fit_slope(sizes, times)
+        slopes[name] = fit_slope(sizes[-3:], times[-3:])
+        print(f"  {name:>15}  " + "  ".join(f"{slope:{width}.2f}" if slope is not None else f"{'-':>{width}}"
+                                           for slope, width in ((overall, 5), (slopes[name], 9))))
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["vertices"] + [f"{name}_us" for name in PATHS])
+            for n in sizes:
+                writer.writerow([n] + ["" if results[n][name] is None else f"{results[n][name] * 1e6:.3f}"
+                                       for name in PATHS])
+        print(f"csv written to {args.csv}")
+    if args.plot:
+        plot(sizes, results, args.plot)
+
+    if args.max_slope is not None:
+        steep = [name for name in args.paths if slopes[name] is not None and slopes[name] > args.max_slope]
+        if steep:
+            print(f"FAIL: slope above {args.max_slope:g} for {', '.join(steep)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Snapshot handoff benchmark: how long each side of --sim-process waits for the lock.
+
+Starts the simulation process (SimulationProcess) at --rate Hz and reads
+snapshots for --seconds, every --interval seconds (0: back to back, the
+heaviest contention a renderer can cause). The child and the reader share
+the SnapshotBuffer lock only to swap slot indices; this reports how long
+each side waited for it, including waits behind a holder that the OS
+preempted (likely when both processes share one core).
+
+Usage:
+    python benchmarks/bench_snapshots.py [--seconds 10] [--rate 60] [--interval 0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from robotics_lab import CameraSensor, Car, SaoPauloTrack  # noqa: E402
+from robotics_lab.sim_process import SimulationProcess  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="reading time")
+    parser.add_argument("--rate", type=float, default=60.0, help="simulation rate in Hz")
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between reads")
+    args = parser.parse_args()
+
+    track = SaoPauloTrack(offset_x=50, offset_y=50)
+    capacity = max(len(track.centerline), CameraSensor(Car(0, 0, 0)).num_rays)
+    sim = SimulationProcess(capacity, rate=args.rate)
+    sim.start()
+    first = sim.wait_for_snapshot()
+    if first is None:
+        print("FAIL: simulation process did not start")
+        sim.stop()
+        sys.exit(1)
+    first_tick = int(first["tick"])  # `first` is one of the reader's reused arrays
+
+    buffer = sim.snapshots
+    waits = []
+    failed = 0
+    limit = time.perf_counter() + args.seconds
+    while time.perf_counter() < limit:
+        before = buffer.lock_wait_total
+        if sim.latest() is None:
+            failed += 1
+        waits.append(buffer.lock_wait_total - before)
+        if args.interval:
+            time.sleep(args.interval)
+    last = sim.stop()
+
+    ticks = int(last["tick"]) - first_tick
+    writer_max, writer_total = last["lock_wait"].tolist()
+    waits = np.array(waits) * 1e6
+    print(f"{ticks} ticks at {ticks / args.seconds:.1f} Hz, {len(waits)} reads ({failed} failed)")
+    print(f"reader wait: mean {waits.mean():.1f} us, p99 {np.percentile(waits, 99):.1f} us, "
+          f"max {waits.max():.0f} us")
+    print(f"writer wait: mean {writer_total / (int(last['tick']) or 1) * 1e6:.1f} us, "
+          f"max {writer_max * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
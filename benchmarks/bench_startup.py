@@ -0,0 +1,85 @@
+"""
+Startup benchmark for the robotics_lab package.
+
+Times `import robotics_lab` in fresh interpreters and checks that the
+simulation core does not pull in pygame, OpenGL or Numba.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--importtime]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pygame", "OpenGL", "numba")
+
+PROBE = (
+    "import sys, robotics_lab\n"
+    "loaded = [m for m in %r if m in sys.modules]\n"
+    "print(','.join(loaded))\n" % (HEAVY_MODULES,)
+)
+
+
+def run_probe(importtime=False):
+    """Import robotics_lab in a fresh interpreter; return (seconds, heavy modules, stderr)"""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", PROBE]
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True)
+    elapsed = time.perf_counter() - start
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return elapsed, loaded, result.stderr
+
+
+def baseline_time():
+    """Time of a bare interpreter start, subtracted from the import timings"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true",
+                        help="print the slowest imports reported by -X importtime")
+    args = parser.parse_args()
+
+    bare = min(baseline_time() for _ in range(args.runs))
+    timings = []
+    for _ in range(args.runs):
+        elapsed, loaded, _ = run_probe()
+        timings.append(elapsed)
+        if loaded:
+            print(f"FAIL: import robotics_lab loaded {', '.join(loaded)}")
+            sys.exit(1)
+
+    best = min(timings)
+    print(f"interpreter start:     {bare * 1000:7.1f} ms")
+    print(f"import robotics_lab:   {best * 1000:7.1f} ms (best of {args.runs})")
+    print(f"import cost:           {(best - bare) * 1000:7.1f} ms")
+    print(f"heavy modules loaded:  none ({', '.join(HEAVY_MODULES)} stay lazy)")
+
+    if args.importtime:
+        _, _, stderr = run_probe(importtime=True)
+        rows = []
+        for line in stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            parts = line.split("|")
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            rows.append((int(parts[1]), parts[2].rstrip()))
+        print("\nslowest imports (cumulative us):")
+        for cumulative, name in sorted(rows, reverse=True)[:15]:
+            print(f"  {cumulative:9d}  {name}")
+
+
+if __name__ == "__main__":
+    main()
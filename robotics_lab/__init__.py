@@ -0,0 +1,40 @@
+"""Robotics lab lane keeping simulation
+
+The simulation (kinematics, sensor, controller, track, environments,
+traffic, metrics) imports only NumPy. Rendering classes and the interactive main()
+are loaded on first access, which is when pygame and OpenGL get imported.
+"""
+
+from .car import Car
+from .config import FPS, HEIGHT, MINIMAP_SIZE, WIDTH
+from .controllers import LANE_CENTER_DTYPE, PurePursuitLKA, point_at_arc_length
+from .envs import LaneKeepingEnv, VectorLaneKeepingEnv, lane_keeping_reward
+from .kernels import KERNELS, KernelBackend
+from .kinematics import ackermann_step, euler_position_error_bound
+from .metrics import KPIAggregator, QuantileSketch, RunningMoments
+from .sensors import DETECTION_DTYPE, CameraSensor, LaneDetectionBatch, LaneTracker, cast_rays
+from .track import ProceduralTrack, SaoPauloTrack, SegmentGrid, TrackDistanceField
+from .traffic import SpatialHash, TrafficSimulation, oriented_boxes_overlap
+
+# Names whose modules import pygame/OpenGL, resolved on first access
+_LAZY_ATTRIBUTES = {
+    "Renderer3D": "robotics_lab.render.scene",
+    "TrackRenderer": "robotics_lab.render.scene",
+    "CarRenderer": "robotics_lab.render.scene",
+    "ShaderRenderer3D": "robotics_lab.render.shader",
+    "ShaderTrackRenderer": "robotics_lab.render.shader",
+    "ShaderCarRenderer": "robotics_lab.render.shader",
+    "Minimap": "robotics_lab.render.overlay",
+    "HUD": "robotics_lab.render.overlay",
+    "init_display": "robotics_lab.app",
+    "main": "robotics_lab.app",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,6 @@
+"""Run the interactive simulation: python -m robotics_lab"""
+
+from .app import main
+
+if __name__ == "__main__":
+    main()
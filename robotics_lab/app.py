@@ -0,0 +1,412 @@
+"""Interactive 3D simulation: window setup and main loop"""
+
+import argparse
+import sys
+import os
+import time
+
+from . import render  # Sets the OpenGL environment before pygame/OpenGL load
+import pygame
+from pygame.locals import *
+from OpenGL.GL import *
+from OpenGL.error import NullFunctionError
+
+from .config import WIDTH, HEIGHT, MINIMAP_SIZE, FPS
+from .car import Car, keyboard_controls
+from .controllers import LOOKAHEAD_MODES, PurePursuitLKA
+from .sensors import CameraSensor, LaneTracker
+from .sim_process import SimulationProcess, SnapshotCamera, apply_snapshot
+from .track import SaoPauloTrack
+from .render.overlay import HUD, Minimap, WHITE
+from .render.quality import QUALITY_LEVELS, QualityGovernor
+from .render.scaling import MIN_RENDER_SCALE, step_render_scale
+from .render.minimap import MinimapGeometry
+from .render.trail import TrajectoryTrail
+from .render.scene import MinimapRenderer, Renderer3D, TrackRenderer
+
+
+RENDERERS = ("fixed", "shader")
+MINIMAPS = ("gpu", "cpu")
+
+
+def init_display(core_profile=False):
+    """Check for a display, initialize pygame and open the OpenGL window
+
+    With core_profile=True a 3.3 core context is requested for the shader renderer.
+    """
+    # Check if display is available
+    if 'DISPLAY' not in os.environ:
+        print("ERROR: No display found!")
+        print("Solutions:")
+        print("1. If running over SSH: use 'ssh -X' for X11 forwarding")
+        print("2. If local: ensure you're running in a graphical environment")
+        print("3. For headless: install and use xvfb-run: 'xvfb-run python robotics_lab_3d.py'")
+        sys.exit(1)
+
+    # Initialize Pygame
+    pygame.init()
+
+    if core_profile:
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_CORE)
+
+    # Try to create OpenGL context with fallback options
+    screen = None
+    error_messages = []
+
+    # Try different display modes in order of preference
+    display_configs = [
+        (DOUBLEBUF | OPENGL, "Double-buffered OpenGL"),
+        (OPENGL, "Single-buffered OpenGL"),
+        (DOUBLEBUF | OPENGL | HWSURFACE, "Hardware-accelerated OpenGL"),
+    ]
+
+    for flags, description in display_configs:
+        try:
+            print(f"Trying {description}...")
+            screen = pygame.display.set_mode((WIDTH, HEIGHT), flags)
+            pygame.display.set_caption("Lab 1 - 3D Car Simulation with Hood View")
+            print(f"✓ Successfully initialized with {description}")
+            break
+        except pygame.error as e:
+            error_messages.append(f"  {description}: {e}")
+            continue
+
+    if screen is None:
+        print("\nERROR: Could not initialize OpenGL display!")
+        print("\nTried the following configurations:")
+        for msg in error_messages:
+            print(msg)
+        print("\nPossible solutions:")
+        print("1. Check OpenGL drivers: 'glxinfo | grep OpenGL'")
+        print("2. Install mesa-utils: 'sudo apt-get install mesa-utils'")
+        print("3. Install required GL libraries: 'sudo apt-get install libgl1-mesa-glx libglu1-mesa'")
+        print("4. For virtual display: 'sudo apt-get install xvfb && xvfb-run -s \"-screen 0 1920x1080x24\" python robotics_lab_3d.py'")
+        print("5. Try software rendering: 'export LIBGL_ALWAYS_SOFTWARE=1'")
+        sys.exit(1)
+
+    return screen
+
+
+def create_renderers(name, track):
+    """Scene renderer and track renderer for "fixed" (fixed-function) or "shader" (GLSL 3.3 core)"""
+    if name == "shader":
+        from .render.shader import ShaderRenderer3D, ShaderTrackRenderer
+        renderer = ShaderRenderer3D(WIDTH, HEIGHT)
+        return renderer, ShaderTrackRenderer(renderer, track)
+    return Renderer3D(WIDTH, HEIGHT), TrackRenderer(track)
+
+
+def create_minimap_renderer(name, renderer, minimap):
+    """Framebuffer minimap for the scene renderer, or None to keep the pygame minimap
+
+    Falls back to None (with a message) when the context cannot render to a texture.
+    """
+    geometry = MinimapGeometry(minimap)
+    try:
+        if name == "shader":
+            from .render.shader import ShaderMinimapRenderer
+            return ShaderMinimapRenderer(renderer, geometry)
+        return MinimapRenderer(geometry, WIDTH, HEIGHT)
+    except (RuntimeError, GLError, NullFunctionError) as e:
+        print(f"GPU minimap unavailable ({e}); drawing the minimap with pygame")
+        return None
+
+
+def apply_quality(settings, renderer, track_renderer):
+    """Push governor settings that live in the renderers"""
+    renderer.sphere_lod = settings["sphere_lod"]
+    track_renderer.set_quality(settings["scenery_density"], settings["sphere_lod"])
+
+
+def set_render_scale(renderer, scale):
+    """Change the 3D pass resolution, staying at the current one if the offscreen target fails"""
+    try:
+        renderer.set_render_scale(scale)
+    except (RuntimeError, GLError, NullFunctionError) as e:
+        print(f"Render scaling unavailable ({e}); drawing the 3D view at {renderer.render_scale:.0%}")
+        return
+    print(f"Render scale {renderer.render_scale:.0%}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="3D lane keeping simulation")
+    parser.add_argument("--renderer", choices=RENDERERS,
+                        default=os.environ.get("ROBOTICS_LAB_RENDERER", "fixed"),
+                        help="fixed-function OpenGL (default) or GLSL 3.3 core shaders")
+    parser.add_argument("--minimap", choices=MINIMAPS, default="gpu",
+                        help="draw the minimap on the GPU into a texture (default) or with pygame on the CPU")
+    parser.add_argument("--trail", type=float, default=30.0, metavar="SECONDS",
+                        help="show the path driven over the last SECONDS on the minimap, 0 to hide (default: %(default)s)")
+    parser.add_argument("--trail-color", choices=["solid", "error"], default="solid",
+                        help="draw the trail in one color (default) or shaded by lateral error from the lane center")
+    parser.add_argument("--lookahead", choices=LOOKAHEAD_MODES, default="nearest",
+                        help="LKA target: nearest detected center point (default) or interpolated by arc length")
+    parser.add_argument("--track-lanes", action="store_true",
+                        help="search lanes around last frame's detections and smooth the tracking errors")
+    parser.add_argument("--render-scale", type=float, default=1.0, metavar="SCALE",
+                        help=f"draw the 3D view at SCALE ({MIN_RENDER_SCALE}-1) of the window resolution and "
+                             "upscale it, the HUD stays sharp; [ and ] change it at runtime (default: %(default)s)")
+    parser.add_argument("--quality", default="auto",
+                        choices=["auto"] + [str(level) for level in range(len(QUALITY_LEVELS))],
+                        help="adapt quality to the frame budget (default) or pin a level, 0 = best")
+    parser.add_argument("--sim-process", action="store_true",
+                        help="run physics, sensing and control in a separate process at a fixed rate")
+    parser.add_argument("--sim-rate", type=float, default=FPS,
+                        help="control rate in Hz with --sim-process (default: %(default)s)")
+    parser.add_argument("--telemetry", metavar="ENDPOINT",
+                        help="stream per-tick state as JSON lines to local subscribers on "
+                             "tcp:HOST:PORT or unix:PATH")
+    parser.add_argument("--telemetry-queue", type=int, default=256, metavar="RECORDS",
+                        help="records buffered per telemetry subscriber before the oldest are dropped "
+                             "(default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main simulation loop"""
+    args = parse_args(argv)
+
+    # Create track
+    track = SaoPauloTrack(offset_x=50, offset_y=50)
+
+    # Create car
+    start_x, start_y, start_theta = track.get_start_position(lane_number=1)
+    car = Car(start_x, start_y, start_theta)
+    car.track = track  # Store reference for camera
+
+    # Create camera sensor (a mirror of the child's camera with --sim-process)
+    if args.sim_process:
+        camera = SnapshotCamera(car)
+    else:
+        camera = CameraSensor(car)
+        if args.track_lanes:
+            camera.tracker = LaneTracker()
+
+    # Create LKA controller
+    lka = PurePursuitLKA(car, camera, lookahead_mode=args.lookahead)
+
+    # Start the simulation process before the window exists, so the child
+    # inherits no SDL or OpenGL state
+    sim = None
+    if args.sim_process:
+        capacity = max(len(track.centerline), camera.num_rays)
+        sim = SimulationProcess(capacity, rate=args.sim_rate, lookahead_mode=args.lookahead,
+                                track_lanes=args.track_lanes)
+        sim.start()
+
+    # Telemetry server (imported only when asked for: it pulls in asyncio)
+    publisher = None
+    if args.telemetry:
+        from .telemetry import TelemetryPublisher
+        try:
+            publisher = TelemetryPublisher(args.telemetry, queue_size=args.telemetry_queue)
+            publisher.start()
+        except (ValueError, OSError) as e:
+            print(f"Telemetry unavailable ({e})")
+            publisher = None
+        else:
+            print(f"Telemetry on {publisher.address()}")
+
+    init_display(core_profile=args.renderer == "shader")
+
+    # Clock for controlling frame rate
+    clock = pygame.time.Clock()
+
+    # Create renderers
+    renderer, track_renderer = create_renderers(args.renderer, track)
+    if args.render_scale != 1.0:
+        set_render_scale(renderer, args.render_scale)
+
+    # Create minimap (drawn by the GPU unless --minimap cpu or no framebuffer support)
+    minimap = Minimap(MINIMAP_SIZE, track)
+    trail = None
+    if args.trail > 0:
+        trail = TrajectoryTrail(args.trail, track=track if args.trail_color == "error" else None)
+        minimap.trail = trail
+    gpu_minimap = create_minimap_renderer(args.renderer, renderer, minimap) if args.minimap == "gpu" else None
+
+    # Create HUD
+    hud = HUD()
+
+    # Quality governor (pinned level: never steps)
+    if args.quality == "auto":
+        governor = QualityGovernor(1.0 / FPS)
+    else:
+        governor = QualityGovernor(1.0 / FPS, level=int(args.quality), degrade_after=float("inf"),
+                                   upgrade_after=float("inf"))
+    apply_quality(governor.settings, renderer, track_renderer)
+    frame_count = 0
+
+    if sim:
+        snapshot = sim.wait_for_snapshot()
+        if snapshot is None:
+            print("ERROR: Simulation process did not start")
+            sim.stop()
+            pygame.quit()
+            sys.exit(1)
+        apply_snapshot(snapshot, car, camera, lka)
+        first_tick, first_time = int(snapshot["tick"]), time.perf_counter()
+
+    # Main loop
+    running = True
+    dt = 1.0 / FPS
+    sim_time = float(snapshot["time"]) if sim else 0.0
+    tick = int(snapshot["tick"]) if sim else 0
+    published_tick = None
+    detections = camera.detections
+
+    while running:
+        frame_start = time.perf_counter()
+        quality = governor.settings
+
+        # Handle events
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_f:
+                    if sim:
+                        sim.toggle_lka()
+                    else:
+                        lka.toggle()
+                elif event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+                    direction = -1 if event.key == pygame.K_LEFTBRACKET else 1
+                    scale = step_render_scale(renderer.render_scale, direction)
+                    if scale != renderer.render_scale:
+                        set_render_scale(renderer, scale)
+
+        # Get keyboard state
+        keys = pygame.key.get_pressed()
+
+        if sim:
+            # The child steps the car; show its newest tick (keep the last one on a failed read)
+            sim.send_inputs(*keyboard_controls(keys))
+            snapshot = sim.latest()
+            if snapshot is not None:
+                apply_snapshot(snapshot, car, camera, lka)
+                sim_time = float(snapshot["time"])
+                tick = int(snapshot["tick"])
+                detections = camera.detections  # The snapshot's lanes
+        else:
+            # Detect once per tick: the controller, telemetry and renderers share it
+            detections = camera.update(track)
+
+            # Calculate LKA steering
+            lka_steering = lka.calculate_steering(track, detections) if lka.active else None
+
+            # Update car
+            car.update(dt, keys, lka_steering, lka)
+
+            # Check collision with track boundaries
+            if not car.is_on_track(track):
+                car.handle_collision()
+            sim_time += dt
+            tick += 1
+
+        if trail is not None:
+            trail.record(sim_time, car.x, car.y)
+
+        # Once per simulation tick (frames between the child's ticks repeat the last one)
+        if publisher is not None and tick != published_tick:
+            publisher.publish(tick, sim_time, car, camera, lka, detections)
+            published_tick = tick
+
+        # === 3D RENDERING ===
+        # Into the offscreen target below render scale 1, upscaled by end_scene
+        renderer.begin_scene()
+
+        # Setup 3D view
+        renderer.setup_3d_view(car)
+
+        # Draw track
+        track_renderer.draw()
+
+        # Draw lane markers
+        if quality["markers"]:
+            renderer.draw_lane_markers_3d(camera)
+
+        # Draw LKA lookahead point
+        renderer.draw_lookahead_point_3d(lka)
+
+        # Draw car (disabled in first-person, but could draw for debugging)
+        # car.draw_3d()
+
+        renderer.end_scene()
+
+        # === 2D OVERLAY RENDERING ===
+        # Create pygame surface for 2D overlay
+        overlay_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        overlay_surface.fill((0, 0, 0, 0))
+
+        # Render HUD
+        hud.render(overlay_surface, car, camera, lka)
+
+        # Render minimap (reuses the last frame's texture or surface between refreshes)
+        if frame_count % quality["minimap_interval"] == 0:
+            if gpu_minimap:
+                gpu_minimap.render(car, camera, lka)
+            else:
+                minimap_surface = minimap.render(car, camera, lka)
+        minimap_pos = (WIDTH - MINIMAP_SIZE - 10, 10)
+
+        # Draw minimap background
+        bg_rect = pygame.Rect(minimap_pos[0] - 5, minimap_pos[1] - 5,
+                             MINIMAP_SIZE + 10, MINIMAP_SIZE + 10)
+        pygame.draw.rect(overlay_surface, (0, 0, 0, 200), bg_rect)
+        pygame.draw.rect(overlay_surface, WHITE, bg_rect, 2)
+
+        if not gpu_minimap:
+            overlay_surface.blit(minimap_surface, minimap_pos)
+
+        # Draw controls hint
+        hint_font = pygame.font.Font(None, 20)
+        hint_texts = [
+            "W/S: Accel/Brake | A/D: Steer | F: Toggle LKA | [ ]: Render Scale | ESC: Exit"
+        ]
+        y = HEIGHT - 30
+        for hint in hint_texts:
+            text = hint_font.render(hint, True, WHITE)
+            rect = text.get_rect(center=(WIDTH // 2, y))
+            bg_rect = rect.inflate(10, 5)
+            s = pygame.Surface((bg_rect.width, bg_rect.height), pygame.SRCALPHA)
+            pygame.draw.rect(s, (0, 0, 0, 150), (0, 0, bg_rect.width, bg_rect.height))
+            overlay_surface.blit(s, bg_rect.topleft)
+            overlay_surface.blit(text, rect)
+            y += 25
+
+        if quality["overlay_scale"] < 1.0:
+            size = (int(WIDTH * quality["overlay_scale"]), int(HEIGHT * quality["overlay_scale"]))
+            overlay_surface = pygame.transform.scale(overlay_surface, size)
+        renderer.draw_overlay(overlay_surface)
+        if gpu_minimap:
+            gpu_minimap.draw(*minimap_pos)
+
+        # Update display
+        pygame.display.flip()
+
+        # Adapt quality to the measured work time (before the frame-rate wait)
+        if governor.update(time.perf_counter() - frame_start):
+            print(f"Quality level {governor.level}: {governor.settings}")
+            apply_quality(governor.settings, renderer, track_renderer)
+        frame_count += 1
+
+        clock.tick(FPS)
+
+    if sim:
+        elapsed = time.perf_counter() - first_time
+        last = sim.stop()
+        if last is not None:
+            ticks = int(last["tick"]) - first_tick
+            print(f"Simulation process: {ticks} ticks in {elapsed:.1f}s ({ticks / elapsed:.1f} Hz), "
+                  f"{int(last['collisions'])} collisions")
+            print(f"Snapshot lock wait: longest {last['lock_wait'][0] * 1e6:.0f} us in the simulation, "
+                  f"{sim.snapshots.lock_wait_max * 1e6:.0f} us in the renderer")
+    if publisher is not None:
+        published, dropped = publisher.stop()
+        print(f"Telemetry: {published} records published, {dropped} dropped for slow subscribers")
+    pygame.quit()
+    sys.exit()
@@ -0,0 +1,224 @@
+"""Car with Ackermann steering kinematics"""
+
+import numpy as np
+
+from .kernels import KERNELS
+
+COLLISION_MODES = ("endpoint", "swept")
+IMPACT_CLEARANCE = 0.01  # Distance kept from the road edge after a swept collision (pixels)
+
+
+def keyboard_controls(keys):
+    """Map pygame key state (W/S throttle, A/D steering) to (throttle, steer) in [-1, 1]"""
+    import pygame  # Only the interactive keyboard path needs pygame
+
+    if keys[pygame.K_w]:
+        throttle = 1.0
+    elif keys[pygame.K_s]:
+        throttle = -1.0
+    else:
+        throttle = 0.0
+
+    if keys[pygame.K_a]:
+        steer = 1.0   # Turn LEFT (SWAPPED for 3D view)
+    elif keys[pygame.K_d]:
+        steer = -1.0  # Turn RIGHT (SWAPPED for 3D view)
+    else:
+        steer = 0.0
+    return throttle, steer
+
+
+class Car:
+    """Car with Ackermann steering kinematics - identical to original"""
+    __slots__ = ("x", "y", "theta", "length", "width", "wheelbase", "velocity", "steering_angle",
+                 "max_velocity", "max_steering_angle", "acceleration", "deceleration",
+                 "steering_rate", "friction", "integrator", "height", "hood_height",
+                 "collision", "track", "prev_x", "prev_y", "impact_point")
+
+    def __init__(self, x, y, theta):
+        # Position and orientation
+        self.x = x
+        self.y = y
+        self.theta = theta  # heading angle (radians)
+
+        # Car dimensions
+        self.length = 40  # car length (pixels)
+        self.width = 20   # car width (pixels)
+        self.wheelbase = 30  # L in the kinematic model
+
+        # Kinematic state
+        self.velocity = 0.0  # V - linear velocity
+        self.steering_angle = 0.0  # φ (phi) - steering angle (radians)
+
+        # Control parameters
+        self.max_velocity = 120.0
+        self.max_steering_angle = np.radians(35)
+        self.acceleration = 50.0
+        self.deceleration = 100.0
+        self.steering_rate = np.radians(60)
+        self.friction = 30.0
+
+        # Kinematics integrator: "euler" (original) or "arc" (exact for large dt)
+        self.integrator = "euler"
+
+        # Collision check: "endpoint" (original, a long step can jump across
+        # the road edge) or "swept" (checks the whole step, see is_on_track)
+        self.collision = "endpoint"
+
+        # 3D rendering properties
+        self.height = 15  # car height for 3D
+        self.hood_height = 10  # camera mount height
+
+        # Track the car drives on (set by the owner) and the position before the
+        # last move, None until the car has moved
+        self.track = None
+        self.prev_x = None
+        self.prev_y = None
+        self.impact_point = None  # Where a swept step reached the edge, for handle_collision
+
+    def update(self, dt, keys, lka_steering=None, lka_controller=None):
+        """Update car state based on Ackermann steering model"""
+        throttle, steer = keyboard_controls(keys)
+        self.drive(dt, throttle, steer, lka_steering, lka_controller)
+
+    def drive(self, dt, throttle=0.0, steer=0.0, lka_steering=None, lka_controller=None):
+        """Update car state from throttle/steering inputs (no keyboard needed)
+
+        throttle: in [-1, 1], positive accelerates, negative brakes/reverses,
+                  zero coasts with friction
+        steer: in [-1, 1], manual steering rate (positive = left), non-zero
+               deactivates LKA
+        lka_steering: steering angle command used when not steering manually
+        """
+        # Handle acceleration
+        if throttle > 0:
+            self.velocity += self.acceleration * throttle * dt
+        elif throttle < 0:
+            self.velocity += self.deceleration * throttle * dt
+        else:
+            # Apply friction
+            if self.velocity > 0:
+                self.velocity -= self.friction * dt
+                if self.velocity < 0:
+                    self.velocity = 0
+            elif self.velocity < 0:
+                self.velocity += self.friction * dt
+                if self.velocity > 0:
+                    self.velocity = 0
+
+        # Limit velocity
+        self.velocity = min(max(self.velocity, -self.max_velocity * 0.5), self.max_velocity)
+
+        # Handle steering
+        manual_steering = steer != 0
+
+        if manual_steering:
+            if lka_controller and lka_controller.active:
+                lka_controller.deactivate()
+
+            self.steering_angle += self.steering_rate * steer * dt
+        elif lka_steering is not None:
+            self.steering_angle = lka_steering
+        else:
+            if abs(self.steering_angle) > 0.01:
+                self.steering_angle *= 0.9
+            else:
+                self.steering_angle = 0
+
+        # Limit steering angle
+        self.steering_angle = min(max(self.steering_angle, -self.max_steering_angle), self.max_steering_angle)
+
+        # Ackermann steering kinematics
+        if abs(self.velocity) > 0.1:
+            # Store previous position for collision handling
+            prev_x, prev_y = self.x, self.y
+
+            # Update position and orientation
+            self.x, self.y, self.theta = KERNELS.ackermann_step(
+                self.x, self.y, self.theta, self.velocity,
+                self.steering_angle, self.wheelbase, dt, self.integrator == "arc"
+            )
+
+            # Check for collision and revert if off-track (handled in main loop)
+            self.prev_x = prev_x
+            self.prev_y = prev_y
+
+    def get_front_axle_position(self):
+        """Return front axle center position"""
+        front_axle_x = self.x + (self.length/2 - 5) * np.cos(self.theta)
+        front_axle_y = self.y + (self.length/2 - 5) * np.sin(self.theta)
+        return front_axle_x, front_axle_y
+
+    def get_front_wheel_positions(self):
+        """Return left and right front wheel centers"""
+        front_axle_x, front_axle_y = self.get_front_axle_position()
+        wheel_angle = self.theta + np.pi/2
+        wheel_half_width = self.width / 2
+
+        left_wheel_x = front_axle_x + wheel_half_width * np.cos(wheel_angle)
+        left_wheel_y = front_axle_y + wheel_half_width * np.sin(wheel_angle)
+        right_wheel_x = front_axle_x - wheel_half_width * np.cos(wheel_angle)
+        right_wheel_y = front_axle_y - wheel_half_width * np.sin(wheel_angle)
+
+        return (left_wheel_x, left_wheel_y), (right_wheel_x, right_wheel_y)
+
+    def get_hood_camera_position(self):
+        """Get position and orientation for hood camera"""
+        # Camera at front of car, slightly above hood
+        cam_x = self.x + (self.length/2 - 10) * np.cos(self.theta)
+        cam_y = self.y + (self.length/2 - 10) * np.sin(self.theta)
+        cam_z = self.hood_height
+
+        # Look-at point ahead of car
+        look_distance = 50
+        look_x = self.x + look_distance * np.cos(self.theta)
+        look_y = self.y + look_distance * np.sin(self.theta)
+        look_z = self.hood_height
+
+        return (cam_x, cam_y, cam_z), (look_x, look_y, look_z)
+
+    def is_on_track(self, track):
+        """Check if car is within track boundaries
+
+        With collision = "swept" the step from (prev_x, prev_y) is also tested
+        against the road edge (track.get_collision_walls at the same one car
+        width margin), so a long or fast step cannot jump across the edge
+        between checks. The step is swept as a straight line: exact for the
+        Euler integrator, the chord of the arc for "arc". The car's footprint
+        is covered by the margin, as in the endpoint check.
+        """
+        self.impact_point = None
+        if self.collision == "swept" and self.prev_x is not None:
+            walls = track.get_collision_walls(self.width)
+            impact = walls.time_of_impact(self.prev_x, self.prev_y, self.x, self.y)
+            if impact is not None:
+                # Stop just short of the edge so the next step starts on the road
+                step = np.hypot(self.x - self.prev_x, self.y - self.prev_y)
+                impact = max(impact - IMPACT_CLEARANCE / step, 0.0)
+                impact_x = self.prev_x + impact * (self.x - self.prev_x)
+                impact_y = self.prev_y + impact * (self.y - self.prev_y)
+                # The walls and the endpoint rule differ a little at corners: if the
+                # impact point fails the rule, handle_collision reverts to prev instead
+                if self._within_track(track, impact_x, impact_y):
+                    self.impact_point = (impact_x, impact_y)
+                return False
+
+        return self._within_track(track, self.x, self.y)
+
+    def _within_track(self, track, x, y):
+        """Endpoint check: (x, y) within half the track width plus one car width of the centerline
+        (up to one car width past the edge with the distance field), by track.within_bounds"""
+        return bool(track.within_bounds(x, y, self.width))
+
+    def handle_collision(self):
+        """Handle collision by stopping at the swept impact point, or reverting to the previous position"""
+        if self.impact_point is not None:
+            self.x, self.y = self.impact_point
+            # The step is used up: a repeated check without moving sweeps nothing
+            self.prev_x, self.prev_y = self.impact_point
+            self.impact_point = None
+            self.velocity = 0
+        elif self.prev_x is not None:
+            self.x = self.prev_x
+            self.y = self.prev_y
+            self.velocity = 0  # Stop the car
@@ -0,0 +1,9 @@
+"""Shared window and timing settings"""
+
+# Screen settings
+WIDTH = 1600
+HEIGHT = 900
+MINIMAP_SIZE = 500  # Size of minimap in top-right corner (increased for better visibility)
+
+# Simulation/frame rate
+FPS = 60
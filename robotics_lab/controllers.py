@@ -0,0 +1,247 @@
+"""Pure Pursuit lane keeping controller"""
+
+import numpy as np
+
+from .kernels import KERNELS
+from .sensors import as_records, as_rows, batch_chunks
+
+
+LOOKAHEAD_MODES = ("nearest", "arc_length")
+
+# One lane center: midpoint of a left/right detection pair and its distance from the car
+LANE_CENTER_DTYPE = np.dtype([("x", np.float64), ("y", np.float64), ("distance", np.float64)])
+
+
+def point_at_arc_length(polyline, distance):
+    """Point at arc length `distance` along an (N, 2) polyline, clamped to its ends
+
+    Cumulative segment lengths are binary-searched and the point is
+    interpolated linearly inside the segment that contains it.
+    """
+    polyline = np.asarray(polyline, dtype=float)
+    seg_length = np.hypot(*np.diff(polyline, axis=0).T)
+    arc = np.concatenate([[0.0], np.cumsum(seg_length)])
+    if distance <= 0 or arc[-1] == 0:
+        return polyline[0]
+    if distance >= arc[-1]:
+        return polyline[-1]
+
+    i = np.searchsorted(arc, distance, side="right") - 1  # arc[i] <= distance < arc[i + 1]
+    t = (distance - arc[i]) / seg_length[i]
+    return polyline[i] + t * (polyline[i + 1] - polyline[i])
+
+
+class PurePursuitLKA:
+    """Pure Pursuit Lane Keeping Assist - identical logic to original
+
+    lookahead_mode "nearest" (original) targets the paired lane center point
+    whose distance is closest to the lookahead distance. "arc_length" orders
+    the lane center points along the car's heading into a polyline starting
+    at the car and interpolates the point exactly at the lookahead distance
+    along it, so the target moves continuously instead of jumping between
+    detections.
+
+    lane_center_points holds the last tick's LANE_CENTER_DTYPE pairs, a view
+    into a buffer reused every tick.
+    """
+    __slots__ = ("car", "camera", "lookahead_mode", "active", "was_manually_overridden",
+                 "base_lookahead_distance", "lookahead_gain", "min_lookahead", "max_lookahead",
+                 "steering_gain", "lookahead_point", "lookahead_distance", "lane_center_points",
+                 "center_rows")
+
+    def __init__(self, car, camera, lookahead_mode="nearest"):
+        if lookahead_mode not in LOOKAHEAD_MODES:
+            raise ValueError(f"Unknown lookahead mode: {lookahead_mode!r}")
+        self.car = car
+        self.camera = camera
+        self.lookahead_mode = lookahead_mode
+        self.active = False
+        self.was_manually_overridden = False
+
+        self.base_lookahead_distance = 80.0
+        self.lookahead_gain = 0.5
+        self.min_lookahead = 40.0
+        self.max_lookahead = 150.0
+        self.steering_gain = 1.2
+
+        # Last target, None until LKA has steered
+        self.lookahead_point = None
+        self.lookahead_distance = None
+
+        self.center_rows = np.empty((0, 3))
+        self.lane_center_points = as_records(self.center_rows, LANE_CENTER_DTYPE)
+
+    def toggle(self):
+        """Toggle LKA on/off"""
+        self.active = not self.active
+        self.was_manually_overridden = False
+        return self.active
+
+    def deactivate(self):
+        """Deactivate LKA"""
+        if self.active:
+            self.active = False
+            self.was_manually_overridden = True
+
+    def calculate_steering(self, track, detections=None):
+        """Pure Pursuit algorithm
+
+        detections: this tick's (left, right, center) from camera.update, to
+        steer on a detection the caller already made; without it the camera
+        is updated here (one tick of its tracker)
+        """
+        if not self.active:
+            return None
+
+        left_lane, right_lane, center_lane = self.camera.update(track) if detections is None else detections
+
+        if not (self.camera.left_lane_detected and self.camera.right_lane_detected):
+            return None
+
+        speed = abs(self.car.velocity)
+        lookahead_distance = self.base_lookahead_distance + self.lookahead_gain * speed
+        lookahead_distance = min(max(lookahead_distance, self.min_lookahead), self.max_lookahead)
+
+        car_x = self.car.x
+        car_y = self.car.y
+        car_theta = self.car.theta
+
+        # Calculate lane center points into the reused buffer
+        if len(self.center_rows) < len(left_lane):
+            self.center_rows = np.empty((len(left_lane), 3))
+        count = KERNELS.pair_lane_centers(as_rows(left_lane), as_rows(right_lane), car_x, car_y, self.center_rows)
+        lane_center_points = self.center_rows[:count]
+        self.lane_center_points = as_records(lane_center_points, LANE_CENTER_DTYPE)
+
+        if count == 0:
+            return None
+
+        if self.lookahead_mode == "arc_length":
+            lookahead_x, lookahead_y, actual_distance = self._arc_length_target(
+                lane_center_points, car_x, car_y, car_theta, lookahead_distance
+            )
+        else:
+            best_point = lane_center_points[np.argmin(np.abs(lane_center_points[:, 2] - lookahead_distance))]
+            lookahead_x, lookahead_y, actual_distance = best_point
+
+        dx = lookahead_x - car_x
+        dy = lookahead_y - car_y
+        angle_to_point = np.arctan2(dy, dx)
+
+        alpha = angle_to_point - car_theta
+        alpha = np.arctan2(np.sin(alpha), np.cos(alpha))
+
+        wheelbase = self.car.wheelbase
+
+        if actual_distance < 1.0:
+            return 0.0
+
+        steering_angle = np.arctan2(2 * wheelbase * np.sin(alpha), actual_distance)
+        steering_angle *= self.steering_gain
+        steering_angle = min(max(steering_angle, -self.car.max_steering_angle),
+                             self.car.max_steering_angle)
+
+        self.lookahead_point = (lookahead_x, lookahead_y)
+        self.lookahead_distance = actual_distance
+
+        return steering_angle
+
+    def calculate_steering_batch(self, track, xs, ys, thetas, velocities, detections=None):
+        """calculate_steering for N cars at once, returns (N,) steering angles with nan
+        where calculate_steering would return None
+
+        Every car uses this controller's gains and lookahead mode and its car's
+        wheelbase and steering limit. detections: a LaneDetectionBatch for the
+        same poses, made with camera.detect_lanes_batch when not given.
+        `active` is not checked and lookahead_point / lane_center_points are
+        not updated.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        thetas = np.asarray(thetas, dtype=float)
+        if detections is None:
+            detections = self.camera.detect_lanes_batch(track, xs, ys, thetas)
+        count = len(xs)
+        steering = np.full(count, np.nan)
+
+        lookahead_distance = self.base_lookahead_distance + self.lookahead_gain * np.abs(velocities)
+        lookahead_distance = np.clip(lookahead_distance, self.min_lookahead, self.max_lookahead)
+
+        # Pair each left detection with its nearest right one (padding never wins)
+        left = as_rows(detections.left)
+        right = as_rows(detections.right)
+        width = left.shape[1]
+        if width == 0:
+            return steering
+        closest = np.empty((count, width), dtype=int)
+        for chunk in batch_chunks(count, width * width):
+            dist = np.sqrt((right[chunk, None, :, 0] - left[chunk, :, None, 0])**2 +
+                           (right[chunk, None, :, 1] - left[chunk, :, None, 1])**2)
+            closest[chunk] = np.where(np.isnan(dist), np.inf, dist).argmin(axis=2)
+        paired = np.take_along_axis(right, closest[:, :, None], axis=1)
+        center_x = (left[:, :, 0] + paired[:, :, 0]) / 2
+        center_y = (left[:, :, 1] + paired[:, :, 1]) / 2
+        distance = np.sqrt((center_x - xs[:, None])**2 + (center_y - ys[:, None])**2)
+        valid = ~np.isnan(distance)
+
+        if self.lookahead_mode == "arc_length":
+            lookahead_x, lookahead_y, actual_distance = self._arc_length_targets(
+                center_x, center_y, valid, xs, ys, thetas, lookahead_distance
+            )
+        else:
+            best = np.where(valid, np.abs(distance - lookahead_distance[:, None]), np.inf).argmin(axis=1)[:, None]
+            lookahead_x, lookahead_y, actual_distance = (np.take_along_axis(values, best, axis=1)[:, 0]
+                                                         for values in (center_x, center_y, distance))
+
+        alpha = np.arctan2(lookahead_y - ys, lookahead_x - xs) - thetas
+        alpha = np.arctan2(np.sin(alpha), np.cos(alpha))
+        angle = np.arctan2(2 * self.car.wheelbase * np.sin(alpha), actual_distance) * self.steering_gain
+        angle = np.clip(angle, -self.car.max_steering_angle, self.car.max_steering_angle)
+        angle = np.where(actual_distance < 1.0, 0.0, angle)
+
+        steers = detections.left_lane_detected & detections.right_lane_detected & valid.any(axis=1)
+        steering[steers] = angle[steers]
+        return steering
+
+    @staticmethod
+    def _arc_length_targets(center_x, center_y, valid, xs, ys, thetas, lookahead_distance):
+        """Batched _arc_length_target over (N, K) padded lane centers, returns (x, y, distance) arrays"""
+        count, width = center_x.shape
+        along = (center_x - xs[:, None]) * np.cos(thetas)[:, None] + (center_y - ys[:, None]) * np.sin(thetas)[:, None]
+        ahead = valid & (along > 0)
+
+        # Polylines from each car through its points ahead, in order; padding repeats the last point
+        order = np.argsort(np.where(ahead, along, np.inf), axis=1, kind="stable")
+        polyline = np.empty((count, width + 1, 2))
+        polyline[:, 0] = np.column_stack([xs, ys])
+        polyline[:, 1:, 0] = np.take_along_axis(center_x, order, axis=1)
+        polyline[:, 1:, 1] = np.take_along_axis(center_y, order, axis=1)
+        ahead_count = ahead.sum(axis=1)
+        padding = np.arange(1, width + 1)[None, :] > ahead_count[:, None]
+        last = polyline[np.arange(count), ahead_count]
+        polyline[:, 1:][padding] = np.broadcast_to(last[:, None], (count, width, 2))[padding]
+
+        seg_length = np.hypot(*np.moveaxis(np.diff(polyline, axis=1), 2, 0))
+        arc = np.concatenate([np.zeros((count, 1)), np.cumsum(seg_length, axis=1)], axis=1)
+        total = arc[:, -1]
+
+        # Same clamping and interpolation as point_at_arc_length
+        i = np.minimum((arc <= lookahead_distance[:, None]).sum(axis=1) - 1, width - 1)
+        rows = np.arange(count)
+        t = (lookahead_distance - arc[rows, i]) / np.where(seg_length[rows, i] > 0, seg_length[rows, i], 1.0)
+        target = polyline[rows, i] + t[:, None] * (polyline[rows, i + 1] - polyline[rows, i])
+        target = np.where((lookahead_distance >= total)[:, None], last, target)
+        target = np.where(((lookahead_distance <= 0) | (total == 0))[:, None], polyline[:, 0], target)
+        return target[:, 0], target[:, 1], np.hypot(target[:, 0] - xs, target[:, 1] - ys)
+
+    def _arc_length_target(self, lane_center_points, car_x, car_y, car_theta, lookahead_distance):
+        """Lookahead point interpolated along the lane-center polyline, returns (x, y, distance)"""
+        # Order center points by how far ahead of the car they are
+        along = ((lane_center_points[:, 0] - car_x) * np.cos(car_theta) +
+                 (lane_center_points[:, 1] - car_y) * np.sin(car_theta))
+        ahead = lane_center_points[along > 0]
+        ahead = ahead[np.argsort(along[along > 0], kind="stable")]
+
+        polyline = np.vstack([[car_x, car_y], ahead[:, :2]])
+        lookahead_x, lookahead_y = point_at_arc_length(polyline, lookahead_distance)
+        return lookahead_x, lookahead_y, np.hypot(lookahead_x - car_x, lookahead_y - car_y)
@@ -0,0 +1,277 @@
+"""Gym-style lane keeping environments"""
+
+import numpy as np
+
+from .car import IMPACT_CLEARANCE, Car
+from .config import FPS
+from .kinematics import ackermann_step
+from .sensors import CameraSensor, cast_rays
+from .track import SaoPauloTrack
+
+
+def lane_keeping_reward(velocity, heading_error, lane_error, collided,
+                        max_velocity, lane_width, collision_reward=-10.0, lane_penalty=0.5):
+    """Reward for lane keeping: progress along the track minus a lane-centering penalty
+
+    Works on scalars or arrays (one entry per environment).
+    """
+    progress = velocity / max_velocity * np.cos(heading_error)
+    centering = (lane_error / (lane_width / 2))**2
+    return np.where(collided, collision_reward, progress - lane_penalty * centering)
+
+
+class LaneKeepingEnv:
+    """Gym-style lane keeping environment built on Car, CameraSensor and SaoPauloTrack
+
+    Action: (steering, throttle), both in [-1, 1]. Steering is scaled to the
+    car's max steering angle and applied as a direct command (like LKA),
+    throttle behaves as in Car.drive.
+    Observation: dict with "lateral_offset" (from track center), "heading_error"
+    (car heading minus track direction) and "detections" (ray-cast ranges of
+    shape (3, num_rays) to the left outer, center and right outer boundaries,
+    max_range where nothing is hit).
+    Leaving the track ends the episode. Kinematics use the exact-arc
+    integrator by default, which stays accurate at large dt; collision="swept"
+    (see Car.is_on_track) also keeps large steps from jumping across the edge.
+    """
+    def __init__(self, track=None, lane_number=1, dt=1.0 / FPS, max_steps=1000,
+                 start_speed=60.0, lateral_jitter=5.0, heading_jitter=0.05,
+                 num_rays=31, integrator="arc", collision="endpoint", seed=None):
+        self.track = track if track is not None else SaoPauloTrack(offset_x=50, offset_y=50)
+        self.lane_number = lane_number
+        self.dt = dt
+        self.max_steps = max_steps
+        self.start_speed = start_speed
+        self.lateral_jitter = lateral_jitter
+        self.heading_jitter = heading_jitter
+        self.num_rays = num_rays
+        self.integrator = integrator
+        self.collision = collision
+        self.rng = np.random.default_rng(seed)
+
+        # Lateral offset of the target lane center from the track center
+        self.target_offset = (-self.track.lane_width / 2 if lane_number == 1
+                              else self.track.lane_width / 2)
+
+        self.car = None
+        self.camera = None
+        self.steps = 0
+
+    def reset(self, seed=None):
+        """Start a new episode, returns (observation, info)"""
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        x, y, theta = self.track.get_start_position(self.lane_number)
+        lateral = self.rng.uniform(-self.lateral_jitter, self.lateral_jitter)
+        x -= lateral * np.sin(theta)
+        y += lateral * np.cos(theta)
+        theta += self.rng.uniform(-self.heading_jitter, self.heading_jitter)
+
+        self.car = Car(x, y, theta)
+        self.car.track = self.track
+        self.car.velocity = self.start_speed
+        self.car.integrator = self.integrator
+        self.car.collision = self.collision
+        self.camera = CameraSensor(self.car)
+        self.camera.detection_mode = "raycast"
+        self.camera.num_rays = self.num_rays
+        self.steps = 0
+
+        return self._observe(), {}
+
+    def step(self, action):
+        """Apply one action, returns (observation, reward, terminated, truncated, info)"""
+        steering, throttle = np.clip(action, -1.0, 1.0)
+        self.car.drive(self.dt, throttle, 0.0,
+                       lka_steering=steering * self.car.max_steering_angle)
+
+        collided = not self.car.is_on_track(self.track)
+        if collided:
+            self.car.handle_collision()
+        self.steps += 1
+
+        observation = self._observe()
+        reward = float(lane_keeping_reward(
+            self.car.velocity, observation["heading_error"],
+            observation["lateral_offset"] - self.target_offset, collided,
+            self.car.max_velocity, self.track.lane_width
+        ))
+        truncated = self.steps >= self.max_steps
+
+        return observation, reward, collided, truncated, {"collided": collided}
+
+    def _observe(self):
+        """Build the observation dict for the current car state"""
+        lateral_offset, track_angle = self.track.get_track_frame(self.car.x, self.car.y)
+        heading_error = self.car.theta - track_angle
+        heading_error = np.arctan2(np.sin(heading_error), np.cos(heading_error))
+
+        detections = self.camera.get_ray_distances(self.track)
+        detections[np.isinf(detections)] = self.camera.max_range
+
+        return {
+            "lateral_offset": float(lateral_offset),
+            "heading_error": float(heading_error),
+            "detections": detections,
+        }
+
+
+class VectorLaneKeepingEnv:
+    """N lane keeping environments stepped together on shared arrays
+
+    Same action, observation and reward definitions as LaneKeepingEnv, with a
+    leading batch dimension: step() takes actions of shape (N, 2) and returns
+    observation arrays, rewards, terminated and truncated flags of length N.
+    All car state lives in NumPy arrays so one step costs a handful of
+    vectorized operations regardless of N. Finished environments are reset
+    automatically; their last observation is returned in
+    info["final_observation"].
+    """
+    def __init__(self, num_envs, track=None, lane_number=1, dt=1.0 / FPS, max_steps=1000,
+                 start_speed=60.0, lateral_jitter=5.0, heading_jitter=0.05,
+                 num_rays=31, integrator="arc", collision="endpoint", seed=None):
+        self.num_envs = num_envs
+        self.track = track if track is not None else SaoPauloTrack(offset_x=50, offset_y=50)
+        self.lane_number = lane_number
+        self.dt = dt
+        self.max_steps = max_steps
+        self.start_speed = start_speed
+        self.lateral_jitter = lateral_jitter
+        self.heading_jitter = heading_jitter
+        self.integrator = integrator
+        self.collision = collision
+        self.rng = np.random.default_rng(seed)
+
+        self.target_offset = (-self.track.lane_width / 2 if lane_number == 1
+                              else self.track.lane_width / 2)
+
+        # Car and sensor parameters come from a prototype instance
+        self.car_params = Car(0, 0, 0)
+        self.camera_params = CameraSensor(self.car_params)
+        self.camera_params.num_rays = num_rays
+        self.relative_ray_angles = self.camera_params.get_ray_angles()
+
+        # Per-environment state
+        self.x = np.zeros(num_envs)
+        self.y = np.zeros(num_envs)
+        self.theta = np.zeros(num_envs)
+        self.velocity = np.zeros(num_envs)
+        self.steering_angle = np.zeros(num_envs)
+        self.steps = np.zeros(num_envs, dtype=int)
+
+    def reset(self, seed=None):
+        """Reset all environments, returns (observations, info)"""
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._observe(), {}
+
+    def _reset_envs(self, mask):
+        """Put the selected environments back at the start position"""
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return
+
+        x, y, theta = self.track.get_start_position(self.lane_number)
+        lateral = self.rng.uniform(-self.lateral_jitter, self.lateral_jitter, count)
+        self.x[mask] = x - lateral * np.sin(theta)
+        self.y[mask] = y + lateral * np.cos(theta)
+        self.theta[mask] = theta + self.rng.uniform(-self.heading_jitter, self.heading_jitter, count)
+        self.velocity[mask] = self.start_speed
+        self.steering_angle[mask] = 0.0
+        self.steps[mask] = 0
+
+    def step(self, actions):
+        """Step all environments, returns (observations, rewards, terminated, truncated, info)"""
+        car = self.car_params
+        dt = self.dt
+        actions = np.clip(np.asarray(actions, dtype=float).reshape(self.num_envs, 2), -1.0, 1.0)
+        steering, throttle = actions[:, 0], actions[:, 1]
+
+        # Longitudinal dynamics (same rules as Car.drive)
+        accel = np.where(throttle > 0, car.acceleration * throttle, car.deceleration * throttle)
+        coasting = np.sign(self.velocity) * np.maximum(np.abs(self.velocity) - car.friction * dt, 0.0)
+        velocity = np.where(throttle != 0, self.velocity + accel * dt, coasting)
+        self.velocity = np.clip(velocity, -car.max_velocity * 0.5, car.max_velocity)
+
+        self.steering_angle = np.clip(steering * car.max_steering_angle,
+                                      -car.max_steering_angle, car.max_steering_angle)
+
+        # Ackermann kinematics for cars that are moving
+        moving = np.abs(self.velocity) > 0.1
+        prev_x, prev_y = self.x, self.y
+        new_x, new_y, new_theta = ackermann_step(
+            self.x, self.y, self.theta, self.velocity, self.steering_angle,
+            car.wheelbase, dt, self.integrator
+        )
+        self.x = np.where(moving, new_x, self.x)
+        self.y = np.where(moving, new_y, self.y)
+        self.theta = np.where(moving, new_theta, self.theta)
+
+        # Track collision: revert (or stop at the swept impact point) and stop, as Car.handle_collision does
+        collided = ~self.track.within_bounds(self.x, self.y, car.width)
+        stop_x, stop_y = prev_x, prev_y
+        if self.collision == "swept":
+            walls = self.track.get_collision_walls(car.width)
+            impact = walls.time_of_impact_batch(prev_x, prev_y, self.x, self.y)
+            swept = ~np.isnan(impact)
+            # Stop just short of the edge where that passes the endpoint rule, as Car.is_on_track does
+            step = np.maximum(np.hypot(self.x - prev_x, self.y - prev_y), IMPACT_CLEARANCE)
+            impact = np.maximum(np.nan_to_num(impact) - IMPACT_CLEARANCE / step, 0.0)
+            impact_x = prev_x + impact * (self.x - prev_x)
+            impact_y = prev_y + impact * (self.y - prev_y)
+            stops = swept.copy()
+            if np.any(swept):
+                stops[swept] = self.track.within_bounds(impact_x[swept], impact_y[swept], car.width)
+            stop_x = np.where(stops, impact_x, prev_x)
+            stop_y = np.where(stops, impact_y, prev_y)
+            collided |= swept
+        self.x = np.where(collided, stop_x, self.x)
+        self.y = np.where(collided, stop_y, self.y)
+        self.velocity = np.where(collided, 0.0, self.velocity)
+        self.steps += 1
+
+        observations = self._observe()
+        rewards = lane_keeping_reward(
+            self.velocity, observations["heading_error"],
+            observations["lateral_offset"] - self.target_offset, collided,
+            car.max_velocity, self.track.lane_width
+        )
+        terminated = collided
+        truncated = self.steps >= self.max_steps
+
+        info = {"collided": collided}
+        done = terminated | truncated
+        if np.any(done):
+            info["final_observation"] = {key: value.copy() for key, value in observations.items()}
+            self._reset_envs(done)
+            reset_observations = self._observe()
+            for key, value in observations.items():
+                value[done] = reset_observations[key][done]
+
+        return observations, rewards, terminated, truncated, info
+
+    def _observe(self):
+        """Build batched observation arrays for the current state"""
+        lateral_offset, track_angle = self.track.get_track_frame(self.x, self.y)
+        heading_error = self.theta - track_angle
+        heading_error = np.arctan2(np.sin(heading_error), np.cos(heading_error))
+
+        camera = self.camera_params
+        origins = np.stack([self.x + camera.mount_offset * np.cos(self.theta),
+                            self.y + camera.mount_offset * np.sin(self.theta)], axis=1)
+        ray_angles = self.theta[:, None] + self.relative_ray_angles[None, :]
+
+        detections = np.stack([
+            cast_rays(origins, ray_angles, *self.track.get_boundary_segments(offset),
+                      camera.min_range, camera.max_range, camera.boundary_grid(self.track, offset))
+            for offset in (-self.track.lane_width, 0, self.track.lane_width)
+        ], axis=1)
+        detections[np.isinf(detections)] = camera.max_range
+
+        return {
+            "lateral_offset": lateral_offset,
+            "heading_error": heading_error,
+            "detections": detections,
+        }
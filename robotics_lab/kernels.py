@@ -0,0 +1,248 @@
+"""Hot simulation kernels with an optional Numba JIT backend
+
+Each kernel has a scalar-loop version (compiled with Numba when it is
+installed) and a NumPy version with the same semantics used as fallback.
+Numba is imported lazily, the first time a kernel is used.
+"""
+
+import math
+import os
+
+import numpy as np
+
+from .kinematics import ackermann_step
+
+
+def _offset_line_loop(points, offset):
+    """Offset a closed polyline (N, 2) perpendicular to its direction"""
+    count = points.shape[0]
+    result = np.empty((count, 2))
+    for i in range(count):
+        prev_i = i - 1 if i > 0 else count - 1
+        next_i = (i + 1) % count
+
+        dx1 = points[i, 0] - points[prev_i, 0]
+        dy1 = points[i, 1] - points[prev_i, 1]
+        len1 = math.sqrt(dx1**2 + dy1**2)
+        if len1 == 0:
+            len1 = 1.0
+
+        dx2 = points[next_i, 0] - points[i, 0]
+        dy2 = points[next_i, 1] - points[i, 1]
+        len2 = math.sqrt(dx2**2 + dy2**2)
+        if len2 == 0:
+            len2 = 1.0
+
+        perp_x = -(dy1 / len1 + dy2 / len2) / 2
+        perp_y = (dx1 / len1 + dx2 / len2) / 2
+        perp_len = math.sqrt(perp_x**2 + perp_y**2)
+        if perp_len == 0:
+            perp_len = 1.0
+
+        result[i, 0] = points[i, 0] + (perp_x / perp_len) * offset
+        result[i, 1] = points[i, 1] + (perp_y / perp_len) * offset
+    return result
+
+
+def _offset_line_numpy(points, offset):
+    """NumPy version of _offset_line_loop"""
+    d1 = points - np.roll(points, 1, axis=0)
+    d2 = np.roll(points, -1, axis=0) - points
+    len1 = np.sqrt(d1[:, 0]**2 + d1[:, 1]**2)
+    len1[len1 == 0] = 1.0
+    len2 = np.sqrt(d2[:, 0]**2 + d2[:, 1]**2)
+    len2[len2 == 0] = 1.0
+
+    perp_x = -(d1[:, 1] / len1 + d2[:, 1] / len2) / 2
+    perp_y = (d1[:, 0] / len1 + d2[:, 0] / len2) / 2
+    perp_len = np.sqrt(perp_x**2 + perp_y**2)
+    perp_len[perp_len == 0] = 1.0
+
+    return np.stack([points[:, 0] + (perp_x / perp_len) * offset,
+                     points[:, 1] + (perp_y / perp_len) * offset], axis=1)
+
+
+def _detect_boundary_loop(points, camera_x, camera_y, camera_angle, min_range, max_range, half_fov, out):
+    """Write rows (x, y, bearing) of boundary points inside the camera's range and FOV to out
+
+    out needs at least len(points) rows; returns the number of rows written.
+    """
+    count = 0
+    for i in range(points.shape[0]):
+        dx = points[i, 0] - camera_x
+        dy = points[i, 1] - camera_y
+        distance = math.sqrt(dx**2 + dy**2)
+        if distance < min_range or distance > max_range:
+            continue
+
+        angle_diff = math.atan2(dy, dx) - camera_angle
+        angle_diff = math.atan2(math.sin(angle_diff), math.cos(angle_diff))
+        if abs(angle_diff) < half_fov:
+            out[count, 0] = points[i, 0]
+            out[count, 1] = points[i, 1]
+            out[count, 2] = angle_diff
+            count += 1
+    return count
+
+
+def boundary_visibility(points, camera_x, camera_y, camera_angle, min_range, max_range, half_fov):
+    """Visibility mask and camera bearings of boundary points, same test as _detect_boundary_loop"""
+    dx = points[:, 0] - camera_x
+    dy = points[:, 1] - camera_y
+    distance = np.sqrt(dx**2 + dy**2)
+
+    angle_diff = np.arctan2(dy, dx) - camera_angle
+    angle_diff = np.arctan2(np.sin(angle_diff), np.cos(angle_diff))
+
+    visible = ((distance >= min_range) & (distance <= max_range) &
+               (np.abs(angle_diff) < half_fov))
+    return visible, angle_diff
+
+
+def _detect_boundary_numpy(points, camera_x, camera_y, camera_angle, min_range, max_range, half_fov, out):
+    """NumPy version of _detect_boundary_loop"""
+    visible, angle_diff = boundary_visibility(points, camera_x, camera_y, camera_angle,
+                                              min_range, max_range, half_fov)
+    count = int(np.count_nonzero(visible))
+    out[:count, :2] = points[visible]
+    out[:count, 2] = angle_diff[visible]
+    return count
+
+
+def _nearest_vertex_loop(points, x, y):
+    """Index of the polyline vertex closest to (x, y), first one on ties"""
+    min_dist = np.inf
+    closest_idx = 0
+    for i in range(points.shape[0]):
+        dist = math.sqrt((x - points[i, 0])**2 + (y - points[i, 1])**2)
+        if dist < min_dist:
+            min_dist = dist
+            closest_idx = i
+    return closest_idx
+
+
+def _nearest_vertex_numpy(points, x, y):
+    """NumPy version of _nearest_vertex_loop"""
+    return int(np.argmin(np.sqrt((x - points[:, 0])**2 + (y - points[:, 1])**2)))
+
+
+def _pair_lane_centers_loop(left, right, car_x, car_y, out):
+    """Pair each left detection with its nearest right one.
+
+    Writes rows (center_x, center_y, distance from car) of the pair midpoints
+    to out (at least len(left) rows), returns the number of rows written.
+    """
+    count = left.shape[0] if right.shape[0] > 0 else 0
+    for i in range(count):
+        min_dist = np.inf
+        closest = 0
+        for j in range(right.shape[0]):
+            dist = math.sqrt((right[j, 0] - left[i, 0])**2 + (right[j, 1] - left[i, 1])**2)
+            if dist < min_dist:
+                min_dist = dist
+                closest = j
+
+        center_x = (left[i, 0] + right[closest, 0]) / 2
+        center_y = (left[i, 1] + right[closest, 1]) / 2
+        out[i, 0] = center_x
+        out[i, 1] = center_y
+        out[i, 2] = math.sqrt((center_x - car_x)**2 + (center_y - car_y)**2)
+    return count
+
+
+def _pair_lane_centers_numpy(left, right, car_x, car_y, out):
+    """NumPy version of _pair_lane_centers_loop"""
+    if len(left) == 0 or len(right) == 0:
+        return 0
+
+    dist = np.sqrt((right[None, :, 0] - left[:, None, 0])**2 +
+                   (right[None, :, 1] - left[:, None, 1])**2)
+    closest = right[np.argmin(dist, axis=1)]
+
+    count = len(left)
+    out[:count, 0] = (left[:, 0] + closest[:, 0]) / 2
+    out[:count, 1] = (left[:, 1] + closest[:, 1]) / 2
+    out[:count, 2] = np.sqrt((out[:count, 0] - car_x)**2 + (out[:count, 1] - car_y)**2)
+    return count
+
+
+def _ackermann_step_loop(x, y, theta, velocity, steering_angle, wheelbase, dt, arc):
+    """Scalar version of ackermann_step (arc selects the exact-arc integrator)"""
+    omega = velocity * math.tan(steering_angle) / wheelbase
+
+    if arc:
+        half_turn = omega * dt / 2
+        sinc = math.sin(half_turn) / half_turn if half_turn != 0 else 1.0
+        chord = velocity * dt * sinc
+        new_x = x + chord * math.cos(theta + half_turn)
+        new_y = y + chord * math.sin(theta + half_turn)
+    else:
+        new_x = x + velocity * math.cos(theta) * dt
+        new_y = y + velocity * math.sin(theta) * dt
+    new_theta = theta + omega * dt
+    new_theta = math.atan2(math.sin(new_theta), math.cos(new_theta))
+
+    return new_x, new_y, new_theta
+
+
+def _ackermann_step_numpy(x, y, theta, velocity, steering_angle, wheelbase, dt, arc):
+    """NumPy version of _ackermann_step_loop"""
+    return ackermann_step(x, y, theta, velocity, steering_angle, wheelbase, dt,
+                          "arc" if arc else "euler")
+
+
+class KernelBackend:
+    """Selects JIT-compiled (Numba) or NumPy implementations of the hot kernels
+
+    Modes: "auto" uses Numba when it is installed, "numba" requires it,
+    "numpy" forces the fallbacks. The initial mode comes from the
+    ROBOTICS_LAB_JIT environment variable (default "auto") and is resolved on
+    first kernel use, so importing the simulation never imports Numba.
+    """
+    IMPLEMENTATIONS = {
+        "offset_line": (_offset_line_loop, _offset_line_numpy),
+        "detect_boundary": (_detect_boundary_loop, _detect_boundary_numpy),
+        "nearest_vertex": (_nearest_vertex_loop, _nearest_vertex_numpy),
+        "pair_lane_centers": (_pair_lane_centers_loop, _pair_lane_centers_numpy),
+        "ackermann_step": (_ackermann_step_loop, _ackermann_step_numpy),
+    }
+
+    def __init__(self, mode=None):
+        self._compiled = {}
+        self.mode = mode or os.environ.get("ROBOTICS_LAB_JIT", "auto")
+        self.use_jit = None  # Unknown until the backend is resolved
+
+    def __getattr__(self, name):
+        # Only reached while kernels are unbound: resolve the backend now
+        if name in KernelBackend.IMPLEMENTATIONS:
+            self.select(self.mode)
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def select(self, mode):
+        """Switch implementations, returns True if the JIT path is active"""
+        if mode not in ("auto", "numba", "numpy"):
+            raise ValueError(f"Unknown kernel backend: {mode!r}")
+
+        numba = None
+        if mode != "numpy":
+            try:
+                import numba
+            except ImportError:
+                if mode == "numba":
+                    raise ImportError("Numba is not installed; use mode 'auto' or 'numpy'")
+
+        self.mode = mode
+        self.use_jit = numba is not None
+        for name, (loop_kernel, numpy_kernel) in self.IMPLEMENTATIONS.items():
+            if self.use_jit:
+                if name not in self._compiled:
+                    # Compiled lazily on first call, cached on disk between runs
+                    self._compiled[name] = numba.njit(cache=True)(loop_kernel)
+                setattr(self, name, self._compiled[name])
+            else:
+                setattr(self, name, numpy_kernel)
+        return self.use_jit
+
+
+KERNELS = KernelBackend()
@@ -0,0 +1,353 @@
+"""Streaming KPIs: lap times, cross-track error, steering rate, disengagements, collisions
+
+KPIAggregator takes one tick of state for N cars at a time and keeps only
+per-car bookkeeping (a handful of numbers per car) plus fixed-size
+summaries, so memory does not grow with the length of the run. Summaries
+are RunningMoments (count, mean, variance by Welford/Chan updates, min,
+max) and QuantileSketch (log-bucket histogram with bounded relative error).
+Both merge, so runs split across processes can be combined afterwards.
+"""
+
+import math
+
+import numpy as np
+
+from .config import FPS
+from .sensors import batch_chunks
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max of a stream, in O(1) memory
+
+    Batches are folded in with Chan's parallel form of Welford's update, so
+    adding a thousand values per tick costs one pass over them and the
+    result does not suffer from the cancellation of sum-of-squares formulas.
+    """
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        """Fold in a value or an array of values (nan is skipped)"""
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 1:
+            # Plain Welford step: cheaper than array reductions for one car
+            value = float(values[0])
+            if value == value:
+                self.count += 1
+                delta = value - self.mean
+                self.mean += delta / self.count
+                self.m2 += delta * (value - self.mean)
+                self.min = min(self.min, value)
+                self.max = max(self.max, value)
+            return
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        self._combine(len(values), mean, float(((values - mean)**2).sum()),
+                      float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        """Fold in another RunningMoments"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, count, mean, m2, low, high):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    @property
+    def variance(self):
+        """Population variance, nan before the first value"""
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def rms(self):
+        """Root mean square, sqrt(mean^2 + variance)"""
+        return math.sqrt(self.mean**2 + self.variance) if self.count else math.nan
+
+
+class QuantileSketch:
+    """Streaming quantiles of non-negative values (a DDSketch-style log histogram)
+
+    Bucket k counts the values in (gamma^(k-1), gamma^k] with gamma =
+    (1 + a) / (1 - a), and a quantile is reported as the bucket's center
+    2 gamma^k / (gamma + 1), which is within relative accuracy a of the true
+    sample. Buckets span min_value to max_value and are allocated up front,
+    so memory is fixed (about 1400 counters at a = 1% over 1e-6..1e6);
+    values at or below min_value count as 0 and values above max_value are
+    clamped into the top bucket.
+    """
+    __slots__ = ("relative_accuracy", "min_value", "max_value", "gamma", "log_gamma", "offset", "counts",
+                 "count")
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-6, max_value=1e6):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = math.ceil(math.log(min_value) / self.log_gamma)
+        buckets = math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1
+        self.counts = np.zeros(buckets + 1, dtype=np.int64)  # counts[0] holds the zeros
+        self.count = 0
+
+    def add(self, values):
+        """Count a value or an array of values (negative values count by magnitude, nan is skipped)"""
+        values = np.abs(np.asarray(values, dtype=float).ravel())
+        if len(values) == 1:
+            value = float(values[0])
+            if value == value:
+                self.counts[self._index(value)] += 1
+                self.count += 1
+            return
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        index = np.zeros(len(values), dtype=np.int64)
+        positive = values > self.min_value
+        index[positive] = np.clip(np.ceil(np.log(values[positive]) / self.log_gamma) - self.offset + 1,
+                                  1, len(self.counts) - 1)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+        self.count += len(values)
+
+    def _index(self, value):
+        """Bucket of one non-negative value"""
+        if value <= self.min_value:
+            return 0
+        return min(max(math.ceil(math.log(value) / self.log_gamma) - self.offset + 1, 1), len(self.counts) - 1)
+
+    def merge(self, other):
+        """Add another sketch's counts (same accuracy and range)"""
+        if (other.relative_accuracy, other.min_value, other.max_value) != (
+                self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("Can only merge sketches with the same accuracy and range")
+        self.counts += other.counts
+        self.count += other.count
+
+    def quantile(self, q):
+        """Estimate of the q-quantile (0 <= q <= 1), nan before the first value"""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        bucket = int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+        if bucket == 0:
+            return 0.0
+        return 2 * self.gamma**(bucket - 1 + self.offset) / (self.gamma + 1)
+
+
+def _summary(moments, sketch, quantiles):
+    """Snapshot dict of a RunningMoments and QuantileSketch pair"""
+    summary = {"count": moments.count, "mean": moments.mean if moments.count else math.nan,
+               "std": moments.std if moments.count else math.nan, "rms": moments.rms,
+               "min": moments.min if moments.count else math.nan,
+               "max": moments.max if moments.count else math.nan}
+    for q in quantiles:
+        summary[f"p{q * 100:g}"] = sketch.quantile(q)
+    return summary
+
+
+class KPIAggregator:
+    """Online lane keeping KPIs for one car or a fleet, updated once per tick
+
+    Call update() every tick with each car's position, steering angle, LKA
+    override flag and whether it collided this tick; snapshot() returns the
+    metrics so far at any time. Definitions follow the scenario suite:
+
+    - lap_time: seconds between successive crossings of a whole track length
+      of progress (arc length along the centerline, unwrapped per car)
+    - cross_track: distance from the nearer lane center, |abs(lateral) - lane_width / 2|
+    - steering_rate: |change of steering angle| / dt, from the second tick on
+    - lka_disengagements: times was_manually_overridden went from False to True
+    - collisions: separate collision events (consecutive colliding ticks count once)
+
+    Memory is O(number of cars), independent of the number of ticks. Cars
+    may join between ticks, with add_cars() or simply by appearing in update().
+    """
+    def __init__(self, track, dt=1.0 / FPS, quantiles=DEFAULT_QUANTILES, relative_accuracy=0.01):
+        self.track = track
+        self.dt = dt
+        self.quantiles = tuple(quantiles)
+        self.relative_accuracy = relative_accuracy
+
+        points, next_points = track.get_boundary_segments(0)
+        self.points = points
+        self.arc = track.get_boundary_arc_length(0)
+        self.loop_length = float(self.arc[-1])
+        # Per centerline segment: start x, y, direction x, y, length, divisor, arc length at the start.
+        # Closing duplicate vertices give zero-length segments, which never win
+        seg_length = np.diff(self.arc)
+        self.segment_table = np.column_stack([points, next_points - points, seg_length,
+                                              np.where(seg_length > 0, seg_length, 1.0), self.arc[:-1]])
+        self.half_lane = track.lane_width / 2
+
+        self.ticks = 0
+        self.cross_track = RunningMoments()
+        self.cross_track_sketch = QuantileSketch(relative_accuracy)
+        self.steering_rate = RunningMoments()
+        self.steering_rate_sketch = QuantileSketch(relative_accuracy)
+        self.lap_time = RunningMoments()
+        self.lap_time_sketch = QuantileSketch(relative_accuracy)
+        self.lka_disengagements = 0
+        self.collisions = 0
+
+        # Per-car state, grown when cars are added
+        self.position = np.zeros(0)  # Arc length on the centerline
+        self.progress = np.zeros(0)  # Unwrapped progress since the car's first update
+        self.next_lap = np.zeros(0)  # Progress that completes the next lap
+        self.lap_start = np.zeros(0)  # Time the current lap started
+        self.laps = np.zeros(0, dtype=np.int64)
+        self.steering = np.zeros(0)
+        self.overridden = np.zeros(0, dtype=bool)
+        self.colliding = np.zeros(0, dtype=bool)
+
+    @property
+    def num_cars(self):
+        return len(self.position)
+
+    @property
+    def time(self):
+        """Simulated seconds covered by the updates so far"""
+        return self.ticks * self.dt
+
+    def track_position(self, xs, ys):
+        """(arc length, lateral offset) arrays of positions on the centerline
+
+        Vectorized ScenarioRunner.track_position: the position is projected
+        onto the closer of the segments around the nearest vertex (nearest
+        segment when the track has a distance field).
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        count = len(self.points)
+        if self.track.distance_field is not None:
+            nearest = self.track.distance_field.nearest_segment(xs, ys)
+            scan = nearest < 0  # Beyond the raster band
+        else:
+            nearest = np.zeros(len(xs), dtype=np.int64)
+            scan = np.ones(len(xs), dtype=bool)
+        for chunk in batch_chunks(int(np.count_nonzero(scan)), count):
+            cars = np.flatnonzero(scan)[chunk]
+            distance = np.sqrt((xs[cars, None] - self.points[:, 0])**2 + (ys[cars, None] - self.points[:, 1])**2)
+            nearest[cars] = distance.argmin(axis=1)
+
+        # The segments before, at and after the nearest vertex, as (N, 3) candidates
+        px, py, dx, dy, length, divisor, start = self.segment_table[(nearest[:, None] + (-1, 0, 1)) % count].transpose(2, 0, 1)
+        along = np.minimum(np.maximum(((xs[:, None] - px) * dx + (ys[:, None] - py) * dy) / divisor, 0.0), length)
+        ex = xs[:, None] - px - along * dx / divisor
+        ey = ys[:, None] - py - along * dy / divisor
+        distance_sq = np.where(length > 0, ex * ex + ey * ey, np.inf)
+
+        # First of equally close segments, like the scalar loop
+        rows = np.arange(len(xs))
+        best = distance_sq.argmin(axis=1)
+        arc_length = start[rows, best] + along[rows, best]
+        side = dx[rows, best] * ey[rows, best] - dy[rows, best] * ex[rows, best]
+        lateral = np.where(side >= 0, 1.0, -1.0) * np.sqrt(distance_sq[rows, best])
+        return arc_length, lateral
+
+    def add_cars(self, xs, ys, steering_angles=0.0, overridden=False):
+        """Register cars at their starting pose (before their first tick); update()
+        registers unseen cars itself, from their pose after that tick"""
+        xs = np.atleast_1d(np.asarray(xs, dtype=float))
+        ys = np.atleast_1d(np.asarray(ys, dtype=float))
+        fill = len(xs)
+        positions, _ = self.track_position(xs, ys)
+        self.position = np.concatenate([self.position, positions])
+        self.progress = np.concatenate([self.progress, np.zeros(fill)])
+        self.next_lap = np.concatenate([self.next_lap, np.full(fill, self.loop_length)])
+        self.lap_start = np.concatenate([self.lap_start, np.full(fill, self.time)])
+        self.laps = np.concatenate([self.laps, np.zeros(fill, dtype=np.int64)])
+        self.steering = np.concatenate([self.steering, np.broadcast_to(np.asarray(steering_angles, dtype=float),
+                                                                       (fill,))])
+        self.overridden = np.concatenate([self.overridden, np.broadcast_to(np.asarray(overridden, dtype=bool),
+                                                                           (fill,))])
+        self.colliding = np.concatenate([self.colliding, np.zeros(fill, dtype=bool)])
+
+    def update(self, xs, ys, steering_angles, overridden, collided):
+        """Fold in one tick for every car; arguments are scalars or (N,) arrays in car order
+
+        Positions are after the tick's move (and collision revert); collided
+        flags the cars that hit something during the tick.
+        """
+        xs = np.atleast_1d(np.asarray(xs, dtype=float))
+        ys = np.atleast_1d(np.asarray(ys, dtype=float))
+        steering_angles = np.atleast_1d(np.asarray(steering_angles, dtype=float))
+        overridden = np.atleast_1d(np.asarray(overridden, dtype=bool))
+        collided = np.atleast_1d(np.asarray(collided, dtype=bool))
+        count = len(xs)
+        if count < self.num_cars:
+            raise ValueError(f"Expected {self.num_cars} cars or more, got {count}")
+
+        if count > self.num_cars:
+            new = slice(self.num_cars, count)
+            self.add_cars(xs[new], ys[new], np.nan, overridden[new])  # No steering rate on their first tick
+        positions, lateral = self.track_position(xs, ys)
+        self.ticks += 1
+
+        # Unwrap progress across the start line
+        half_loop = self.loop_length / 2
+        self.progress += (positions - self.position + half_loop) % self.loop_length - half_loop
+        self.position = positions
+        done = self.progress >= self.next_lap
+        if np.any(done):
+            self.lap_time.add(self.time - self.lap_start[done])
+            self.lap_time_sketch.add(self.time - self.lap_start[done])
+            self.lap_start[done] = self.time
+            self.laps[done] += 1
+            # A car that skipped more than a lap in one tick still only counts one
+            self.next_lap[done] = (np.floor(self.progress[done] / self.loop_length) + 1) * self.loop_length
+
+        cross_track = np.abs(np.abs(lateral) - self.half_lane)
+        self.cross_track.add(cross_track)
+        self.cross_track_sketch.add(cross_track)
+
+        rate = np.abs(steering_angles - self.steering) / self.dt
+        self.steering_rate.add(rate)
+        self.steering_rate_sketch.add(rate)
+        self.steering = steering_angles
+
+        self.lka_disengagements += int(np.count_nonzero(overridden & ~self.overridden))
+        self.overridden = overridden
+        self.collisions += int(np.count_nonzero(collided & ~self.colliding))
+        self.colliding = collided
+
+    def update_cars(self, cars, controllers, collided):
+        """update() from Car and PurePursuitLKA objects"""
+        state = np.array([(car.x, car.y, car.steering_angle) for car in cars]).reshape(-1, 3)
+        self.update(state[:, 0], state[:, 1], state[:, 2],
+                    [lka.was_manually_overridden for lka in controllers], collided)
+
+    def snapshot(self):
+        """The metrics so far as a dict of plain numbers (cheap, call at any time)"""
+        return {
+            "ticks": self.ticks,
+            "time": self.time,
+            "cars": self.num_cars,
+            "laps": int(self.laps.sum()),
+            "distance": float(self.progress.sum()),
+            "lap_time": _summary(self.lap_time, self.lap_time_sketch, self.quantiles),
+            "cross_track": _summary(self.cross_track, self.cross_track_sketch, self.quantiles),
+            "steering_rate": _summary(self.steering_rate, self.steering_rate_sketch, self.quantiles),
+            "lka_disengagements": self.lka_disengagements,
+            "collisions": self.collisions,
+        }
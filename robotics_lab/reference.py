@@ -0,0 +1,273 @@
+"""Frozen reference implementations of the hot paths, for differential testing
+
+These are the original, unoptimized versions of Track._offset_line,
+CameraSensor.detect_lanes / _detect_lane_boundary, Car.is_on_track,
+PurePursuitLKA.calculate_steering and Car.update: plain Python loops over
+the centerline with no kernels, caches or reused buffers. They define the
+behaviour the optimized code has to keep, so do not optimize or "fix" them;
+benchmarks/bench_reference.py runs both sides on the same inputs and checks
+that they agree.
+
+They read parameters (ranges, gains, dimensions) from the live objects but
+never modify them: every function returns its results and new state.
+Covered modes are the original ones: vertex detection without a tracker or
+distance field, "nearest" lookahead, and the Euler and exact-arc integrators.
+"""
+
+import math
+
+import numpy as np
+
+
+def offset_line(points, offset):
+    """Offset a closed line perpendicular to its direction, returns a list of (x, y)"""
+    offset_points = []
+
+    for i in range(len(points)):
+        p_prev = points[i - 1] if i > 0 else points[-1]
+        p_curr = points[i]
+        p_next = points[(i + 1) % len(points)]
+
+        dx1 = p_curr[0] - p_prev[0]
+        dy1 = p_curr[1] - p_prev[1]
+        len1 = np.sqrt(dx1**2 + dy1**2) or 1
+
+        dx2 = p_next[0] - p_curr[0]
+        dy2 = p_next[1] - p_curr[1]
+        len2 = np.sqrt(dx2**2 + dy2**2) or 1
+
+        perp_x = -(dy1/len1 + dy2/len2) / 2
+        perp_y = (dx1/len1 + dx2/len2) / 2
+        perp_len = np.sqrt(perp_x**2 + perp_y**2) or 1
+
+        offset_x = p_curr[0] + (perp_x / perp_len) * offset
+        offset_y = p_curr[1] + (perp_y / perp_len) * offset
+
+        offset_points.append((offset_x, offset_y))
+
+    return offset_points
+
+
+def detect_lane_boundary(boundary_points, camera_x, camera_y, camera_angle, min_range, max_range, field_of_view):
+    """Visible boundary points as a list of (x, y, bearing)"""
+    visible_points = []
+
+    for point in boundary_points:
+        px, py = point
+        dx = px - camera_x
+        dy = py - camera_y
+        distance = np.sqrt(dx**2 + dy**2)
+
+        if distance < min_range or distance > max_range:
+            continue
+
+        point_angle = np.arctan2(dy, dx)
+        angle_diff = point_angle - camera_angle
+        angle_diff = np.arctan2(np.sin(angle_diff), np.cos(angle_diff))
+
+        if abs(angle_diff) < field_of_view / 2:
+            visible_points.append((px, py, angle_diff))
+
+    return visible_points
+
+
+def _centerline_frame(centerline, x, y):
+    """Closest centerline vertex to (x, y), then (to_car_x, to_car_y, perp_angle) there"""
+    min_dist = float('inf')
+    closest_idx = 0
+
+    for i, (cx, cy) in enumerate(centerline):
+        dist = np.sqrt((x - cx)**2 + (y - cy)**2)
+        if dist < min_dist:
+            min_dist = dist
+            closest_idx = i
+
+    p_curr = centerline[closest_idx]
+    p_next = centerline[(closest_idx + 1) % len(centerline)]
+
+    dx = p_next[0] - p_curr[0]
+    dy = p_next[1] - p_curr[1]
+    track_angle = np.arctan2(dy, dx)
+
+    return x - p_curr[0], y - p_curr[1], track_angle + np.pi / 2
+
+
+def lateral_offset(centerline, x, y):
+    """Signed distance of (x, y) from the centerline at its closest vertex"""
+    to_car_x, to_car_y, perp_angle = _centerline_frame(centerline, x, y)
+    return to_car_x * np.cos(perp_angle) + to_car_y * np.sin(perp_angle)
+
+
+def is_on_track(car, track):
+    """Car.is_on_track: within half the track width plus one car width of the centerline"""
+    to_car_x, to_car_y, perp_angle = _centerline_frame(track.centerline, car.x, car.y)
+    lateral_distance = abs(to_car_x * np.cos(perp_angle) + to_car_y * np.sin(perp_angle))
+
+    max_distance = track.track_width / 2 + car.width
+    return lateral_distance <= max_distance
+
+
+def detect_lanes(camera, track):
+    """CameraSensor.detect_lanes for the camera's car pose
+
+    Returns (left, right, center, state): point lists as from
+    detect_lane_boundary, and a dict with left_lane_detected,
+    right_lane_detected, current_lane and lane_center_offset (None when the
+    sensor would keep its previous value because a lane is missing).
+    """
+    car = camera.car
+    camera_x = car.x + camera.mount_offset * np.cos(car.theta)
+    camera_y = car.y + camera.mount_offset * np.sin(car.theta)
+    camera_angle = car.theta
+
+    boundaries = (offset_line(track.centerline, -track.lane_width), track.centerline,
+                  offset_line(track.centerline, track.lane_width))
+    left_outer_points, center_points, right_outer_points = [
+        detect_lane_boundary(boundary, camera_x, camera_y, camera_angle,
+                             camera.min_range, camera.max_range, camera.field_of_view)
+        for boundary in boundaries
+    ]
+
+    if lateral_offset(track.centerline, car.x, car.y) < 0:
+        left_lane_points, right_lane_points, current_lane = left_outer_points, center_points, "LEFT"
+    else:
+        left_lane_points, right_lane_points, current_lane = center_points, right_outer_points, "RIGHT"
+
+    lane_center_offset = None
+    if left_lane_points and right_lane_points:
+        left_closest = min(left_lane_points, key=lambda p: abs(p[2]))
+        right_closest = min(right_lane_points, key=lambda p: abs(p[2]))
+        lane_center_offset = (right_closest[2] + left_closest[2]) / 2
+
+    state = {
+        "left_lane_detected": len(left_lane_points) > 0,
+        "right_lane_detected": len(right_lane_points) > 0,
+        "current_lane": current_lane,
+        "lane_center_offset": lane_center_offset,
+    }
+    return left_lane_points, right_lane_points, center_points, state
+
+
+def calculate_steering(lka, detections):
+    """PurePursuitLKA.calculate_steering ("nearest" lookahead) on detect_lanes' result
+
+    Returns None when LKA would not steer, else (steering_angle,
+    lookahead_point, lookahead_distance); lookahead_point is None when the
+    target is closer than 1 px and the command is 0.
+    """
+    if not lka.active:
+        return None
+
+    left_lane, right_lane, _, state = detections
+    if not (state["left_lane_detected"] and state["right_lane_detected"]):
+        return None
+
+    car = lka.car
+    speed = abs(car.velocity)
+    lookahead_distance = lka.base_lookahead_distance + lka.lookahead_gain * speed
+    lookahead_distance = np.clip(lookahead_distance, lka.min_lookahead, lka.max_lookahead)
+
+    car_x = car.x
+    car_y = car.y
+    car_theta = car.theta
+
+    lane_center_points = []
+    for left_point in left_lane:
+        left_x, left_y, left_ang = left_point
+        min_dist = float('inf')
+        closest_right = None
+
+        for right_point in right_lane:
+            right_x, right_y, right_ang = right_point
+            dist = np.sqrt((right_x - left_x)**2 + (right_y - left_y)**2)
+            if dist < min_dist:
+                min_dist = dist
+                closest_right = right_point
+
+        if closest_right:
+            right_x, right_y, right_ang = closest_right
+            center_x = (left_x + right_x) / 2
+            center_y = (left_y + right_y) / 2
+            dx = center_x - car_x
+            dy = center_y - car_y
+            distance = np.sqrt(dx**2 + dy**2)
+            lane_center_points.append((center_x, center_y, distance))
+
+    if len(lane_center_points) == 0:
+        return None
+
+    best_point = min(lane_center_points, key=lambda p: abs(p[2] - lookahead_distance))
+    lookahead_x, lookahead_y, actual_distance = best_point
+
+    dx = lookahead_x - car_x
+    dy = lookahead_y - car_y
+    angle_to_point = np.arctan2(dy, dx)
+
+    alpha = angle_to_point - car_theta
+    alpha = np.arctan2(np.sin(alpha), np.cos(alpha))
+
+    if actual_distance < 1.0:
+        return 0.0, None, None
+
+    steering_angle = np.arctan2(2 * car.wheelbase * np.sin(alpha), actual_distance)
+    steering_angle *= lka.steering_gain
+    steering_angle = np.clip(steering_angle, -car.max_steering_angle, car.max_steering_angle)
+
+    return steering_angle, (lookahead_x, lookahead_y), actual_distance
+
+
+def update(car, dt, throttle=0.0, steer=0.0, lka_steering=None, lka_active=False):
+    """Car.update with key presses as throttle / steer in [-1, 1] (W = 1, S = -1, A = 1, D = -1)
+
+    Returns (x, y, theta, velocity, steering_angle, moved, deactivates_lka);
+    when moved, the car's prev_x / prev_y become its old position.
+    """
+    x, y, theta = car.x, car.y, car.theta
+    velocity, steering_angle = car.velocity, car.steering_angle
+
+    if throttle > 0:
+        velocity += car.acceleration * throttle * dt
+    elif throttle < 0:
+        velocity += car.deceleration * throttle * dt
+    else:
+        if velocity > 0:
+            velocity -= car.friction * dt
+            if velocity < 0:
+                velocity = 0
+        elif velocity < 0:
+            velocity += car.friction * dt
+            if velocity > 0:
+                velocity = 0
+
+    velocity = np.clip(velocity, -car.max_velocity * 0.5, car.max_velocity)
+
+    manual_steering = steer != 0
+    if manual_steering:
+        steering_angle += car.steering_rate * steer * dt
+    elif lka_steering is not None:
+        steering_angle = lka_steering
+    else:
+        if abs(steering_angle) > 0.01:
+            steering_angle *= 0.9
+        else:
+            steering_angle = 0
+
+    steering_angle = np.clip(steering_angle, -car.max_steering_angle, car.max_steering_angle)
+
+    moved = abs(velocity) > 0.1
+    if moved:
+        omega = velocity * np.tan(steering_angle) / car.wheelbase
+
+        if car.integrator == "arc":
+            # Exact arc at constant speed and steering: chord v*dt*sinc(dtheta/2) at theta + dtheta/2
+            half_turn = omega * dt / 2
+            chord = velocity * dt * (math.sin(half_turn) / half_turn if half_turn != 0 else 1.0)
+            x += chord * np.cos(theta + half_turn)
+            y += chord * np.sin(theta + half_turn)
+        else:
+            x += velocity * np.cos(theta) * dt
+            y += velocity * np.sin(theta) * dt
+        theta += omega * dt
+        theta = np.arctan2(np.sin(theta), np.cos(theta))
+
+    return x, y, theta, velocity, steering_angle, moved, manual_steering and lka_active
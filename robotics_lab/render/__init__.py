@@ -0,0 +1,11 @@
+"""OpenGL/pygame rendering for the simulation
+
+Importing this package pulls in pygame and PyOpenGL; the simulation modules
+never do.
+"""
+
+import os
+
+# Set environment variables for better OpenGL compatibility (before OpenGL loads)
+os.environ.setdefault('SDL_VIDEO_X11_FORCE_EGL', '0')  # Disable EGL, use GLX instead
+os.environ.setdefault('PYOPENGL_PLATFORM', 'glx')  # Force GLX platform
@@ -0,0 +1,339 @@
+"""NumPy mesh builders shared by the renderers
+
+Everything here is plain NumPy (no OpenGL), so scene geometry can be built and
+inspected headless. Geometry mirrors what TrackRenderer/CarRenderer draw with
+immediate-mode calls, flattened into world-space triangle and line lists.
+"""
+
+import numpy as np
+
+# Materials: "lit" surfaces go through the lighting model, "unlit" ones keep their color
+LIT = "lit"
+UNLIT = "unlit"
+
+DASH_WIDTH = 2.0  # Center line dash width in world units
+
+
+def strip_to_triangles(vertices):
+    """Expand a triangle/quad strip (N, k) into a triangle list (3 * (N - 2), k)"""
+    vertices = np.asarray(vertices)
+    n = len(vertices) - 2
+    if n <= 0:
+        return vertices[:0]
+    i = np.arange(n)
+    return vertices[np.stack([i, i + 1, i + 2], axis=1).ravel()]
+
+
+def quads_to_triangles(vertices):
+    """Expand a quad list (4 * N, k) into a triangle list (6 * N, k)"""
+    vertices = np.asarray(vertices)
+    quads = np.arange(len(vertices) // 4) * 4
+    return vertices[(quads[:, None] + np.array([0, 1, 2, 0, 2, 3])).ravel()]
+
+
+def strip_to_lines(vertices):
+    """Expand a line strip (N, k) into a line list (2 * (N - 1), k)"""
+    vertices = np.asarray(vertices)
+    i = np.arange(len(vertices) - 1)
+    return vertices[np.stack([i, i + 1], axis=1).ravel()]
+
+
+def sphere_triangles(radius, slices, stacks):
+    """Triangle list for a sphere tessellated like gluSphere, centered at origin"""
+    rho = np.linspace(0.0, np.pi, stacks + 1)
+    theta = np.linspace(0.0, 2 * np.pi, slices + 1)
+    r, t = np.meshgrid(rho, theta, indexing="ij")
+    grid = np.stack([-np.sin(t) * np.sin(r), np.cos(t) * np.sin(r), np.cos(r)], axis=-1) * radius
+
+    # Two triangles per (stack, slice) cell
+    a = grid[:-1, :-1]
+    b = grid[1:, :-1]
+    c = grid[1:, 1:]
+    d = grid[:-1, 1:]
+    cells = np.stack([a, b, c, a, c, d], axis=2)
+    return cells.reshape(-1, 3)
+
+
+def box_triangles(length, width, height):
+    """Triangle list for an axis-aligned box centered at origin"""
+    l, w, h = length / 2, width / 2, height / 2
+    quads = np.array([
+        # Front, back, top, bottom, right, left (same faces as CarRenderer._draw_box)
+        (l, -w, -h), (l, w, -h), (l, w, h), (l, -w, h),
+        (-l, -w, -h), (-l, -w, h), (-l, w, h), (-l, w, -h),
+        (-l, -w, h), (l, -w, h), (l, w, h), (-l, w, h),
+        (-l, -w, -h), (-l, w, -h), (l, w, -h), (l, -w, -h),
+        (-l, w, -h), (-l, w, h), (l, w, h), (l, w, -h),
+        (-l, -w, -h), (l, -w, -h), (l, -w, h), (-l, -w, h),
+    ])
+    return quads_to_triangles(quads)
+
+
+def cylinder_triangles(radius, height, slices):
+    """Triangle list for an open cylinder along z, centered at origin"""
+    angle = 2 * np.pi * np.arange(slices + 1) / slices
+    strip = np.empty((2 * (slices + 1), 3))
+    strip[0::2] = np.stack([radius * np.cos(angle), radius * np.sin(angle), np.full(slices + 1, -height / 2)], axis=1)
+    strip[1::2] = strip[0::2] * [1, 1, -1]
+    return strip_to_triangles(strip)
+
+
+def rotation_z(angle):
+    """3x3 rotation about the z axis"""
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+def rotation_y(angle):
+    """3x3 rotation about the y axis"""
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]])
+
+
+def lod_tessellation(count, lod):
+    """Scale a sphere's slices/stacks count by a level-of-detail factor (at least 3)"""
+    return max(3, int(round(count * lod)))
+
+
+def scenery_layout(scenery_density):
+    """Tree interval and sign/building centerline indices for a scenery density in [0, 1]
+
+    Density 1 is the default layout; trees thin out as density drops, signs and
+    buildings go below 0.5 and everything goes at 0.
+    """
+    if scenery_density <= 0:
+        return None, [], []
+    tree_interval = max(1, int(round(8 / scenery_density)))
+    if scenery_density < 0.5:
+        return tree_interval, [], []
+    return tree_interval, [0, 10, 20], [8, 18]
+
+
+def dash_quads(dashes, width, z=0.0):
+    """Quad corners (4 * M, 3) of width `width` around (M, 2, 2) dash segments"""
+    dashes = np.asarray(dashes, dtype=float).reshape(-1, 2, 2)
+    start, end = dashes[:, 0], dashes[:, 1]
+    direction = end - start
+    direction /= np.maximum(np.hypot(*direction.T), 1e-12)[:, None]
+    side = np.column_stack([-direction[:, 1], direction[:, 0]]) * (width / 2)
+    corners = np.stack([start + side, start - side, end - side, end + side], axis=1).reshape(-1, 2)
+    return np.column_stack([corners, np.full(len(corners), z)])
+
+
+class MeshBuilder:
+    """Accumulates world-space triangles and line segments, grouped by material"""
+    def __init__(self, sphere_lod=1.0):
+        self.parts = {}  # (material, primitive, line_width) -> list of (positions, colors)
+        self.sphere_lod = sphere_lod
+
+    def _add(self, key, positions, colors):
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        colors = np.broadcast_to(np.asarray(colors, dtype=float), positions.shape)
+        self.parts.setdefault(key, []).append((positions, colors))
+
+    def add_triangles(self, material, positions, colors):
+        """Add a triangle list with one color or per-vertex colors"""
+        self._add((material, "triangles", 1.0), positions, colors)
+
+    def add_lines(self, material, positions, colors, width=1.0):
+        """Add a line list (pairs of points) drawn `width` pixels wide"""
+        self._add((material, "lines", float(width)), positions, colors)
+
+    def add_sphere(self, material, center, radius, slices, stacks, color):
+        """Add a gluSphere-style sphere, tessellation scaled by sphere_lod"""
+        mesh = sphere_triangles(radius, lod_tessellation(slices, self.sphere_lod),
+                                lod_tessellation(stacks, self.sphere_lod))
+        self.add_triangles(material, mesh + center, color)
+
+    def add_pole(self, material, x, y, height, color, width):
+        """Add a vertical line from the ground to `height`"""
+        self.add_lines(material, [(x, y, 0), (x, y, height)], color, width)
+
+    def build(self):
+        """Concatenate parts into {(material, primitive, line_width): (positions, colors)} float32 arrays"""
+        batches = {}
+        for key, parts in self.parts.items():
+            positions = np.concatenate([p for p, _ in parts]).astype(np.float32)
+            colors = np.concatenate([c for _, c in parts]).astype(np.float32)
+            batches[key] = (positions, colors)
+        return batches
+
+
+def _strip_colors(count, shades, period=1):
+    """Cycle `shades` every `period` strip pairs, one color per vertex of a (pair) strip"""
+    shades = np.asarray(shades, dtype=float)
+    index = (np.arange(count) // period) % len(shades)
+    return np.repeat(shades[index], 2, axis=0)
+
+
+def _wall_strip(bottom, top, z_bottom, z_top):
+    """Interleave two closed point rings into a closed triangle strip"""
+    bottom = np.vstack([bottom, bottom[:1]])
+    top = np.vstack([top, top[:1]])
+    strip = np.empty((2 * len(bottom), 3))
+    strip[0::2, :2] = bottom
+    strip[0::2, 2] = z_bottom
+    strip[1::2, :2] = top
+    strip[1::2, 2] = z_top
+    return strip
+
+
+def build_track_scene(track, builder=None, scenery_density=1.0, sphere_lod=1.0):
+    """Static track geometry: road, markings, terrain, features and scenery"""
+    builder = builder or MeshBuilder(sphere_lod)
+    centerline = np.asarray(track.centerline, dtype=float)
+    n = len(centerline)
+    half_width = track.track_width / 2
+    outer_track = track._offset_line(track.centerline, half_width)
+    inner_track = track._offset_line(track.centerline, -half_width)
+
+    # Road surface: strip across the road, three alternating grays
+    road = _wall_strip(outer_track, inner_track, 0, 0)
+    shades = _strip_colors(n, [(0.28, 0.28, 0.28), (0.30, 0.30, 0.30), (0.32, 0.32, 0.32)])
+    shades = np.vstack([shades, shades[-2:]])  # Closing pair keeps the last color
+    builder.add_triangles(LIT, strip_to_triangles(road), strip_to_triangles(shades))
+
+    # Lane markings: solid white edges and dashed yellow center line
+    for edge in (outer_track, inner_track):
+        ring = np.column_stack([np.vstack([edge, edge[:1]]), np.full(n + 1, 0.1)])
+        builder.add_lines(LIT, strip_to_lines(ring), (1.0, 1.0, 1.0), 3)
+    dashes = dash_quads(track.get_centerline_dashes(), DASH_WIDTH, 0.1)
+    builder.add_triangles(LIT, quads_to_triangles(dashes), (1.0, 1.0, 0.0))
+
+    # Terrain: sloped walls on both sides plus a raised lip on the outside
+    terrain_offset = 200
+    terrain_height = 30
+    outer_terrain = track._offset_line(track.centerline, half_width + terrain_offset)
+    inner_terrain = track._offset_line(track.centerline, -half_width - terrain_offset)
+    stripes = _strip_colors(n, [(0.2, 0.5, 0.2), (0.25, 0.55, 0.25)])
+    stripes = np.vstack([stripes, stripes[-2:]])
+    for terrain, edge in ((outer_terrain, outer_track), (inner_terrain, inner_track)):
+        wall = _wall_strip(edge, terrain, 0, terrain_height)
+        builder.add_triangles(LIT, strip_to_triangles(wall), strip_to_triangles(stripes))
+    lip = _wall_strip(outer_terrain, outer_terrain, terrain_height, terrain_height + 10)
+    grass = _strip_colors(n, [(0.15, 0.4, 0.15), (0.18, 0.45, 0.18)], period=2)
+    grass = np.vstack([grass, grass[-2:]])
+    builder.add_triangles(LIT, strip_to_triangles(lip), strip_to_triangles(grass))
+
+    # Track direction at every centerline point
+    following = np.roll(centerline, -1, axis=0)
+    delta = following - centerline
+    perp = np.arctan2(delta[:, 1], delta[:, 0]) + np.pi / 2
+    normals = np.column_stack([np.cos(perp), np.sin(perp)])
+
+    # Checkpoints with sector spheres every 6 points
+    marker_offset = half_width + 5
+    for i in range(0, n, 6):
+        for side in (1, -1):
+            x, y = centerline[i] + side * marker_offset * normals[i]
+            builder.add_pole(UNLIT, x, y, 25, (0.0, 0.8, 1.0), 4)
+            builder.add_sphere(UNLIT, (x, y, 25), 3, 8, 8, (0.0, 0.8, 1.0))
+        number = i // 6 + 1
+        color = ((number * 0.3) % 1.0, (number * 0.5) % 1.0, (number * 0.7) % 1.0)
+        builder.add_sphere(UNLIT, (centerline[i][0], centerline[i][1], 20), 5, 8, 8, color)
+
+    # Direction arrows every 3 points: shaft plus a V-shaped head
+    arrow_length = 15
+    arrow_width = 8
+    for i in range(0, n, 3):
+        length = np.hypot(*delta[i])
+        if length > 0:
+            direction = delta[i] / length
+            start = centerline[i]
+            end = start + direction * arrow_length
+            heading = np.arctan2(direction[1], direction[0])
+            left = end - arrow_width * np.array([np.cos(heading + 2.5), np.sin(heading + 2.5)])
+            right = end - arrow_width * np.array([np.cos(heading - 2.5), np.sin(heading - 2.5)])
+            points = np.array([start, end, end, left, end, right])
+            builder.add_lines(UNLIT, np.column_stack([points, np.full(6, 0.2)]), (1.0, 1.0, 0.0), 3)
+
+    # Start/finish markers
+    for side, color in ((1, (1.0, 0.0, 0.0)), (-1, (1.0, 1.0, 1.0))):
+        x, y = centerline[0] + side * marker_offset * normals[0]
+        builder.add_pole(UNLIT, x, y, 35, color, 4)
+        builder.add_sphere(UNLIT, (x, y, 35), 3, 8, 8, color)
+
+    tree_interval, sign_positions, building_positions = scenery_layout(scenery_density)
+
+    # Trees every 8 points (at full density), alternating sides
+    for i in range(0, n, tree_interval or n + 1):
+        side = 1 if i % 2 == 0 else -1
+        x, y = centerline[i] + side * (half_width + 30) * normals[i]
+        builder.add_pole(UNLIT, x, y, 15, (0.4, 0.2, 0.1), 3)
+        builder.add_sphere(UNLIT, (x, y, 15), 8, 4, 4, (0.1, 0.5, 0.1))
+
+    # Distance signs on the right side
+    sign_width = 6
+    sign_height = 4
+    for sign_idx in sign_positions:
+        if sign_idx < n:
+            x, y = centerline[sign_idx] - (half_width + 15) * normals[sign_idx]
+            builder.add_pole(UNLIT, x, y, 15, (1.0, 0.5, 0.0), 3)
+            board = np.array([(-sign_width / 2, 0, -sign_height / 2), (sign_width / 2, 0, -sign_height / 2),
+                              (sign_width / 2, 0, sign_height / 2), (-sign_width / 2, 0, sign_height / 2)])
+            builder.add_triangles(UNLIT, quads_to_triangles(board) + (x, y, 12), (1.0, 0.5, 0.0))
+            color_intensity = (sign_idx * 100 % 500) / 500.0
+            builder.add_sphere(UNLIT, (x, y, 12 + sign_height / 2 + 2), 2, 6, 6, (1.0, color_intensity, 0.0))
+
+    # Landmark buildings on the outer edge
+    colors = [(0.7, 0.7, 0.8), (0.8, 0.6, 0.4), (0.6, 0.6, 0.7), (0.7, 0.5, 0.5)]
+    for building_idx in building_positions:
+        if building_idx < n:
+            x, y = centerline[building_idx] + (half_width + 60) * normals[building_idx]
+            _add_building(builder, x, y, building_idx, colors[building_idx % len(colors)])
+
+    return builder
+
+
+def _add_building(builder, x, y, building_type, color):
+    """Box with a darker roof and a grid of lit windows on the front face"""
+    building_width = 20
+    building_depth = 15
+    building_height = 25 + (building_type * 5)
+    w, d, h = building_width / 2, building_depth / 2, building_height / 2
+    center = np.array([x, y, h])
+
+    # Front, back, top (darker), left, right - bottom is never visible
+    faces = np.array([
+        (-w, d, -h), (w, d, -h), (w, d, h), (-w, d, h),
+        (-w, -d, -h), (-w, -d, h), (w, -d, h), (w, -d, -h),
+        (-w, -d, h), (w, -d, h), (w, d, h), (-w, d, h),
+        (-w, -d, -h), (-w, d, -h), (-w, d, h), (-w, -d, h),
+        (w, -d, -h), (w, -d, h), (w, d, h), (w, d, -h),
+    ])
+    face_colors = np.repeat([color, color, np.multiply(color, 0.7), color, color], 4, axis=0)
+    builder.add_triangles(UNLIT, quads_to_triangles(faces) + center, quads_to_triangles(face_colors))
+
+    windows = []
+    for row in range(3):
+        for col in range(4):
+            wx = -w + (col + 0.5) * building_width / 4 - building_width / 2
+            wz = -h + (row + 0.5) * building_height / 3
+            windows += [(wx, d + 0.1, wz), (wx + 2, d + 0.1, wz), (wx + 2, d + 0.1, wz + 2), (wx, d + 0.1, wz + 2)]
+    builder.add_triangles(UNLIT, quads_to_triangles(np.array(windows)) + center, (1.0, 1.0, 0.8))
+
+
+def build_car_mesh(car, builder=None):
+    """World-space car body, hood and wheels at the car's current pose"""
+    builder = builder or MeshBuilder()
+    rotation = rotation_z(car.theta)
+    origin = np.array([car.x, car.y, car.height / 2])
+
+    body = box_triangles(car.length, car.width, car.height)
+    hood = box_triangles(car.length / 2, car.width * 0.8, car.height / 3) + (car.length / 4, 0, car.height / 3)
+    builder.add_triangles(LIT, body @ rotation.T + origin, (0.2, 0.5, 0.8))
+    builder.add_triangles(LIT, hood @ rotation.T + origin, (0.3, 0.6, 0.9))
+
+    wheel = cylinder_triangles(4, 3, 8) @ rotation_y(np.pi / 2).T
+    steered = wheel @ rotation_z(car.steering_angle).T
+    wheel_positions = [
+        (car.length / 2 - 5, car.width / 2, 0),
+        (car.length / 2 - 5, -car.width / 2, 0),
+        (-car.length / 2 + 5, car.width / 2, 0),
+        (-car.length / 2 + 5, -car.width / 2, 0),
+    ]
+    for i, position in enumerate(wheel_positions):
+        local = (steered if i < 2 else wheel) + position
+        builder.add_triangles(LIT, local @ rotation.T + origin, (0.1, 0.1, 0.1))
+
+    return builder
@@ -0,0 +1,228 @@
+"""Minimap drawn on the GPU: vertex batches rendered into a framebuffer texture
+
+MinimapGeometry turns the CPU Minimap's drawing into vertex arrays in minimap
+pixel coordinates (y down, like pygame). The track layer never changes: the
+renderers (scene.MinimapRenderer, shader.ShaderMinimapRenderer) draw it once
+into a background texture, and each refresh copies that background into the
+minimap texture and adds a few small batches for the car, camera cone and
+detections. The minimap texture is composited as a single quad.
+"""
+
+import numpy as np
+import pygame
+from OpenGL.GL import *
+
+from .trail import TRAIL_COLOR, error_colors
+
+# Colors in 0..1, matching the pygame minimap
+BACKGROUND = (20 / 255, 20 / 255, 20 / 255)
+FOV_ALPHA = 30 / 255
+LINE_MODES = {"lines": GL_LINES, "line_strip": GL_LINE_STRIP}  # Line layer primitives; the rest are triangles
+DISK_SEGMENTS = 12
+_DISK_ANGLES = np.linspace(0, 2 * np.pi, DISK_SEGMENTS + 1)
+DISK_RIM = np.column_stack([np.cos(_DISK_ANGLES), np.sin(_DISK_ANGLES)])  # Unit circle, first point repeated
+
+
+def _rgb(color):
+    return tuple(c / 255 for c in color)
+
+
+def _flat(points):
+    """(N, 2) pixel points to (N, 3) at z = 0"""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return np.column_stack([points, np.zeros(len(points))])
+
+
+def _ring_lines(points):
+    """Closed polyline as a line list (pairs of points)"""
+    points = np.asarray(points, dtype=float)
+    return np.stack([points, np.roll(points, -1, axis=0)], axis=1).reshape(-1, 2)
+
+
+def _rect_lines(x, y, width, height):
+    """Rectangle outline as a line list"""
+    return _ring_lines([(x, y), (x + width, y), (x + width, y + height), (x, y + height)])
+
+
+def _disks(centers, radius):
+    """Filled circles as a triangle list, DISK_SEGMENTS triangles each"""
+    centers = np.asarray(centers, dtype=float).reshape(-1, 1, 2)
+    rim = DISK_RIM * radius
+    triangles = np.empty((len(centers), DISK_SEGMENTS, 3, 2))
+    triangles[:, :, 0] = centers
+    triangles[:, :, 1] = centers + rim[:-1]
+    triangles[:, :, 2] = centers + rim[1:]
+    return triangles.reshape(-1, 2)
+
+
+class MinimapGeometry:
+    """Vertex layers for the minimap, in drawing order
+
+    A layer is (primitive, line_width, positions, colors) with primitive
+    "triangles", "lines", "line_strip" or "fov" (triangles blended at
+    FOV_ALPHA), (N, 3) float32 positions in minimap pixels and (N, 3) float32
+    colors.
+    """
+    def __init__(self, minimap):
+        self.size = minimap.size
+        self.track = minimap.track
+        self.min_x = minimap.min_x
+        self.min_y = minimap.min_y
+        self.max_x = minimap.max_x
+        self.max_y = minimap.max_y
+        self.scale = minimap.scale
+        self.margin = minimap.margin
+        self.trail = minimap.trail
+        self.label_surface = minimap.render_labels()
+        self.static_layers = self._build_static_layers()
+
+    def to_minimap(self, points):
+        """World points (N, 2) to minimap pixels"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return (points - (self.min_x, self.min_y)) * self.scale + self.margin
+
+    def _build_static_layers(self):
+        """Border, grid, bounds box, track edges and centerline dashes"""
+        size = self.size
+        half_width = self.track.track_width / 2
+        ticks = np.arange(0, size, 50)
+        grid = np.concatenate([np.column_stack([ticks, np.zeros_like(ticks), ticks, np.full_like(ticks, size)]),
+                               np.column_stack([np.zeros_like(ticks), ticks, np.full_like(ticks, size), ticks])])
+        edges = [_ring_lines(self.to_minimap(self.track.get_boundary_segments(offset)[0]))
+                 for offset in (half_width, -half_width)]
+        dashes = self.to_minimap(np.asarray(self.track.get_centerline_dashes(), dtype=float).reshape(-1, 2))
+        bounds_min, bounds_max = self.to_minimap([(self.min_x, self.min_y), (self.max_x, self.max_y)])
+
+        layers = [
+            ("lines", 1.0, grid.reshape(-1, 2), _rgb((40, 40, 40))),
+            ("lines", 3.0, _rect_lines(1.5, 1.5, size - 3, size - 3), _rgb((100, 100, 100))),
+            ("lines", 1.0, _rect_lines(2.5, 2.5, size - 5, size - 5), _rgb((200, 200, 200))),
+            ("lines", 2.0, _rect_lines(*bounds_min, *(bounds_max - bounds_min)), _rgb((255, 0, 0))),
+            ("lines", 2.0, np.concatenate(edges), _rgb((255, 255, 255))),
+            ("lines", 1.0, dashes, _rgb((100, 100, 100))),
+        ]
+        return [self._layer(*layer) for layer in layers]
+
+    def _layer(self, primitive, line_width, points, color):
+        positions = _flat(points).astype(np.float32)
+        colors = np.ascontiguousarray(np.broadcast_to(np.asarray(color, dtype=np.float32), positions.shape))
+        return primitive, line_width, positions, colors
+
+    def dynamic_layers(self, car, camera, lka):
+        """Trail, FOV cone, detections, wheels, lookahead and car for the current frame
+
+        The trail layer is always first (empty without a trail), so the
+        number of layers never changes.
+        """
+        camera_x, camera_y = camera.get_camera_position()
+        half_fov = camera.field_of_view / 2
+        angles = np.array([car.theta - half_fov, car.theta + half_fov])
+        cone = self.to_minimap([(camera_x, camera_y)] + list(zip(camera_x + camera.max_range * np.cos(angles),
+                                                                   camera_y + camera.max_range * np.sin(angles))))
+
+        left_lane, right_lane, center_lane = camera.detections
+        (left_wheel, right_wheel) = self.to_minimap(car.get_front_wheel_positions())
+        left = self.to_minimap(np.column_stack([left_lane["x"], left_lane["y"]]))
+        right = self.to_minimap(np.column_stack([right_lane["x"], right_lane["y"]]))
+        center = self.to_minimap(np.column_stack([center_lane["x"], center_lane["y"]]))
+
+        half_length = car.length / 2
+        heading = np.array([np.cos(car.theta), np.sin(car.theta)])
+        rear, front, middle = self.to_minimap([(car.x, car.y) - half_length * heading,
+                                               (car.x, car.y) + half_length * heading, (car.x, car.y)])
+
+        thin = [(cone[[0, 1, 0, 2]], (0, 255, 0)),
+                (np.stack([np.broadcast_to(left_wheel, left.shape), left], axis=1), (255, 128, 0)),
+                (np.stack([np.broadcast_to(right_wheel, right.shape), right], axis=1), (0, 200, 200))]
+        disks = [(_disks(left, 3), (255, 0, 0)), (_disks(right, 3), (0, 128, 255)),
+                 (_disks(center, 2), (0, 0, 200)), (_disks(cone[0], 5), (0, 255, 0)),
+                 (_disks(left_wheel, 5), (255, 100, 0)), (_disks(right_wheel, 5), (0, 150, 255))]
+        wide = []
+        top = []
+        if lka.active and lka.lookahead_point is not None:
+            lookahead = self.to_minimap(lka.lookahead_point)[0]
+            wide.append(((middle, lookahead), (255, 255, 0)))
+            top.append((_disks(lookahead, 6), (255, 255, 0)))
+        wide.append(((rear, front), (255, 255, 255)))
+        top += [(_disks(front, 4), (0, 100, 255)), (_disks(middle, 3), (255, 255, 0))]
+
+        return [self._trail_layer(car),
+                self._layer("fov", 1.0, cone, (0.0, 1.0, 0.0)),
+                self._merge("lines", 1.0, thin),
+                self._merge("triangles", 1.0, disks),
+                self._merge("lines", 2.0, wide),
+                self._merge("triangles", 1.0, top)]
+
+    def _trail_layer(self, car):
+        """The trail as one line strip ending at the car, colored by lateral error when it has a track"""
+        if self.trail is None or not self.trail.count:
+            return self._layer("line_strip", 2.0, np.empty((0, 2)), _rgb(TRAIL_COLOR))
+        points = self.to_minimap(np.vstack([self.trail.points(), (car.x, car.y)]))
+        levels = self.trail.error_levels()
+        if levels is None:
+            return self._layer("line_strip", 2.0, points, _rgb(TRAIL_COLOR))
+        colors = error_colors(np.append(levels, levels[-1:]))
+        return "line_strip", 2.0, _flat(points).astype(np.float32), colors.astype(np.float32)
+
+    def _merge(self, primitive, line_width, parts):
+        """One layer from [(points, 0-255 color)] with per-vertex colors"""
+        points = [np.asarray(p, dtype=float).reshape(-1, 2) for p, _ in parts]
+        colors = [np.tile(_rgb(color), (len(p), 1)) for p, (_, color) in zip(points, parts)]
+        return (primitive, line_width, _flat(np.concatenate(points)).astype(np.float32),
+                np.concatenate(colors).astype(np.float32))
+
+
+def ortho_matrix(size):
+    """Minimap pixels to clip space; pixel row 0 lands on texture row 0 so the
+    texture reads top-down like a pygame surface"""
+    matrix = np.identity(4)
+    matrix[0, 0] = matrix[1, 1] = 2.0 / size
+    matrix[0, 3] = matrix[1, 3] = -1.0
+    return matrix
+
+
+def create_render_target(size):
+    """Framebuffer with a size x size RGBA texture; returns (framebuffer, texture)
+
+    Raises RuntimeError when the framebuffer is incomplete.
+    """
+    texture = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, size, size, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+    glBindTexture(GL_TEXTURE_2D, 0)
+
+    previous = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+    framebuffer = glGenFramebuffers(1)
+    glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+    glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, texture, 0)
+    status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+    glBindFramebuffer(GL_FRAMEBUFFER, previous)
+    if status != GL_FRAMEBUFFER_COMPLETE:
+        glDeleteFramebuffers(1, [framebuffer])
+        glDeleteTextures([texture])
+        raise RuntimeError(f"Minimap framebuffer incomplete (status {status:#x})")
+    return framebuffer, texture
+
+
+def copy_render_target(source, target, size):
+    """Copy the color of framebuffer `source` into `target`, leaving `target` bound"""
+    glBindFramebuffer(GL_READ_FRAMEBUFFER, source)
+    glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+    glBlitFramebuffer(0, 0, size, size, 0, 0, size, size, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+    glBindFramebuffer(GL_FRAMEBUFFER, target)
+
+
+def label_texture(surface):
+    """Upload an RGBA pygame surface to a new texture, flipped vertically because
+    the minimap framebuffer is drawn with pixel row 0 at the bottom"""
+    width, height = surface.get_size()
+    texture = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE,
+                 pygame.image.tostring(surface, "RGBA", True))
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return texture
@@ -0,0 +1,348 @@
+"""2D overlays drawn with pygame: minimap and HUD"""
+
+import pygame
+import numpy as np
+
+from ..config import WIDTH, HEIGHT
+from .trail import ERROR_COLOR_BINS, TRAIL_COLOR, error_colors
+
+# Colors (for minimap and UI)
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRAY = (100, 100, 100)
+DARK_GRAY = (50, 50, 50)
+RED = (255, 0, 0)
+BLUE = (0, 100, 255)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+
+
+class Minimap:
+    """2D minimap renderer - reuses original drawing code"""
+    def __init__(self, size, track):
+        self.size = size
+        self.track = track
+        self.surface = pygame.Surface((size, size))
+        self.trail = None  # TrajectoryTrail drawn under the car, if set
+
+        # Calculate track bounding box for proper scaling
+        self._calculate_track_bounds()
+
+        # Dashed centerline in minimap coordinates (shared with the 3D view's dashes)
+        dashes = track.get_centerline_dashes()
+        self.centerline_dashes = [(self._world_to_minimap(*start), self._world_to_minimap(*end))
+                                  for start, end in dashes]
+
+    def _calculate_track_bounds(self):
+        """Calculate bounding box of entire track"""
+        # Get all track points including boundaries
+        all_points = list(self.track.centerline)
+        outer = self.track._offset_line(self.track.centerline, self.track.track_width / 2)
+        inner = self.track._offset_line(self.track.centerline, -self.track.track_width / 2)
+        all_points.extend(outer)
+        all_points.extend(inner)
+
+        # Find min/max coordinates
+        xs = [p[0] for p in all_points]
+        ys = [p[1] for p in all_points]
+
+        self.min_x = min(xs)
+        self.max_x = max(xs)
+        self.min_y = min(ys)
+        self.max_y = max(ys)
+
+        # Calculate scale to fit in minimap with margin
+        margin = 20  # pixels
+        track_width = self.max_x - self.min_x
+        track_height = self.max_y - self.min_y
+
+        # Scale to fit within minimap size minus margins
+        scale_x = (self.size - 2 * margin) / track_width
+        scale_y = (self.size - 2 * margin) / track_height
+
+        # Use the smaller scale to maintain aspect ratio
+        self.scale = min(scale_x, scale_y)
+        self.margin = margin
+
+    def _world_to_minimap(self, x, y):
+        """Convert world coordinates to minimap coordinates (arrays of x and y convert elementwise)"""
+        # Translate to origin, scale, then translate to minimap with margin
+        map_x = (x - self.min_x) * self.scale + self.margin
+        map_y = (y - self.min_y) * self.scale + self.margin
+        if np.ndim(map_x):
+            return map_x.astype(int), map_y.astype(int)
+        return int(map_x), int(map_y)
+
+    def render(self, car, camera, lka):
+        """Render minimap with original 2D view"""
+        # Fill with semi-transparent dark background
+        self.surface.fill((20, 20, 20))  # Very dark gray background
+
+        # Draw border around minimap
+        pygame.draw.rect(self.surface, (100, 100, 100), (0, 0, self.size, self.size), 3)
+        pygame.draw.rect(self.surface, (200, 200, 200), (2, 2, self.size-4, self.size-4), 1)
+
+        # DEBUG: Draw grid to show we're using full minimap space
+        grid_color = (40, 40, 40)
+        for i in range(0, self.size, 50):
+            pygame.draw.line(self.surface, grid_color, (i, 0), (i, self.size), 1)
+            pygame.draw.line(self.surface, grid_color, (0, i), (self.size, i), 1)
+
+        # DEBUG: Draw expected bounds rectangle (should be near edges)
+        min_scaled = self._world_to_minimap(self.min_x, self.min_y)
+        max_scaled = self._world_to_minimap(self.max_x, self.max_y)
+        pygame.draw.rect(self.surface, (255, 0, 0),
+                        (min_scaled[0], min_scaled[1],
+                         max_scaled[0] - min_scaled[0],
+                         max_scaled[1] - min_scaled[1]), 2)
+
+        # DEBUG: Label the bounds
+        font = pygame.font.Font(None, 16)
+        bounds_text = font.render(f"Bounds: {min_scaled} to {max_scaled}", True, (255, 0, 0))
+        self.surface.blit(bounds_text, (5, self.size - 20))
+
+        # Draw track
+        self._draw_track_2d()
+
+        # Draw the recent path under everything the car carries
+        if self.trail is not None:
+            self._draw_trail_2d(car)
+
+        # Draw camera FOV and detections
+        self._draw_camera_view_2d(camera)
+
+        # Draw LKA lookahead
+        if lka.active and lka.lookahead_point is not None:
+            lx, ly = lka.lookahead_point
+            car_scaled = self._world_to_minimap(car.x, car.y)
+            lookahead_scaled = self._world_to_minimap(lx, ly)
+            pygame.draw.line(self.surface, YELLOW, car_scaled, lookahead_scaled, 2)
+            pygame.draw.circle(self.surface, YELLOW, lookahead_scaled, 6)
+
+        # Draw car (simple representation)
+        self._draw_car_2d(car)
+
+        # DEBUG: Draw scale info
+        font = pygame.font.Font(None, 20)
+        scale_text = font.render(f"Scale: {self.scale:.3f}", True, (255, 255, 0))
+        self.surface.blit(scale_text, (5, 5))
+
+        return self.surface
+
+    def render_labels(self):
+        """Bounds and scale captions on a transparent surface (the GPU minimap's text layer)"""
+        surface = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        min_scaled = self._world_to_minimap(self.min_x, self.min_y)
+        max_scaled = self._world_to_minimap(self.max_x, self.max_y)
+        font = pygame.font.Font(None, 16)
+        surface.blit(font.render(f"Bounds: {min_scaled} to {max_scaled}", True, (255, 0, 0)), (5, self.size - 20))
+        font = pygame.font.Font(None, 20)
+        surface.blit(font.render(f"Scale: {self.scale:.3f}", True, (255, 255, 0)), (5, 5))
+        return surface
+
+    def _draw_track_2d(self):
+        """Draw track in minimap with proper scaling"""
+        outer = self.track._offset_line(self.track.centerline, self.track.track_width / 2)
+        inner = self.track._offset_line(self.track.centerline, -self.track.track_width / 2)
+
+        # Convert to minimap coordinates
+        outer_scaled = [self._world_to_minimap(x, y) for x, y in outer]
+        inner_scaled = [self._world_to_minimap(x, y) for x, y in inner]
+
+        # DEBUG: Print first and last points to verify scaling
+        if len(outer) > 0:
+            print(f"Track outer[0]: world={outer[0]}, minimap={outer_scaled[0]}")
+            print(f"Track outer[-1]: world={outer[-1]}, minimap={outer_scaled[-1]}")
+
+        if len(outer_scaled) > 2:
+            pygame.draw.lines(self.surface, WHITE, True, outer_scaled, 2)
+        if len(inner_scaled) > 2:
+            pygame.draw.lines(self.surface, WHITE, True, inner_scaled, 2)
+
+        # Draw centerline dashed
+        for p1, p2 in self.centerline_dashes:
+            pygame.draw.line(self.surface, GRAY, p1, p2, 1)
+
+    def _draw_trail_2d(self, car):
+        """Draw the trail as one polyline ending at the car, or one per run of an error shade"""
+        points = np.vstack([self.trail.points(), (car.x, car.y)])
+        if len(points) < 2:
+            return
+        xs, ys = self._world_to_minimap(points[:, 0], points[:, 1])
+        pixels = np.column_stack([xs, ys]).tolist()
+        levels = self.trail.error_levels()
+        if levels is None:
+            pygame.draw.lines(self.surface, TRAIL_COLOR, False, pixels, 2)
+            return
+        shades = np.rint(np.append(levels, levels[-1:]) * (ERROR_COLOR_BINS - 1)).astype(int)
+        colors = (error_colors(np.arange(ERROR_COLOR_BINS) / (ERROR_COLOR_BINS - 1)) * 255).astype(int)
+        starts = np.flatnonzero(np.diff(shades, prepend=-1))
+        for start, end in zip(starts, np.append(starts[1:], len(points) - 1)):
+            if end > start:
+                # Segments take their first vertex's shade; each run reaches into the next
+                pygame.draw.lines(self.surface, colors[shades[start]].tolist(), False, pixels[start:end + 1], 2)
+
+    def _draw_camera_view_2d(self, camera):
+        """Draw camera FOV and detected lanes"""
+        camera_x, camera_y = camera.get_camera_position()
+
+        # Draw FOV cone
+        fov_points = [(camera_x, camera_y)]
+        left_angle = camera.car.theta - camera.field_of_view / 2
+        fov_points.append((
+            camera_x + camera.max_range * np.cos(left_angle),
+            camera_y + camera.max_range * np.sin(left_angle)
+        ))
+        right_angle = camera.car.theta + camera.field_of_view / 2
+        fov_points.append((
+            camera_x + camera.max_range * np.cos(right_angle),
+            camera_y + camera.max_range * np.sin(right_angle)
+        ))
+
+        # Convert FOV points to minimap coordinates
+        fov_points_scaled = [self._world_to_minimap(x, y) for x, y in fov_points]
+
+        # Draw semi-transparent FOV
+        s = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        pygame.draw.polygon(s, (0, 255, 0, 30), fov_points_scaled)
+        self.surface.blit(s, (0, 0))
+
+        # Draw FOV edges
+        camera_pos_scaled = fov_points_scaled[0]
+        pygame.draw.line(self.surface, GREEN, camera_pos_scaled, fov_points_scaled[1], 1)
+        pygame.draw.line(self.surface, GREEN, camera_pos_scaled, fov_points_scaled[2], 1)
+
+        # Draw the lane points detected this tick
+        left_lane, right_lane, center_lane = camera.detections
+
+        # Get wheel positions
+        (left_wheel_x, left_wheel_y), (right_wheel_x, right_wheel_y) = camera.car.get_front_wheel_positions()
+        left_wheel_scaled = self._world_to_minimap(left_wheel_x, left_wheel_y)
+        right_wheel_scaled = self._world_to_minimap(right_wheel_x, right_wheel_y)
+
+        # Draw left lane points with vectors from LEFT wheel
+        for px, py, _ in left_lane:
+            px_scaled, py_scaled = self._world_to_minimap(px, py)
+            pygame.draw.circle(self.surface, (255, 0, 0), (px_scaled, py_scaled), 3)
+            # Vector from left wheel to left lane point
+            pygame.draw.line(self.surface, (255, 128, 0), left_wheel_scaled, (px_scaled, py_scaled), 1)
+
+        # Draw right lane points with vectors from RIGHT wheel
+        for px, py, _ in right_lane:
+            px_scaled, py_scaled = self._world_to_minimap(px, py)
+            pygame.draw.circle(self.surface, (0, 128, 255), (px_scaled, py_scaled), 3)
+            # Vector from right wheel to right lane point
+            pygame.draw.line(self.surface, (0, 200, 200), right_wheel_scaled, (px_scaled, py_scaled), 1)
+
+        # Draw center lane points
+        for px, py, _ in center_lane:
+            px_scaled, py_scaled = self._world_to_minimap(px, py)
+            pygame.draw.circle(self.surface, (0, 0, 200), (px_scaled, py_scaled), 2)
+
+        # Draw camera position
+        pygame.draw.circle(self.surface, GREEN, camera_pos_scaled, 5)
+
+        # Draw wheel positions
+        pygame.draw.circle(self.surface, (255, 100, 0), left_wheel_scaled, 5)  # Orange
+        pygame.draw.circle(self.surface, (0, 150, 255), right_wheel_scaled, 5)  # Cyan
+
+    def _draw_car_2d(self, car):
+        """Draw car in minimap"""
+        # Draw main axis
+        rear_x = car.x - (car.length/2) * np.cos(car.theta)
+        rear_y = car.y - (car.length/2) * np.sin(car.theta)
+        front_x = car.x + (car.length/2) * np.cos(car.theta)
+        front_y = car.y + (car.length/2) * np.sin(car.theta)
+
+        # Convert to minimap coordinates
+        rear_scaled = self._world_to_minimap(rear_x, rear_y)
+        front_scaled = self._world_to_minimap(front_x, front_y)
+        center_scaled = self._world_to_minimap(car.x, car.y)
+
+        pygame.draw.line(self.surface, WHITE, rear_scaled, front_scaled, 2)
+
+        # Draw direction indicator
+        pygame.draw.circle(self.surface, BLUE, front_scaled, 4)
+        pygame.draw.circle(self.surface, YELLOW, center_scaled, 3)
+
+
+class HUD:
+    """Heads-up display for 3D view"""
+    def __init__(self):
+        self.font = pygame.font.Font(None, 28)
+        self.font_large = pygame.font.Font(None, 36)
+
+    def render(self, surface, car, camera, lka):
+        """Render HUD overlays"""
+        # LKA status
+        self._draw_lka_status(surface, lka)
+
+        # Speed and steering info
+        self._draw_telemetry(surface, car)
+
+        # Lane detection status
+        self._draw_lane_status(surface, camera)
+
+    def _draw_lka_status(self, surface, lka):
+        """Draw LKA status indicator"""
+        if lka.active:
+            status_text = "LKA: ACTIVE"
+            color = GREEN
+        else:
+            status_text = "LKA: OFF"
+            color = RED
+
+        text = self.font_large.render(status_text, True, color)
+        rect = text.get_rect(center=(WIDTH // 2, 30))
+
+        # Background
+        bg_rect = rect.inflate(20, 10)
+        s = pygame.Surface((bg_rect.width, bg_rect.height), pygame.SRCALPHA)
+        pygame.draw.rect(s, (0, 0, 0, 150), (0, 0, bg_rect.width, bg_rect.height))
+        surface.blit(s, bg_rect.topleft)
+
+        surface.blit(text, rect)
+
+    def _draw_telemetry(self, surface, car):
+        """Draw speed and steering information"""
+        texts = [
+            f"Speed: {abs(car.velocity):.1f} px/s",
+            f"Steering: {np.degrees(car.steering_angle):.1f}°",
+        ]
+
+        y = HEIGHT - 100
+        for text in texts:
+            rendered = self.font.render(text, True, WHITE)
+            # Background
+            rect = rendered.get_rect(topleft=(10, y))
+            bg_rect = rect.inflate(10, 5)
+            s = pygame.Surface((bg_rect.width, bg_rect.height), pygame.SRCALPHA)
+            pygame.draw.rect(s, (0, 0, 0, 150), (0, 0, bg_rect.width, bg_rect.height))
+            surface.blit(s, bg_rect.topleft)
+
+            surface.blit(rendered, rect)
+            y += 30
+
+    def _draw_lane_status(self, surface, camera):
+        """Draw lane detection status"""
+        texts = [
+            f"Lane: {camera.current_lane}",
+            f"Left: {'OK' if camera.left_lane_detected else 'NO'}",
+            f"Right: {'OK' if camera.right_lane_detected else 'NO'}",
+        ]
+
+        y = 80
+        for text in texts:
+            color = GREEN if ('OK' in text or 'LEFT' in text or 'RIGHT' in text) else WHITE
+            if 'NO' in text:
+                color = RED
+
+            rendered = self.font.render(text, True, color)
+            rect = rendered.get_rect(topleft=(10, y))
+            bg_rect = rect.inflate(10, 5)
+            s = pygame.Surface((bg_rect.width, bg_rect.height), pygame.SRCALPHA)
+            pygame.draw.rect(s, (0, 0, 0, 150), (0, 0, bg_rect.width, bg_rect.height))
+            surface.blit(s, bg_rect.topleft)
+
+            surface.blit(rendered, rect)
+            y += 30
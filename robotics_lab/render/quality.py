@@ -0,0 +1,76 @@
+"""Adaptive rendering quality driven by a frame-time budget"""
+
+# Quality levels from best (0) to cheapest. Each step gives up the detail
+# that is least noticeable first: minimap refresh and scenery, then sphere
+# tessellation and overlay resolution, then detection markers.
+QUALITY_LEVELS = [
+    {"scenery_density": 1.0, "sphere_lod": 1.0, "minimap_interval": 1, "markers": True, "overlay_scale": 1.0},
+    {"scenery_density": 0.5, "sphere_lod": 1.0, "minimap_interval": 2, "markers": True, "overlay_scale": 1.0},
+    {"scenery_density": 0.5, "sphere_lod": 0.5, "minimap_interval": 3, "markers": True, "overlay_scale": 0.75},
+    {"scenery_density": 0.25, "sphere_lod": 0.5, "minimap_interval": 4, "markers": False, "overlay_scale": 0.5},
+    {"scenery_density": 0.0, "sphere_lod": 0.5, "minimap_interval": 6, "markers": False, "overlay_scale": 0.5},
+]
+
+
+class QualityGovernor:
+    """Steps quality levels up or down to keep frame time under a target
+
+    Frame times are smoothed with an exponential moving average. Quality drops
+    one level once the average has stayed above target * degrade_ratio for
+    degrade_after seconds, and rises one level once it has stayed below
+    target * upgrade_ratio for upgrade_after seconds. The gap between the two
+    ratios and the longer upgrade window keep it from oscillating between
+    levels; both timers restart after every change so the new level is
+    measured before the next decision. The main loop is capped at the target
+    rate, so each frame counts as at least target_frame_time of wall time.
+    """
+    def __init__(self, target_frame_time, levels=None, level=0, smoothing=0.1,
+                 degrade_ratio=1.1, upgrade_ratio=0.7, degrade_after=0.5, upgrade_after=3.0):
+        self.target_frame_time = target_frame_time
+        self.levels = levels or QUALITY_LEVELS
+        self.level = level
+        self.smoothing = smoothing
+        self.degrade_ratio = degrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.degrade_after = degrade_after
+        self.upgrade_after = upgrade_after
+
+        self.average_frame_time = None
+        self.over_budget_time = 0.0  # Seconds spent above the degrade threshold
+        self.under_budget_time = 0.0  # Seconds spent below the upgrade threshold
+
+    @property
+    def settings(self):
+        """Knob values of the current level"""
+        return self.levels[self.level]
+
+    def update(self, frame_time):
+        """Record one frame's work time (seconds); returns True when the level changed"""
+        if self.average_frame_time is None:
+            self.average_frame_time = frame_time
+        else:
+            self.average_frame_time += self.smoothing * (frame_time - self.average_frame_time)
+
+        elapsed = max(frame_time, self.target_frame_time)
+        if self.average_frame_time > self.target_frame_time * self.degrade_ratio:
+            self.over_budget_time += elapsed
+            self.under_budget_time = 0.0
+        elif self.average_frame_time < self.target_frame_time * self.upgrade_ratio:
+            self.under_budget_time += elapsed
+            self.over_budget_time = 0.0
+        else:
+            self.over_budget_time = 0.0
+            self.under_budget_time = 0.0
+
+        if self.over_budget_time >= self.degrade_after and self.level < len(self.levels) - 1:
+            return self._set_level(self.level + 1)
+        if self.under_budget_time >= self.upgrade_after and self.level > 0:
+            return self._set_level(self.level - 1)
+        return False
+
+    def _set_level(self, level):
+        self.level = level
+        self.average_frame_time = None
+        self.over_budget_time = 0.0
+        self.under_budget_time = 0.0
+        return True
@@ -0,0 +1,84 @@
+"""Internal render resolution: the 3D pass drawn offscreen at a fraction of the window size
+
+On software rasterizers a frame's cost is mostly fill rate, which falls
+with the square of the scale. The renderers draw the 3D scene into a
+SceneTarget of the scaled size and stretch it over the window with one
+textured quad (bilinear filtered); the 2D overlay is drawn afterwards at the
+window's own resolution, so the HUD and minimap stay sharp.
+"""
+
+from OpenGL.GL import *
+
+RENDER_SCALES = (0.25, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)  # Steps for the runtime keys
+MIN_RENDER_SCALE = RENDER_SCALES[0]
+
+
+def clamp_render_scale(scale):
+    return min(max(scale, MIN_RENDER_SCALE), 1.0)
+
+
+def step_render_scale(scale, direction):
+    """The next RENDER_SCALES step below (direction < 0) or above the current scale;
+    the scale itself past the ends"""
+    if direction < 0:
+        lower = [step for step in RENDER_SCALES if step < scale - 1e-9]
+        return lower[-1] if lower else scale
+    higher = [step for step in RENDER_SCALES if step > scale + 1e-9]
+    return higher[0] if higher else scale
+
+
+def scaled_size(width, height, scale):
+    """Pixel size of the 3D pass for a window of width x height"""
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class SceneTarget:
+    """Framebuffer with an RGBA color texture and a depth buffer, reallocated when its size changes"""
+    def __init__(self):
+        self.framebuffer = None
+        self.texture = None
+        self.depth = None
+        self.size = None
+
+    def resize(self, width, height):
+        """Allocate the target at width x height (no-op at the current size)
+
+        Raises RuntimeError when the framebuffer is incomplete.
+        """
+        if self.size == (width, height):
+            return
+        self.delete()
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        self.depth = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        previous = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        self.framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, previous)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self.delete()
+            raise RuntimeError(f"Scene framebuffer incomplete (status {status:#x})")
+        self.size = (width, height)
+
+    def delete(self):
+        if self.framebuffer is not None:
+            glDeleteFramebuffers(1, [self.framebuffer])
+            glDeleteRenderbuffers(1, [self.depth])
+            glDeleteTextures([self.texture])
+        self.framebuffer = self.texture = self.depth = None
+        self.size = None
@@ -0,0 +1,950 @@
+"""3D scene rendering with the fixed-function OpenGL pipeline"""
+
+from OpenGL.GL import *
+from OpenGL.GLU import *
+import numpy as np
+
+from .meshes import DASH_WIDTH, dash_quads, lod_tessellation, scenery_layout
+from .minimap import BACKGROUND, FOV_ALPHA, LINE_MODES, copy_render_target, create_render_target, label_texture, ortho_matrix
+from .scaling import SceneTarget, clamp_render_scale, scaled_size
+
+
+class Renderer3D:
+    """3D OpenGL renderer"""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.sphere_lod = 1.0  # Tessellation factor for marker spheres
+        self.render_scale = 1.0  # 3D pass resolution as a fraction of the window (see set_render_scale)
+        self.scene_target = SceneTarget()
+        self.window_framebuffer = 0
+        self.setup_opengl()
+
+    def setup_opengl(self):
+        """Initialize OpenGL settings"""
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_LIGHTING)
+        glEnable(GL_LIGHT0)
+        glEnable(GL_COLOR_MATERIAL)
+        glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+
+        # Lighting setup
+        glLightfv(GL_LIGHT0, GL_POSITION, [0, 0, 1000, 0])
+        glLightfv(GL_LIGHT0, GL_AMBIENT, [0.5, 0.5, 0.5, 1.0])
+        glLightfv(GL_LIGHT0, GL_DIFFUSE, [0.8, 0.8, 0.8, 1.0])
+
+        glClearColor(0.6, 0.8, 1.0, 1.0)  # Sky blue background
+
+    def set_render_scale(self, scale):
+        """Draw the 3D pass at scale (clamped to MIN_RENDER_SCALE..1) of the window resolution
+
+        Raises RuntimeError (and keeps the old scale) when the offscreen target cannot be created.
+        """
+        scale = clamp_render_scale(scale)
+        if scale < 1.0:
+            self.scene_target.resize(*scaled_size(self.width, self.height, scale))
+        self.render_scale = scale
+
+    def begin_scene(self):
+        """Bind the 3D pass's target (the window itself at scale 1) and clear it"""
+        if self.render_scale < 1.0:
+            self.window_framebuffer = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+            glBindFramebuffer(GL_FRAMEBUFFER, self.scene_target.framebuffer)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+    def end_scene(self):
+        """Stretch an offscreen 3D pass over the window with one textured quad"""
+        if self.render_scale >= 1.0:
+            return
+        glBindFramebuffer(GL_FRAMEBUFFER, self.window_framebuffer)
+        glViewport(0, 0, self.width, self.height)
+
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, 1, 0, 1, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.scene_target.texture)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(0, 0)
+        glTexCoord2f(1, 0); glVertex2f(1, 0)
+        glTexCoord2f(1, 1); glVertex2f(1, 1)
+        glTexCoord2f(0, 1); glVertex2f(0, 1)
+        glEnd()
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+
+    def setup_3d_view(self, car):
+        """Setup 3D perspective for main view"""
+        glViewport(0, 0, *scaled_size(self.width, self.height, self.render_scale))
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(60, self.width / self.height, 1.0, 5000.0)
+
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+
+        # Hood camera position
+        cam_pos, look_pos = car.get_hood_camera_position()
+        gluLookAt(
+            cam_pos[0], cam_pos[1], cam_pos[2],  # Camera position
+            look_pos[0], look_pos[1], look_pos[2],  # Look-at point
+            0, 0, 1  # Up vector
+        )
+
+    def draw_lane_markers_3d(self, camera):
+        """Draw 3D markers for the lane points detected this tick"""
+        left_lane, right_lane, center_lane = camera.detections
+
+        glDisable(GL_LIGHTING)
+
+        # Draw left lane markers (red)
+        glColor3f(1.0, 0.0, 0.0)
+        for px, py, angle in left_lane:
+            self._draw_marker(px, py, 5.0, 8.0)
+
+        # Draw right lane markers (cyan)
+        glColor3f(0.0, 0.8, 1.0)
+        for px, py, angle in right_lane:
+            self._draw_marker(px, py, 5.0, 8.0)
+
+        # Draw center lane markers (yellow)
+        glColor3f(1.0, 1.0, 0.0)
+        for px, py, angle in center_lane:
+            self._draw_marker(px, py, 3.0, 6.0)
+
+        glEnable(GL_LIGHTING)
+
+    def _draw_marker(self, x, y, radius, height):
+        """Draw a cylindrical marker at position"""
+        glPushMatrix()
+        glTranslatef(x, y, 0)
+
+        # Draw vertical line
+        glBegin(GL_LINES)
+        glVertex3f(0, 0, 0)
+        glVertex3f(0, 0, height)
+        glEnd()
+
+        # Draw sphere at top
+        glTranslatef(0, 0, height)
+        quadric = gluNewQuadric()
+        gluSphere(quadric, radius, lod_tessellation(8, self.sphere_lod), lod_tessellation(8, self.sphere_lod))
+        gluDeleteQuadric(quadric)
+
+        glPopMatrix()
+
+    def draw_lookahead_point_3d(self, lka):
+        """Draw LKA lookahead point in 3D"""
+        if lka.active and lka.lookahead_point is not None:
+            lx, ly = lka.lookahead_point
+
+            glDisable(GL_LIGHTING)
+
+            # Draw vertical marker
+            glColor3f(1.0, 1.0, 0.0)
+            glLineWidth(3)
+            glBegin(GL_LINES)
+            glVertex3f(lx, ly, 0)
+            glVertex3f(lx, ly, 30)
+            glEnd()
+
+            # Draw sphere at top
+            glPushMatrix()
+            glTranslatef(lx, ly, 30)
+            quadric = gluNewQuadric()
+            gluSphere(quadric, 8, lod_tessellation(12, self.sphere_lod), lod_tessellation(12, self.sphere_lod))
+            gluDeleteQuadric(quadric)
+            glPopMatrix()
+
+            glEnable(GL_LIGHTING)
+
+    def draw_overlay(self, surface):
+        """Blend an RGBA pygame surface over the 3D scene, stretched to the full window"""
+        import pygame
+
+        # Switch to 2D orthographic projection for HUD and minimap
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.width, self.height, 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+
+        # Convert pygame surface to OpenGL texture and render as textured quad
+        # This is more reliable than glDrawPixels
+        texture_data = pygame.image.tostring(surface, "RGBA", False)
+
+        # Enable blending for transparency
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        # Create and bind texture
+        texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, *surface.get_size(), 0, GL_RGBA, GL_UNSIGNED_BYTE, texture_data)
+
+        # Draw textured quad covering the entire screen
+        glEnable(GL_TEXTURE_2D)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(0, 0)
+        glTexCoord2f(1, 0); glVertex2f(self.width, 0)
+        glTexCoord2f(1, 1); glVertex2f(self.width, self.height)
+        glTexCoord2f(0, 1); glVertex2f(0, self.height)
+        glEnd()
+        glDisable(GL_TEXTURE_2D)
+
+        # Clean up texture
+        glDeleteTextures([texture_id])
+        glDisable(GL_BLEND)
+
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_LIGHTING)
+
+        # Restore projection matrices
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+
+
+class MinimapRenderer:
+    """Minimap drawn into a framebuffer texture with client vertex arrays"""
+    def __init__(self, geometry, width, height):
+        self.geometry = geometry
+        self.width = width
+        self.height = height
+        self.size = geometry.size
+        self.framebuffer, self.texture = create_render_target(self.size)
+        self.background, self.background_texture = create_render_target(self.size)
+        labels = label_texture(geometry.label_surface)
+
+        # Static layer and captions, drawn once
+        self._begin_pass(self.background)
+        glClearColor(*BACKGROUND, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        self._draw_layers(geometry.static_layers)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self._textured_quad(labels, 0, 0, self.size, 1, 0)
+        self._end_pass()
+        glDeleteTextures([labels])
+
+    def render(self, car, camera, lka):
+        """Redraw the minimap texture for the current frame"""
+        self._begin_pass(self.framebuffer)
+        copy_render_target(self.background, self.framebuffer, self.size)
+        self._draw_layers(self.geometry.dynamic_layers(car, camera, lka))
+        self._end_pass()
+
+    def _begin_pass(self, framebuffer):
+        """Bind a minimap framebuffer with a pixel-space orthographic projection"""
+        self.previous_framebuffer = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_VIEWPORT_BIT | GL_LINE_BIT)
+        glViewport(0, 0, self.size, self.size)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadMatrixf(ortho_matrix(self.size).T)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+    def _end_pass(self):
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+        glBindFramebuffer(GL_FRAMEBUFFER, self.previous_framebuffer)
+
+    def _draw_layers(self, layers):
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        for layer in layers:
+            self._draw_layer(*layer)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _draw_layer(self, primitive, line_width, positions, colors):
+        if not len(positions):
+            return
+        if primitive == "fov":
+            # Semi-transparent cone: one constant alpha, no alpha channel in the colors
+            glEnable(GL_BLEND)
+            glBlendColor(0.0, 0.0, 0.0, FOV_ALPHA)
+            glBlendFunc(GL_CONSTANT_ALPHA, GL_ONE_MINUS_CONSTANT_ALPHA)
+        glLineWidth(line_width)
+        glVertexPointer(3, GL_FLOAT, 0, positions)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(LINE_MODES.get(primitive, GL_TRIANGLES), 0, len(positions))
+        if primitive == "fov":
+            glDisable(GL_BLEND)
+
+    def _textured_quad(self, texture, x, y, size, top, bottom):
+        """Axis-aligned square with texture rows `top` and `bottom` (0 or 1) at its upper and lower edges"""
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, top); glVertex2f(x, y)
+        glTexCoord2f(1, top); glVertex2f(x + size, y)
+        glTexCoord2f(1, bottom); glVertex2f(x + size, y + size)
+        glTexCoord2f(0, bottom); glVertex2f(x, y + size)
+        glEnd()
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+
+    def draw(self, x, y):
+        """Composite the minimap texture with its top-left corner at window pixel (x, y)"""
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.width, self.height, 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        self._textured_quad(self.texture, x, y, self.size, 0, 1)
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+
+
+class TrackRenderer:
+    """Draws a track, its markings, terrain, features and scenery in 3D"""
+    def __init__(self, track, scenery_density=1.0, sphere_lod=1.0):
+        self.track = track
+        self.scenery_density = scenery_density
+        self.sphere_lod = sphere_lod
+
+        # Dashed center line never changes: build its quads once
+        dashes = dash_quads(track.get_centerline_dashes(), DASH_WIDTH, 0.1)
+        self.dash_vertices = np.ascontiguousarray(dashes, dtype=np.float32)
+
+    def set_quality(self, scenery_density, sphere_lod):
+        """Scenery density in [0, 1] and sphere tessellation factor"""
+        self.scenery_density = scenery_density
+        self.sphere_lod = sphere_lod
+
+    def _sphere(self, radius, slices, stacks):
+        """gluSphere with tessellation scaled by sphere_lod"""
+        quadric = gluNewQuadric()
+        gluSphere(quadric, radius, lod_tessellation(slices, self.sphere_lod), lod_tessellation(stacks, self.sphere_lod))
+        gluDeleteQuadric(quadric)
+
+    def draw(self):
+        """Draw track in 3D"""
+        # Draw road surface
+        self._draw_road_surface()
+
+        # Draw lane markings
+        self._draw_lane_markings()
+
+        # Draw surrounding terrain
+        self._draw_terrain()
+
+        # Draw visual features (checkpoints, arrows, sectors)
+        self._draw_track_features()
+
+        # Draw scenery elements (trees, signs, buildings)
+        self._draw_scenery()
+
+    def _draw_road_surface(self):
+        """Draw flat road surface with subtle texture pattern"""
+        # Draw road as triangulated strips with alternating shades for depth
+        outer_points = self.track._offset_line(self.track.centerline, self.track.track_width / 2)
+        inner_points = self.track._offset_line(self.track.centerline, -self.track.track_width / 2)
+
+        glBegin(GL_TRIANGLE_STRIP)
+        for i in range(len(outer_points)):
+            # Alternate between two subtle shades of gray for texture
+            if i % 3 == 0:
+                glColor3f(0.28, 0.28, 0.28)  # Slightly darker
+            elif i % 3 == 1:
+                glColor3f(0.30, 0.30, 0.30)  # Base gray
+            else:
+                glColor3f(0.32, 0.32, 0.32)  # Slightly lighter
+
+            ox, oy = outer_points[i]
+            ix, iy = inner_points[i]
+            glVertex3f(ox, oy, 0)
+            glVertex3f(ix, iy, 0)
+        # Close the loop
+        ox, oy = outer_points[0]
+        ix, iy = inner_points[0]
+        glVertex3f(ox, oy, 0)
+        glVertex3f(ix, iy, 0)
+        glEnd()
+
+    def _draw_lane_markings(self):
+        """Draw lane markings on road"""
+        glLineWidth(3)
+
+        # Outer boundaries (solid white)
+        glColor3f(1.0, 1.0, 1.0)
+        outer_points = self.track._offset_line(self.track.centerline, self.track.track_width / 2)
+        inner_points = self.track._offset_line(self.track.centerline, -self.track.track_width / 2)
+
+        glBegin(GL_LINE_STRIP)
+        for x, y in outer_points:
+            glVertex3f(x, y, 0.1)
+        glVertex3f(outer_points[0][0], outer_points[0][1], 0.1)
+        glEnd()
+
+        glBegin(GL_LINE_STRIP)
+        for x, y in inner_points:
+            glVertex3f(x, y, 0.1)
+        glVertex3f(inner_points[0][0], inner_points[0][1], 0.1)
+        glEnd()
+
+        # Center line (dashed yellow), precomputed quads in one call
+        glColor3f(1.0, 1.0, 0.0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, self.dash_vertices)
+        glDrawArrays(GL_QUADS, 0, len(self.dash_vertices))
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _draw_terrain(self):
+        """Draw elevated terrain around track with textured pattern"""
+        # Create terrain boundary (offset further from track)
+        terrain_offset = 200
+        outer_terrain = self.track._offset_line(self.track.centerline, self.track.track_width / 2 + terrain_offset)
+        inner_terrain = self.track._offset_line(self.track.centerline, -self.track.track_width / 2 - terrain_offset)
+        outer_track = self.track._offset_line(self.track.centerline, self.track.track_width / 2)
+        inner_track = self.track._offset_line(self.track.centerline, -self.track.track_width / 2)
+
+        terrain_height = 30
+
+        # Draw outer terrain wall with alternating stripe pattern
+        glBegin(GL_TRIANGLE_STRIP)
+        for i in range(len(outer_terrain)):
+            # Alternate between two shades of green for stripe pattern
+            if i % 2 == 0:
+                glColor3f(0.2, 0.5, 0.2)  # Darker green
+            else:
+                glColor3f(0.25, 0.55, 0.25)  # Lighter green
+
+            tx, ty = outer_terrain[i]
+            rx, ry = outer_track[i]
+            glVertex3f(rx, ry, 0)
+            glVertex3f(tx, ty, terrain_height)
+        # Close loop
+        tx, ty = outer_terrain[0]
+        rx, ry = outer_track[0]
+        glVertex3f(rx, ry, 0)
+        glVertex3f(tx, ty, terrain_height)
+        glEnd()
+
+        # Draw inner terrain wall with alternating stripe pattern
+        glBegin(GL_TRIANGLE_STRIP)
+        for i in range(len(inner_terrain)):
+            # Alternate between two shades of green for stripe pattern
+            if i % 2 == 0:
+                glColor3f(0.2, 0.5, 0.2)  # Darker green
+            else:
+                glColor3f(0.25, 0.55, 0.25)  # Lighter green
+
+            tx, ty = inner_terrain[i]
+            rx, ry = inner_track[i]
+            glVertex3f(rx, ry, 0)
+            glVertex3f(tx, ty, terrain_height)
+        # Close loop
+        tx, ty = inner_terrain[0]
+        rx, ry = inner_track[0]
+        glVertex3f(rx, ry, 0)
+        glVertex3f(tx, ty, terrain_height)
+        glEnd()
+
+        # Draw terrain top surface with grid pattern
+        glBegin(GL_TRIANGLE_STRIP)
+        for i in range(len(outer_terrain)):
+            # Create checkerboard pattern on top surface
+            if (i // 2) % 2 == 0:
+                glColor3f(0.15, 0.4, 0.15)  # Darker grass
+            else:
+                glColor3f(0.18, 0.45, 0.18)  # Lighter grass
+
+            tx, ty = outer_terrain[i]
+            glVertex3f(tx, ty, terrain_height)
+            glVertex3f(tx, ty, terrain_height + 10)
+        tx, ty = outer_terrain[0]
+        glVertex3f(tx, ty, terrain_height)
+        glVertex3f(tx, ty, terrain_height + 10)
+        glEnd()
+
+    def _draw_track_features(self):
+        """Draw visual features like checkpoints, sectors, and direction arrows"""
+        glDisable(GL_LIGHTING)
+
+        # Define checkpoint/sector positions (every N points along the track)
+        checkpoint_interval = 6  # Every 6 points
+        arrow_interval = 3  # More frequent arrows for direction indication
+
+        for i in range(0, len(self.track.centerline), checkpoint_interval):
+            px, py = self.track.centerline[i]
+            next_idx = (i + 1) % len(self.track.centerline)
+            next_px, next_py = self.track.centerline[next_idx]
+
+            # Calculate track direction
+            dx = next_px - px
+            dy = next_py - py
+            track_angle = np.arctan2(dy, dx)
+            perp_angle = track_angle + np.pi / 2
+
+            # Draw checkpoint markers (tall colored poles at track sides)
+            marker_height = 25
+            marker_offset = self.track.track_width / 2 + 5
+
+            # Left marker (cyan)
+            left_x = px + marker_offset * np.cos(perp_angle)
+            left_y = py + marker_offset * np.sin(perp_angle)
+            self._draw_checkpoint_marker(left_x, left_y, marker_height, (0.0, 0.8, 1.0))
+
+            # Right marker (cyan)
+            right_x = px - marker_offset * np.cos(perp_angle)
+            right_y = py - marker_offset * np.sin(perp_angle)
+            self._draw_checkpoint_marker(right_x, right_y, marker_height, (0.0, 0.8, 1.0))
+
+            # Draw sector number in the air
+            sector_num = i // checkpoint_interval + 1
+            mid_x = px
+            mid_y = py
+            self._draw_sector_number(mid_x, mid_y, 20, sector_num)
+
+        # Draw direction arrows on track surface
+        for i in range(0, len(self.track.centerline), arrow_interval):
+            px, py = self.track.centerline[i]
+            next_idx = (i + 1) % len(self.track.centerline)
+            next_px, next_py = self.track.centerline[next_idx]
+
+            # Calculate track direction
+            dx = next_px - px
+            dy = next_py - py
+            length = np.sqrt(dx**2 + dy**2)
+            if length > 0:
+                dx /= length
+                dy /= length
+
+                # Draw arrow
+                self._draw_direction_arrow(px, py, dx, dy)
+
+        # Draw start/finish line markers (special color)
+        px, py = self.track.centerline[0]
+        next_px, next_py = self.track.centerline[1]
+        dx = next_px - px
+        dy = next_py - py
+        track_angle = np.arctan2(dy, dx)
+        perp_angle = track_angle + np.pi / 2
+
+        marker_offset = self.track.track_width / 2 + 5
+        marker_height = 35  # Taller for start/finish
+
+        # Start/finish markers (red and white pattern)
+        left_x = px + marker_offset * np.cos(perp_angle)
+        left_y = py + marker_offset * np.sin(perp_angle)
+        self._draw_checkpoint_marker(left_x, left_y, marker_height, (1.0, 0.0, 0.0))
+
+        right_x = px - marker_offset * np.cos(perp_angle)
+        right_y = py - marker_offset * np.sin(perp_angle)
+        self._draw_checkpoint_marker(right_x, right_y, marker_height, (1.0, 1.0, 1.0))
+
+        glEnable(GL_LIGHTING)
+
+    def _draw_checkpoint_marker(self, x, y, height, color):
+        """Draw a checkpoint marker pole"""
+        glColor3f(*color)
+
+        # Draw vertical pole
+        glLineWidth(4)
+        glBegin(GL_LINES)
+        glVertex3f(x, y, 0)
+        glVertex3f(x, y, height)
+        glEnd()
+
+        # Draw sphere at top
+        glPushMatrix()
+        glTranslatef(x, y, height)
+        self._sphere(3, 8, 8)
+        glPopMatrix()
+
+    def _draw_sector_number(self, x, y, height, number):
+        """Draw floating sector number (simplified as a marker)"""
+        # Draw as colored floating sphere
+        color = ((number * 0.3) % 1.0, (number * 0.5) % 1.0, (number * 0.7) % 1.0)
+        glColor3f(*color)
+
+        glPushMatrix()
+        glTranslatef(x, y, height)
+        self._sphere(5, 8, 8)
+        glPopMatrix()
+
+    def _draw_direction_arrow(self, x, y, dx, dy):
+        """Draw a direction arrow on the track surface"""
+        glColor3f(1.0, 1.0, 0.0)  # Yellow arrows
+        glLineWidth(3)
+
+        arrow_length = 15
+        arrow_width = 8
+
+        # Arrow shaft
+        end_x = x + dx * arrow_length
+        end_y = y + dy * arrow_length
+
+        glBegin(GL_LINES)
+        glVertex3f(x, y, 0.2)
+        glVertex3f(end_x, end_y, 0.2)
+        glEnd()
+
+        # Arrowhead (two lines forming V)
+        head_angle = np.arctan2(dy, dx)
+        left_angle = head_angle + 2.5
+        right_angle = head_angle - 2.5
+
+        left_x = end_x - arrow_width * np.cos(left_angle)
+        left_y = end_y - arrow_width * np.sin(left_angle)
+        right_x = end_x - arrow_width * np.cos(right_angle)
+        right_y = end_y - arrow_width * np.sin(right_angle)
+
+        glBegin(GL_LINES)
+        glVertex3f(end_x, end_y, 0.2)
+        glVertex3f(left_x, left_y, 0.2)
+        glVertex3f(end_x, end_y, 0.2)
+        glVertex3f(right_x, right_y, 0.2)
+        glEnd()
+
+    def _draw_scenery(self):
+        """Draw trees, signs, and buildings for spatial awareness (OPTIMIZED)"""
+        glDisable(GL_LIGHTING)
+
+        # Trees every 8 points, 3 signs and 2 buildings at full density
+        tree_interval, sign_positions, building_positions = scenery_layout(self.scenery_density)
+
+        # Draw trees on outer edge of track
+        for i in range(0, len(self.track.centerline), tree_interval or len(self.track.centerline) + 1):
+            px, py = self.track.centerline[i]
+            next_idx = (i + 1) % len(self.track.centerline)
+            next_px, next_py = self.track.centerline[next_idx]
+
+            # Calculate track direction
+            dx = next_px - px
+            dy = next_py - py
+            track_angle = np.arctan2(dy, dx)
+            perp_angle = track_angle + np.pi / 2
+
+            # Alternate trees on left and right
+            side_offset = self.track.track_width / 2 + 30
+            if i % 2 == 0:
+                # Tree on left
+                tree_x = px + side_offset * np.cos(perp_angle)
+                tree_y = py + side_offset * np.sin(perp_angle)
+                self._draw_tree(tree_x, tree_y)
+            else:
+                # Tree on right
+                tree_x = px - side_offset * np.cos(perp_angle)
+                tree_y = py - side_offset * np.sin(perp_angle)
+                self._draw_tree(tree_x, tree_y)
+
+        # Draw distance signs at key corners
+        for sign_idx in sign_positions:
+            if sign_idx < len(self.track.centerline):
+                px, py = self.track.centerline[sign_idx]
+                next_idx = (sign_idx + 1) % len(self.track.centerline)
+                next_px, next_py = self.track.centerline[next_idx]
+
+                dx = next_px - px
+                dy = next_py - py
+                track_angle = np.arctan2(dy, dx)
+                perp_angle = track_angle + np.pi / 2
+
+                # Sign on right side
+                sign_offset = self.track.track_width / 2 + 15
+                sign_x = px - sign_offset * np.cos(perp_angle)
+                sign_y = py - sign_offset * np.sin(perp_angle)
+                self._draw_distance_sign(sign_x, sign_y, sign_idx * 100)  # Distance markers
+
+        # Draw buildings at specific corners for landmarks
+        for building_idx in building_positions:
+            if building_idx < len(self.track.centerline):
+                px, py = self.track.centerline[building_idx]
+                next_idx = (building_idx + 1) % len(self.track.centerline)
+                next_px, next_py = self.track.centerline[next_idx]
+
+                dx = next_px - px
+                dy = next_py - py
+                track_angle = np.arctan2(dy, dx)
+                perp_angle = track_angle + np.pi / 2
+
+                # Building on outer edge
+                building_offset = self.track.track_width / 2 + 60
+                building_x = px + building_offset * np.cos(perp_angle)
+                building_y = py + building_offset * np.sin(perp_angle)
+                self._draw_building(building_x, building_y, building_idx)
+
+        glEnable(GL_LIGHTING)
+
+    def _draw_tree(self, x, y):
+        """Draw a simple tree (trunk + foliage) - OPTIMIZED"""
+        glPushMatrix()
+        glTranslatef(x, y, 0)
+
+        # Draw trunk (simplified - single line instead of loop)
+        glColor3f(0.4, 0.2, 0.1)
+        trunk_height = 15
+        glBegin(GL_LINES)
+        glVertex3f(0, 0, 0)
+        glVertex3f(0, 0, trunk_height)
+        glEnd()
+
+        # Tree foliage (green sphere) - reduced detail
+        glColor3f(0.1, 0.5, 0.1)
+        glTranslatef(0, 0, trunk_height)
+        self._sphere(8, 4, 4)  # Reduced from 6,6 to 4,4
+
+        glPopMatrix()
+
+    def _draw_distance_sign(self, x, y, distance):
+        """Draw a distance/corner marker sign"""
+        glColor3f(1.0, 0.5, 0.0)  # Orange sign
+
+        # Sign post
+        glLineWidth(3)
+        glBegin(GL_LINES)
+        glVertex3f(x, y, 0)
+        glVertex3f(x, y, 15)
+        glEnd()
+
+        # Sign board (rectangle)
+        glPushMatrix()
+        glTranslatef(x, y, 12)
+
+        # Draw sign as colored box
+        sign_width = 6
+        sign_height = 4
+        glBegin(GL_QUADS)
+        # Front face
+        glVertex3f(-sign_width/2, 0, -sign_height/2)
+        glVertex3f(sign_width/2, 0, -sign_height/2)
+        glVertex3f(sign_width/2, 0, sign_height/2)
+        glVertex3f(-sign_width/2, 0, sign_height/2)
+        glEnd()
+
+        # Draw distance marker sphere on top
+        glTranslatef(0, 0, sign_height/2 + 2)
+        color_intensity = (distance % 500) / 500.0
+        glColor3f(1.0, color_intensity, 0.0)
+        self._sphere(2, 6, 6)
+
+        glPopMatrix()
+
+    def _draw_building(self, x, y, building_type):
+        """Draw a building/grandstand as a landmark"""
+        # Different colored buildings for variety
+        colors = [
+            (0.7, 0.7, 0.8),  # Light gray
+            (0.8, 0.6, 0.4),  # Brown
+            (0.6, 0.6, 0.7),  # Blue-gray
+            (0.7, 0.5, 0.5),  # Red-gray
+        ]
+        color = colors[building_type % len(colors)]
+        glColor3f(*color)
+
+        building_width = 20
+        building_depth = 15
+        building_height = 25 + (building_type * 5)  # Varying heights
+
+        glPushMatrix()
+        glTranslatef(x, y, building_height/2)
+
+        # Draw building as box
+        w, d, h = building_width/2, building_depth/2, building_height/2
+        glBegin(GL_QUADS)
+
+        # Front face
+        glVertex3f(-w, d, -h)
+        glVertex3f(w, d, -h)
+        glVertex3f(w, d, h)
+        glVertex3f(-w, d, h)
+
+        # Back face
+        glVertex3f(-w, -d, -h)
+        glVertex3f(-w, -d, h)
+        glVertex3f(w, -d, h)
+        glVertex3f(w, -d, -h)
+
+        # Top face
+        glColor3f(color[0] * 0.7, color[1] * 0.7, color[2] * 0.7)
+        glVertex3f(-w, -d, h)
+        glVertex3f(w, -d, h)
+        glVertex3f(w, d, h)
+        glVertex3f(-w, d, h)
+
+        # Left face
+        glColor3f(*color)
+        glVertex3f(-w, -d, -h)
+        glVertex3f(-w, d, -h)
+        glVertex3f(-w, d, h)
+        glVertex3f(-w, -d, h)
+
+        # Right face
+        glVertex3f(w, -d, -h)
+        glVertex3f(w, -d, h)
+        glVertex3f(w, d, h)
+        glVertex3f(w, d, -h)
+
+        glEnd()
+
+        # Add windows (small bright squares)
+        glColor3f(1.0, 1.0, 0.8)
+        window_rows = 3
+        window_cols = 4
+        for row in range(window_rows):
+            for col in range(window_cols):
+                wx = -w + (col + 0.5) * building_width / window_cols - building_width/2
+                wz = -h + (row + 0.5) * building_height / window_rows
+
+                glBegin(GL_QUADS)
+                glVertex3f(wx, d + 0.1, wz)
+                glVertex3f(wx + 2, d + 0.1, wz)
+                glVertex3f(wx + 2, d + 0.1, wz + 2)
+                glVertex3f(wx, d + 0.1, wz + 2)
+                glEnd()
+
+        glPopMatrix()
+
+
+class CarRenderer:
+    """Draws a car body and wheels in 3D"""
+    def draw(self, car):
+        """Draw car in 3D"""
+        glPushMatrix()
+
+        # Transform to car position and orientation
+        glTranslatef(car.x, car.y, car.height/2)
+        glRotatef(np.degrees(car.theta), 0, 0, 1)
+
+        # Draw car body (simple box)
+        glColor3f(0.2, 0.5, 0.8)  # Blue car
+        self._draw_box(car.length, car.width, car.height)
+
+        # Draw hood (front part, slightly higher)
+        glPushMatrix()
+        glTranslatef(car.length/4, 0, car.height/3)
+        glColor3f(0.3, 0.6, 0.9)
+        self._draw_box(car.length/2, car.width*0.8, car.height/3)
+        glPopMatrix()
+
+        # Draw wheels
+        self._draw_wheels(car)
+
+        glPopMatrix()
+
+    def _draw_box(self, length, width, height):
+        """Draw a simple box centered at origin"""
+        l, w, h = length/2, width/2, height/2
+
+        glBegin(GL_QUADS)
+
+        # Front face
+        glVertex3f(l, -w, -h)
+        glVertex3f(l, w, -h)
+        glVertex3f(l, w, h)
+        glVertex3f(l, -w, h)
+
+        # Back face
+        glVertex3f(-l, -w, -h)
+        glVertex3f(-l, -w, h)
+        glVertex3f(-l, w, h)
+        glVertex3f(-l, w, -h)
+
+        # Top face
+        glVertex3f(-l, -w, h)
+        glVertex3f(l, -w, h)
+        glVertex3f(l, w, h)
+        glVertex3f(-l, w, h)
+
+        # Bottom face
+        glVertex3f(-l, -w, -h)
+        glVertex3f(-l, w, -h)
+        glVertex3f(l, w, -h)
+        glVertex3f(l, -w, -h)
+
+        # Right face
+        glVertex3f(-l, w, -h)
+        glVertex3f(-l, w, h)
+        glVertex3f(l, w, h)
+        glVertex3f(l, w, -h)
+
+        # Left face
+        glVertex3f(-l, -w, -h)
+        glVertex3f(l, -w, -h)
+        glVertex3f(l, -w, h)
+        glVertex3f(-l, -w, h)
+
+        glEnd()
+
+    def _draw_wheels(self, car):
+        """Draw car wheels"""
+        wheel_radius = 4
+        wheel_width = 3
+
+        glColor3f(0.1, 0.1, 0.1)  # Dark wheels
+
+        # Wheel positions relative to car center
+        wheel_positions = [
+            (car.length/2 - 5, car.width/2, 0),      # Front left
+            (car.length/2 - 5, -car.width/2, 0),     # Front right
+            (-car.length/2 + 5, car.width/2, 0),     # Rear left
+            (-car.length/2 + 5, -car.width/2, 0),    # Rear right
+        ]
+
+        for i, (wx, wy, wz) in enumerate(wheel_positions):
+            glPushMatrix()
+            glTranslatef(wx, wy, wz)
+
+            # Front wheels have steering angle
+            if i < 2:
+                glRotatef(np.degrees(car.steering_angle), 0, 0, 1)
+
+            # Draw wheel as cylinder
+            glRotatef(90, 0, 1, 0)
+            self._draw_cylinder(wheel_radius, wheel_width, 8)
+
+            glPopMatrix()
+
+    def _draw_cylinder(self, radius, height, slices):
+        """Draw a simple cylinder"""
+        glBegin(GL_QUAD_STRIP)
+        for i in range(slices + 1):
+            angle = 2 * np.pi * i / slices
+            x = radius * np.cos(angle)
+            y = radius * np.sin(angle)
+            glVertex3f(x, y, -height/2)
+            glVertex3f(x, y, height/2)
+        glEnd()
@@ -0,0 +1,599 @@
+"""3D scene rendering on GLSL 3.3 core: VAOs, a camera uniform buffer and per-material batches
+
+Static track geometry is baked once into world-space vertex buffers (see
+render.meshes); a frame is a handful of draw calls instead of thousands of
+immediate-mode calls. Runs on a 3.3 core profile context (and on any
+compatibility context that supports GLSL 3.30).
+"""
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from .meshes import LIT, UNLIT, build_car_mesh, build_track_scene, lod_tessellation, sphere_triangles
+from .minimap import BACKGROUND, FOV_ALPHA, LINE_MODES, copy_render_target, create_render_target, label_texture, ortho_matrix
+from .scaling import SceneTarget, clamp_render_scale, scaled_size
+
+# Attribute locations shared by all programs
+POSITION = 0
+COLOR = 1
+INSTANCE = 2  # Instanced spheres: xyz center, w radius
+INSTANCE_COLOR = 3
+
+CAMERA_BINDING = 0
+
+CAMERA_BLOCK = """
+layout(std140) uniform Camera {
+    mat4 view_projection;
+    vec4 viewport;  // width, height in pixels
+    vec4 lighting;  // x: shade factor for lit surfaces
+};
+"""
+
+# Fixed-function lighting reproduced per frame: global ambient 0.2, light ambient
+# 0.5 and diffuse 0.8 from a directional light fixed in eye space along +Z. The
+# old scene never set normals, so every lit vertex used the world +Z normal.
+SCENE_AMBIENT = 0.2 + 0.5
+LIGHT_DIFFUSE = 0.8
+LIGHT_DIRECTION_EYE = np.array([0.0, 0.0, 1.0])
+
+LIT_VERTEX = """#version 330 core
+""" + CAMERA_BLOCK + """
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec3 color;
+uniform int lit;
+out vec3 v_color;
+void main() {
+    gl_Position = view_projection * vec4(position, 1.0);
+    v_color = lit != 0 ? min(color * lighting.x, vec3(1.0)) : color;
+}
+"""
+
+INSTANCED_VERTEX = """#version 330 core
+""" + CAMERA_BLOCK + """
+layout(location = 0) in vec3 position;
+layout(location = 2) in vec4 instance;
+layout(location = 3) in vec3 instance_color;
+out vec3 v_color;
+void main() {
+    gl_Position = view_projection * vec4(position * instance.w + instance.xyz, 1.0);
+    v_color = instance_color;
+}
+"""
+
+COLOR_FRAGMENT = """#version 330 core
+in vec3 v_color;
+out vec4 frag_color;
+void main() {
+    frag_color = vec4(v_color, 1.0);
+}
+"""
+
+# Core profiles only guarantee 1-pixel lines, so wide lines are expanded into
+# screen-space quads, after clipping each segment against the near plane.
+LINE_GEOMETRY = """#version 330 core
+""" + CAMERA_BLOCK + """
+layout(lines) in;
+layout(triangle_strip, max_vertices = 4) out;
+uniform float line_width;
+in vec3 v_color[];
+out vec3 g_color;
+void main() {
+    vec4 p0 = gl_in[0].gl_Position;
+    vec4 p1 = gl_in[1].gl_Position;
+    float d0 = p0.z + p0.w;
+    float d1 = p1.z + p1.w;
+    if (d0 < 0.0 && d1 < 0.0) return;
+    if (d0 < 0.0) p0 = mix(p0, p1, d0 / (d0 - d1));
+    if (d1 < 0.0) p1 = mix(p1, p0, d1 / (d1 - d0));
+
+    vec2 s0 = p0.xy / p0.w * viewport.xy * 0.5;
+    vec2 s1 = p1.xy / p1.w * viewport.xy * 0.5;
+    vec2 dir = s1 - s0;
+    if (dot(dir, dir) < 1e-12) dir = vec2(1.0, 0.0);
+    vec2 offset = normalize(vec2(-dir.y, dir.x)) * line_width / viewport.xy;
+
+    g_color = v_color[0];
+    gl_Position = vec4(p0.xy + offset * p0.w, p0.zw); EmitVertex();
+    gl_Position = vec4(p0.xy - offset * p0.w, p0.zw); EmitVertex();
+    g_color = v_color[1];
+    gl_Position = vec4(p1.xy + offset * p1.w, p1.zw); EmitVertex();
+    gl_Position = vec4(p1.xy - offset * p1.w, p1.zw); EmitVertex();
+    EndPrimitive();
+}
+"""
+
+LINE_FRAGMENT = """#version 330 core
+in vec3 g_color;
+out vec4 frag_color;
+void main() {
+    frag_color = vec4(g_color, 1.0);
+}
+"""
+
+OVERLAY_VERTEX = """#version 330 core
+out vec2 uv;
+void main() {
+    // Fullscreen triangle pair from gl_VertexID; texture row 0 is the top of the screen
+    vec2 corner = vec2(gl_VertexID & 1, (gl_VertexID >> 1) & 1);
+    uv = vec2(corner.x, 1.0 - corner.y);
+    gl_Position = vec4(corner * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+SCENE_VERTEX = """#version 330 core
+out vec2 uv;
+void main() {
+    // Fullscreen triangle pair for the offscreen 3D pass, rendered with row 0 at the bottom
+    vec2 corner = vec2(gl_VertexID & 1, (gl_VertexID >> 1) & 1);
+    uv = corner;
+    gl_Position = vec4(corner * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+OVERLAY_FRAGMENT = """#version 330 core
+in vec2 uv;
+uniform sampler2D overlay;
+out vec4 frag_color;
+void main() {
+    frag_color = texture(overlay, uv);
+}
+"""
+
+
+def perspective(fovy, aspect, near, far):
+    """Projection matrix equivalent to gluPerspective"""
+    f = 1.0 / np.tan(np.radians(fovy) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def look_at(eye, target, up):
+    """View matrix equivalent to gluLookAt"""
+    eye = np.asarray(eye, dtype=float)
+    forward = np.asarray(target, dtype=float) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    true_up = np.cross(side, forward)
+    view = np.identity(4)
+    view[0, :3] = side
+    view[1, :3] = true_up
+    view[2, :3] = -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+def compile_program(*stages):
+    """Compile and link (shader_type, source) pairs, raising RuntimeError with the GL log"""
+    program = glCreateProgram()
+    shaders = []
+    for shader_type, source in stages:
+        shader = glCreateShader(shader_type)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError(f"Shader compile failed: {glGetShaderInfoLog(shader).decode()}")
+        glAttachShader(program, shader)
+        shaders.append(shader)
+    glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        raise RuntimeError(f"Program link failed: {glGetProgramInfoLog(program).decode()}")
+    for shader in shaders:
+        glDeleteShader(shader)
+
+    block = glGetUniformBlockIndex(program, "Camera")
+    if block != GL_INVALID_INDEX:
+        glUniformBlockBinding(program, block, CAMERA_BINDING)
+    return program
+
+
+class MeshBatch:
+    """One VAO with interleaved position/color vertices, drawn in a single call"""
+    def __init__(self, positions=None, colors=None, usage=GL_STATIC_DRAW):
+        self.usage = usage
+        self.count = 0
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        stride = 6 * 4
+        glEnableVertexAttribArray(POSITION)
+        glVertexAttribPointer(POSITION, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(COLOR)
+        glVertexAttribPointer(COLOR, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
+        glBindVertexArray(0)
+        if positions is not None:
+            self.upload(positions, colors)
+
+    def upload(self, positions, colors):
+        """Replace the vertex data"""
+        data = np.ascontiguousarray(np.hstack([positions, colors]), dtype=np.float32)
+        self.count = len(data)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data if len(data) else None, self.usage)
+
+    def draw(self, mode):
+        if self.count:
+            glBindVertexArray(self.vao)
+            glDrawArrays(mode, 0, self.count)
+
+    def delete(self):
+        """Free the GL buffer and vertex array"""
+        glDeleteBuffers(1, [self.vbo])
+        glDeleteVertexArrays(1, [self.vao])
+
+
+class SphereInstances:
+    """Unit sphere mesh drawn once per instance (center, radius, color) with glDrawArraysInstanced"""
+    def __init__(self, slices, stacks):
+        mesh = np.ascontiguousarray(sphere_triangles(1.0, slices, stacks), dtype=np.float32)
+        self.vertex_count = len(mesh)
+        self.instance_count = 0
+        self.vao = glGenVertexArrays(1)
+        self.mesh_vbo, self.instance_vbo = glGenBuffers(2)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+        glBufferData(GL_ARRAY_BUFFER, mesh.nbytes, mesh, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(POSITION)
+        glVertexAttribPointer(POSITION, 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        stride = 7 * 4
+        glEnableVertexAttribArray(INSTANCE)
+        glVertexAttribPointer(INSTANCE, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glVertexAttribDivisor(INSTANCE, 1)
+        glEnableVertexAttribArray(INSTANCE_COLOR)
+        glVertexAttribPointer(INSTANCE_COLOR, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(16))
+        glVertexAttribDivisor(INSTANCE_COLOR, 1)
+        glBindVertexArray(0)
+
+    def upload(self, instances):
+        """Replace instances with an (M, 7) array of x, y, z, radius, r, g, b"""
+        data = np.ascontiguousarray(instances, dtype=np.float32).reshape(-1, 7)
+        self.instance_count = len(data)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data if len(data) else None, GL_STREAM_DRAW)
+
+    def draw(self):
+        if self.instance_count:
+            glBindVertexArray(self.vao)
+            glDrawArraysInstanced(GL_TRIANGLES, 0, self.vertex_count, self.instance_count)
+
+
+class ShaderRenderer3D:
+    """3D renderer on GLSL 3.3 core with the same interface as Renderer3D"""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.sphere_lod = 1.0  # Tessellation factor for marker spheres
+        self.render_scale = 1.0  # 3D pass resolution as a fraction of the window (see set_render_scale)
+        self.scene_target = SceneTarget()
+        self.window_framebuffer = 0
+        self.setup_opengl()
+
+    def setup_opengl(self):
+        """Compile programs and create the camera uniform buffer"""
+        self.color_program = compile_program((GL_VERTEX_SHADER, LIT_VERTEX), (GL_FRAGMENT_SHADER, COLOR_FRAGMENT))
+        self.line_program = compile_program((GL_VERTEX_SHADER, LIT_VERTEX), (GL_GEOMETRY_SHADER, LINE_GEOMETRY),
+                                            (GL_FRAGMENT_SHADER, LINE_FRAGMENT))
+        self.instanced_program = compile_program((GL_VERTEX_SHADER, INSTANCED_VERTEX),
+                                                 (GL_FRAGMENT_SHADER, COLOR_FRAGMENT))
+        self.overlay_program = compile_program((GL_VERTEX_SHADER, OVERLAY_VERTEX),
+                                               (GL_FRAGMENT_SHADER, OVERLAY_FRAGMENT))
+
+        self.scene_program = compile_program((GL_VERTEX_SHADER, SCENE_VERTEX),
+                                             (GL_FRAGMENT_SHADER, OVERLAY_FRAGMENT))
+
+        for program in (self.overlay_program, self.scene_program):
+            glUseProgram(program)
+            glUniform1i(glGetUniformLocation(program, "overlay"), 0)
+        glUseProgram(0)
+        self.uniforms = {
+            program: (glGetUniformLocation(program, "lit"), glGetUniformLocation(program, "line_width"))
+            for program in (self.color_program, self.line_program)
+        }
+
+        self.camera_ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.camera_ubo)
+        glBufferData(GL_UNIFORM_BUFFER, 96, None, GL_DYNAMIC_DRAW)
+        glBindBufferBase(GL_UNIFORM_BUFFER, CAMERA_BINDING, self.camera_ubo)
+
+        self.projection = perspective(60, self.width / self.height, 1.0, 5000.0)
+        self.marker_lines = MeshBatch(usage=GL_STREAM_DRAW)
+        self.marker_spheres = {}  # (slices, stacks) -> SphereInstances, created on first use
+        self.overlay_texture = None
+        self.overlay_size = None
+        self.empty_vao = glGenVertexArrays(1)
+
+        glEnable(GL_DEPTH_TEST)
+        glClearColor(0.6, 0.8, 1.0, 1.0)  # Sky blue background
+
+    def set_render_scale(self, scale):
+        """Draw the 3D pass at scale (clamped to MIN_RENDER_SCALE..1) of the window resolution
+
+        Raises RuntimeError (and keeps the old scale) when the offscreen target cannot be created.
+        """
+        scale = clamp_render_scale(scale)
+        if scale < 1.0:
+            self.scene_target.resize(*scaled_size(self.width, self.height, scale))
+        self.render_scale = scale
+
+    def begin_scene(self):
+        """Bind the 3D pass's target (the window itself at scale 1) and clear it"""
+        if self.render_scale < 1.0:
+            self.window_framebuffer = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+            glBindFramebuffer(GL_FRAMEBUFFER, self.scene_target.framebuffer)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+    def end_scene(self):
+        """Stretch an offscreen 3D pass over the window with one textured quad"""
+        if self.render_scale >= 1.0:
+            return
+        glBindFramebuffer(GL_FRAMEBUFFER, self.window_framebuffer)
+        glViewport(0, 0, self.width, self.height)
+        glDisable(GL_DEPTH_TEST)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.scene_target.texture)
+        glUseProgram(self.scene_program)
+        glBindVertexArray(self.empty_vao)
+        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        glBindVertexArray(0)
+        glUseProgram(0)
+        glEnable(GL_DEPTH_TEST)
+
+    def setup_3d_view(self, car):
+        """Upload the hood camera matrices to the camera uniform buffer
+
+        The viewport size in the buffer stays the window's, so line widths
+        (converted to clip space with it) keep their on-screen width at any render scale.
+        """
+        glViewport(0, 0, *scaled_size(self.width, self.height, self.render_scale))
+        cam_pos, look_pos = car.get_hood_camera_position()
+        view = look_at(cam_pos, look_pos, (0, 0, 1))
+        view_projection = self.projection @ view
+
+        # World +Z normal in eye space against the eye-space light
+        normal = view[:3, 2]
+        shade = SCENE_AMBIENT + LIGHT_DIFFUSE * max(normal @ LIGHT_DIRECTION_EYE, 0.0)
+
+        data = np.zeros(24, dtype=np.float32)
+        data[:16] = view_projection.T.ravel()  # std140 mat4 is column-major
+        data[16:18] = (self.width, self.height)
+        data[20] = shade
+        glBindBuffer(GL_UNIFORM_BUFFER, self.camera_ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, data.nbytes, data)
+
+    def draw_batches(self, batches):
+        """Draw {(material, primitive, line_width): MeshBatch} grouped by program"""
+        for (material, primitive, line_width), batch in batches.items():
+            program = self.line_program if primitive in LINE_MODES else self.color_program
+            lit_location, width_location = self.uniforms[program]
+            glUseProgram(program)
+            glUniform1i(lit_location, int(material == LIT))
+            if primitive in LINE_MODES:
+                glUniform1f(width_location, line_width)
+                batch.draw(LINE_MODES[primitive])
+            else:
+                batch.draw(GL_TRIANGLES)
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def upload_batches(self, builder, usage=GL_STATIC_DRAW):
+        """Turn a MeshBuilder into {key: MeshBatch}"""
+        return {key: MeshBatch(positions, colors, usage) for key, (positions, colors) in builder.build().items()}
+
+    def draw_lane_markers_3d(self, camera):
+        """Draw 3D markers for the lane points detected this tick"""
+        left_lane, right_lane, center_lane = camera.detections
+        groups = [(left_lane, 5.0, 8.0, (1.0, 0.0, 0.0)),  # Left (red)
+                  (right_lane, 5.0, 8.0, (0.0, 0.8, 1.0)),  # Right (cyan)
+                  (center_lane, 3.0, 6.0, (1.0, 1.0, 0.0))]  # Center (yellow)
+
+        stems = []
+        instances = []
+        for lane, radius, height, color in groups:
+            if len(lane):
+                points = np.column_stack([lane["x"], lane["y"]])
+                base = np.column_stack([points, np.zeros(len(points))])
+                top = base + (0, 0, height)
+                stems.append((np.stack([base, top], axis=1).reshape(-1, 3), color))
+                instances.append(np.column_stack([top, np.full(len(points), radius),
+                                                  np.tile(color, (len(points), 1))]))
+        self._draw_markers(stems, instances, (8, 8))
+
+    def draw_lookahead_point_3d(self, lka):
+        """Draw LKA lookahead point in 3D"""
+        if lka.active and lka.lookahead_point is not None:
+            lx, ly = lka.lookahead_point
+            stem = np.array([(lx, ly, 0), (lx, ly, 30)])
+            self._draw_markers([(stem, (1.0, 1.0, 0.0))], [[(lx, ly, 30, 8, 1.0, 1.0, 0.0)]], (12, 12))
+
+    def _draw_markers(self, stems, instances, tessellation):
+        """Draw vertical stems (3 px lines) topped by instanced spheres"""
+        if not instances:
+            return
+        positions = np.concatenate([points for points, _ in stems])
+        colors = np.concatenate([np.tile(color, (len(points), 1)) for points, color in stems])
+        self.marker_lines.upload(positions, colors)
+        self.draw_batches({(UNLIT, "lines", 3.0): self.marker_lines})
+
+        tessellation = tuple(lod_tessellation(count, self.sphere_lod) for count in tessellation)
+        if tessellation not in self.marker_spheres:
+            self.marker_spheres[tessellation] = SphereInstances(*tessellation)
+        spheres = self.marker_spheres[tessellation]
+        spheres.upload(np.concatenate([np.asarray(i, dtype=float).reshape(-1, 7) for i in instances]))
+        glUseProgram(self.instanced_program)
+        spheres.draw()
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def draw_overlay(self, surface):
+        """Blend an RGBA pygame surface over the 3D scene, stretched to the full window"""
+        import pygame
+        texture_data = pygame.image.tostring(surface, "RGBA", False)
+
+        width, height = surface.get_size()
+
+        glActiveTexture(GL_TEXTURE0)
+        if self.overlay_texture is None:
+            self.overlay_texture = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, self.overlay_texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glBindTexture(GL_TEXTURE_2D, self.overlay_texture)
+        if self.overlay_size != (width, height):
+            # (Re)allocate when the overlay resolution changes
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+            self.overlay_size = (width, height)
+        glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE, texture_data)
+
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glUseProgram(self.overlay_program)
+        glBindVertexArray(self.empty_vao)
+        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        glBindVertexArray(0)
+        glUseProgram(0)
+        glDisable(GL_BLEND)
+        glEnable(GL_DEPTH_TEST)
+
+
+class ShaderTrackRenderer:
+    """Track scene baked once into static per-material vertex buffers"""
+    def __init__(self, renderer, track, scenery_density=1.0, sphere_lod=1.0):
+        self.renderer = renderer
+        self.track = track
+        self.batches = {}
+        self.set_quality(scenery_density, sphere_lod)
+
+    def set_quality(self, scenery_density, sphere_lod):
+        """Rebuild the baked buffers for a scenery density in [0, 1] and sphere tessellation factor"""
+        self.scenery_density = scenery_density
+        self.sphere_lod = sphere_lod
+        for batch in self.batches.values():
+            batch.delete()
+        scene = build_track_scene(self.track, scenery_density=scenery_density, sphere_lod=sphere_lod)
+        self.batches = self.renderer.upload_batches(scene)
+
+    def draw(self):
+        """Draw track in 3D"""
+        self.renderer.draw_batches(self.batches)
+
+
+class ShaderCarRenderer:
+    """Car body and wheels, rebuilt each frame into a streaming buffer"""
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.batch = MeshBatch(usage=GL_STREAM_DRAW)
+
+    def draw(self, car):
+        """Draw car in 3D"""
+        positions, colors = build_car_mesh(car).build()[(LIT, "triangles", 1.0)]
+        self.batch.upload(positions, colors)
+        self.renderer.draw_batches({(LIT, "triangles", 1.0): self.batch})
+
+
+class ShaderMinimapRenderer:
+    """Minimap drawn into a framebuffer texture with the scene's programs
+
+    The minimap's orthographic camera has its own uniform buffer, swapped into
+    the camera binding for the pass.
+    """
+    def __init__(self, renderer, geometry):
+        self.renderer = renderer
+        self.geometry = geometry
+        self.size = geometry.size
+        self.framebuffer, self.texture = create_render_target(self.size)
+        self.background, self.background_texture = create_render_target(self.size)
+        self.dynamic_batches = []  # Streaming buffers, grown to the number of dynamic layers
+
+        data = np.zeros(24, dtype=np.float32)
+        data[:16] = ortho_matrix(self.size).T.ravel()
+        data[16:18] = (self.size, self.size)
+        data[20] = 1.0
+        self.camera_ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.camera_ubo)
+        glBufferData(GL_UNIFORM_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+
+        # Static layer and captions, drawn once
+        batches = [MeshBatch(positions, colors) for _, _, positions, colors in geometry.static_layers]
+        labels = label_texture(geometry.label_surface)
+        previous = self._begin_pass(self.background)
+        glClearColor(*BACKGROUND, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        for (primitive, line_width, _, _), batch in zip(geometry.static_layers, batches):
+            self._draw_batch(primitive, line_width, batch)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self._draw_texture(labels)
+        glDisable(GL_BLEND)
+        self._end_pass(previous)
+        for batch in batches:
+            batch.delete()
+        glDeleteTextures([labels])
+
+    def render(self, car, camera, lka):
+        """Redraw the minimap texture for the current frame"""
+        layers = self.geometry.dynamic_layers(car, camera, lka)
+        while len(self.dynamic_batches) < len(layers):
+            self.dynamic_batches.append(MeshBatch(usage=GL_STREAM_DRAW))
+        for batch, (_, _, positions, colors) in zip(self.dynamic_batches, layers):
+            batch.upload(positions, colors)
+
+        previous = self._begin_pass(self.framebuffer)
+        copy_render_target(self.background, self.framebuffer, self.size)
+        for (primitive, line_width, _, _), batch in zip(layers, self.dynamic_batches):
+            self._draw_batch(primitive, line_width, batch)
+        self._end_pass(previous)
+
+    def _begin_pass(self, framebuffer):
+        """Bind a minimap framebuffer and camera; returns the framebuffer to restore"""
+        previous = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+        glViewport(0, 0, self.size, self.size)
+        glDisable(GL_DEPTH_TEST)
+        glBindBufferBase(GL_UNIFORM_BUFFER, CAMERA_BINDING, self.camera_ubo)
+        return previous
+
+    def _end_pass(self, previous):
+        glBindBufferBase(GL_UNIFORM_BUFFER, CAMERA_BINDING, self.renderer.camera_ubo)
+        glClearColor(0.6, 0.8, 1.0, 1.0)
+        glEnable(GL_DEPTH_TEST)
+        glBindFramebuffer(GL_FRAMEBUFFER, previous)
+        glViewport(0, 0, self.renderer.width, self.renderer.height)
+
+    def _draw_batch(self, primitive, line_width, batch):
+        if primitive == "fov":
+            # Semi-transparent cone: one constant alpha, no alpha channel in the colors
+            glEnable(GL_BLEND)
+            glBlendColor(0.0, 0.0, 0.0, FOV_ALPHA)
+            glBlendFunc(GL_CONSTANT_ALPHA, GL_ONE_MINUS_CONSTANT_ALPHA)
+            self.renderer.draw_batches({(UNLIT, "triangles", 1.0): batch})
+            glDisable(GL_BLEND)
+        else:
+            self.renderer.draw_batches({(UNLIT, primitive, line_width): batch})
+
+    def _draw_texture(self, texture):
+        """Fill the current viewport with a texture through the overlay program"""
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glUseProgram(self.renderer.overlay_program)
+        glBindVertexArray(self.renderer.empty_vao)
+        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def draw(self, x, y):
+        """Composite the minimap texture with its top-left corner at window pixel (x, y)"""
+        glViewport(x, self.renderer.height - y - self.size, self.size, self.size)
+        glDisable(GL_DEPTH_TEST)
+        self._draw_texture(self.texture)
+        glEnable(GL_DEPTH_TEST)
+        glViewport(0, 0, self.renderer.width, self.renderer.height)
@@ -0,0 +1,77 @@
+"""Bounded trajectory trail for the minimap"""
+
+import numpy as np
+
+TRAIL_VERTICES = 600  # Samples kept, whatever the duration or speed
+TRAIL_COLOR = (255, 0, 200)  # Solid trail (magenta)
+ERROR_COLOR_BINS = 8  # Error shades on the pygame minimap, one polyline per run of a shade
+
+
+class TrajectoryTrail:
+    """Fixed-capacity ring buffer of the car's recent positions
+
+    Samples are taken every duration / capacity seconds of simulated time, so
+    the trail always spans the last `duration` seconds with at most `capacity`
+    vertices: driving faster spaces them further apart and a long run only
+    overwrites the oldest ones. Recording is O(1) and allocates nothing.
+
+    With a track, each sample also stores its lateral error: the distance from
+    the nearer lane center (track.get_track_frame's offset against
+    +-lane_width / 2), used to color the trail.
+    """
+    __slots__ = ("duration", "capacity", "interval", "track", "positions", "errors", "head", "count",
+                 "next_time")
+
+    def __init__(self, duration=30.0, capacity=TRAIL_VERTICES, track=None):
+        self.duration = duration
+        self.capacity = capacity
+        self.interval = duration / capacity
+        self.track = track
+        self.positions = np.zeros((capacity, 2))
+        self.errors = np.zeros(capacity)
+        self.head = 0  # Slot of the next sample
+        self.count = 0
+        self.next_time = -np.inf
+
+    def record(self, time, x, y):
+        """Add the position at simulated `time` if a sample is due; True if one was stored"""
+        if time < self.next_time:
+            return False
+        self.positions[self.head] = x, y
+        if self.track is not None:
+            offset, _ = self.track.get_track_frame(x, y)
+            self.errors[self.head] = abs(abs(float(offset)) - self.track.lane_width / 2)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        # On schedule, or one interval from now after a pause longer than an interval
+        self.next_time += self.interval
+        if self.next_time <= time:
+            self.next_time = time + self.interval
+        return True
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.next_time = -np.inf
+
+    def _ordered(self, values):
+        """Samples oldest first"""
+        if self.count < self.capacity:
+            return values[:self.count]
+        return np.concatenate([values[self.head:], values[:self.head]])
+
+    def points(self):
+        """(count, 2) world positions, oldest first"""
+        return self._ordered(self.positions)
+
+    def error_levels(self):
+        """Lateral errors as 0..1 (0 on a lane center, 1 at half a lane width or more), oldest first;
+        None without a track"""
+        if self.track is None:
+            return None
+        return np.minimum(self._ordered(self.errors) / (self.track.lane_width / 2), 1.0)
+
+
+def error_colors(levels):
+    """(N, 3) colors in 0..1 from green (on the lane center) to red (half a lane off)"""
+    return np.column_stack([levels, 1.0 - levels, np.zeros_like(levels)])
@@ -0,0 +1,401 @@
+"""Scenario regression suite: scripted headless drives scored against KPI thresholds
+
+Each scenario is a plain dict (so scenario lists can live in JSON files):
+
+    {
+        "name": "lka_lane1_60",
+        "lane": 1,                # start lane for track.get_start_position
+        "speed": 60.0,            # initial speed, also the cruise speed held by throttle
+        "lka": true,              # LKA active at the start
+        "duration": 60.0,         # simulated seconds at most
+        "distance": 850.0,        # px of progress that finishes the drive (default: one lap)
+        "inputs": [               # scripted inputs, active for start <= t < end
+            {"start": 5.0, "end": 5.5, "steer": 1.0},
+            {"start": 6.0, "end": 7.0, "throttle": -1.0},
+            {"start": 8.0, "lka": true}
+        ],
+        "thresholds": {"max_collisions": 0, "max_finish_time": 18.0},
+        "xfail": {"reason": "LKA loses the lanes in the hairpin", "after": 880.0}
+    }
+
+Missing keys take the values in SCENARIO_DEFAULTS. Without a scripted
+throttle the car holds `speed`; a scripted steer overrides LKA and
+deactivates it like the keyboard does, and "lka" switches it on or off at
+the event's start. The drive ends after `duration` or once it has covered
+`distance`. KPIs: max_lateral_offset (distance from the nearer lane
+center), collisions (separate off-track events), finish_time (seconds to
+cover `distance`, None if not reached) and first_failure_distance
+(progress when the offset or collision threshold was first breached).
+
+"xfail" marks a known failure. The scenario still runs in full and is
+reported as XFAIL when it fails no earlier than "after" px into the drive;
+failing earlier is a FAIL, and passing is an XPASS, which also fails the
+run so that the marker is removed once the failure is fixed.
+
+Run the suite with `python -m robotics_lab.scenarios [scenarios.json]`.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .car import COLLISION_MODES, Car
+from .config import FPS
+from .controllers import LOOKAHEAD_MODES, PurePursuitLKA
+from .kernels import KERNELS
+from .sensors import CameraSensor
+from .track import SaoPauloTrack
+
+
+SCENARIO_DEFAULTS = {
+    "name": None,
+    "lane": 1,
+    "speed": 60.0,
+    "lka": True,
+    "duration": 60.0,
+    "distance": None,
+    "inputs": [],
+    "dt": 1.0 / FPS,
+    "integrator": "euler",
+    "collision": "endpoint",
+    "lookahead": "nearest",
+    "thresholds": {},
+    "xfail": None,
+}
+
+# Thresholds applied unless a scenario overrides them; None disables a check
+DEFAULT_THRESHOLDS = {
+    "max_lateral_offset": 15.0,
+    "max_collisions": 0,
+    "max_finish_time": None,
+}
+
+INPUT_KEYS = ("start", "end", "throttle", "steer", "lka")
+
+
+def normalize_scenario(spec, index=0):
+    """Fill in defaults and validate a scenario dict, returns a new dict"""
+    unknown = set(spec) - set(SCENARIO_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Scenario {spec.get('name', index)!r}: unknown keys {sorted(unknown)}")
+    scenario = dict(SCENARIO_DEFAULTS, **spec)
+    if scenario["name"] is None:
+        scenario["name"] = f"scenario_{index}"
+    if scenario["lane"] not in (1, 2):
+        raise ValueError(f"Scenario {scenario['name']!r}: lane must be 1 or 2")
+    if scenario["lookahead"] not in LOOKAHEAD_MODES:
+        raise ValueError(f"Scenario {scenario['name']!r}: unknown lookahead {scenario['lookahead']!r}")
+    if scenario["collision"] not in COLLISION_MODES:
+        raise ValueError(f"Scenario {scenario['name']!r}: unknown collision {scenario['collision']!r}")
+    if scenario["distance"] is not None and not scenario["distance"] > 0:
+        raise ValueError(f"Scenario {scenario['name']!r}: distance must be positive, got {scenario['distance']!r}")
+
+    for event in scenario["inputs"]:
+        unknown = set(event) - set(INPUT_KEYS)
+        if unknown or "start" not in event:
+            raise ValueError(f"Scenario {scenario['name']!r}: bad input {event!r}")
+
+    unknown = set(scenario["thresholds"]) - set(DEFAULT_THRESHOLDS)
+    if unknown:
+        raise ValueError(f"Scenario {scenario['name']!r}: unknown thresholds {sorted(unknown)}")
+    scenario["thresholds"] = dict(DEFAULT_THRESHOLDS, **scenario["thresholds"])
+
+    xfail = scenario["xfail"]
+    if xfail is not None:
+        if not isinstance(xfail, dict) or "reason" not in xfail or set(xfail) - {"reason", "after"}:
+            raise ValueError(f"Scenario {scenario['name']!r}: xfail needs a reason and optionally after, "
+                             f"got {xfail!r}")
+        scenario["xfail"] = {"reason": xfail["reason"], "after": float(xfail.get("after", 0.0))}
+    return scenario
+
+
+def load_scenarios(path):
+    """Read a JSON list of scenario dicts"""
+    with open(path) as f:
+        return [normalize_scenario(spec, i) for i, spec in enumerate(json.load(f))]
+
+
+# Built-in drives may take this much longer than cruising their distance at
+# speed, plus FINISH_TIME_SLACK seconds for the brake and engage scripts
+FINISH_TIME_MARGIN = 1.1
+FINISH_TIME_SLACK = 3.0
+
+# Where every lap fails today. The vertex camera sees no boundary point
+# ahead inside its field of view at the hairpin around (250, 110), LKA stops
+# steering and the car runs straight off the track. The first breach comes
+# 896-913 px into the lap depending on lane, speed and lookahead mode;
+# failing any earlier is a new failure.
+HAIRPIN_XFAIL = {
+    "reason": "LKA loses both lanes in the hairpin at (250, 110), about 900 px in",
+    "after": 880.0,
+}
+
+# The built-in matrix drives the stretch from the start line to just before
+# the hairpin, which every combination must pass
+SEGMENT_DISTANCE = 850.0
+
+
+def finish_time_limit(distance, speed):
+    """max_finish_time for cruising `distance` px at `speed`, with the built-in margins"""
+    return round(FINISH_TIME_MARGIN * distance / speed + FINISH_TIME_SLACK, 1)
+
+
+def default_scenarios():
+    """Built-in regression suite: 100 scenarios up to the hairpin and one full lap
+
+    The matrix covers both lanes, both lookahead modes and five speeds, each
+    as a plain cruise, a 0.2 s manual steering kick either way (LKA
+    re-engaged afterwards), a one second brake and LKA engaging one second
+    after the start. Each drives SEGMENT_DISTANCE px within
+    finish_time_limit, with the default offset and collision thresholds.
+    The full lap ("hairpin_lap") is the one known failure (HAIRPIN_XFAIL).
+    """
+    lap_length = float(SaoPauloTrack(offset_x=50, offset_y=50).get_boundary_arc_length(0)[-1])
+    scenarios = []
+    for lookahead in LOOKAHEAD_MODES:
+        for lane in (1, 2):
+            for speed in (30.0, 40.0, 50.0, 60.0, 70.0):
+                max_finish_time = finish_time_limit(SEGMENT_DISTANCE, speed)
+                base = {"lane": lane, "speed": speed, "lookahead": lookahead,
+                        "duration": max_finish_time + 1.0, "distance": SEGMENT_DISTANCE,
+                        "thresholds": {"max_finish_time": max_finish_time}}
+                tag = f"{lookahead}_lane{lane}_{speed:.0f}"
+                scenarios.append(dict(base, name=f"cruise_{tag}"))
+                for direction, steer in (("left", 1.0), ("right", -1.0)):
+                    scenarios.append(dict(base, name=f"kick_{direction}_{tag}", inputs=[
+                        {"start": 3.0, "end": 3.2, "steer": steer},
+                        {"start": 3.2, "lka": True},
+                    ]))
+                scenarios.append(dict(base, name=f"brake_{tag}", inputs=[
+                    {"start": 4.0, "end": 5.0, "throttle": -1.0},
+                ]))
+                scenarios.append(dict(base, name=f"late_engage_{tag}", lka=False, inputs=[
+                    {"start": 1.0, "lka": True},
+                ]))
+
+    max_finish_time = finish_time_limit(lap_length, 60.0)
+    scenarios.append({"name": "hairpin_lap", "lane": 1, "speed": 60.0, "duration": max_finish_time + 1.0,
+                      "thresholds": {"max_finish_time": max_finish_time}, "xfail": HAIRPIN_XFAIL})
+    return [normalize_scenario(spec, i) for i, spec in enumerate(scenarios)]
+
+
+class ScenarioRunner:
+    """Drives one scenario headlessly and measures its KPIs"""
+    def __init__(self, track=None):
+        self.track = track if track is not None else SaoPauloTrack(offset_x=50, offset_y=50)
+        # Centerline as plain floats: per-tick KPI lookups are scalar work
+        points, next_points = self.track.get_boundary_segments(0)
+        self.points = points
+        self.segments = np.column_stack([points, next_points - points]).tolist()
+        self.arc = self.track.get_boundary_arc_length(0).tolist()
+
+    def track_position(self, x, y):
+        """(arc length, lateral offset) of (x, y) on the centerline
+
+        Projects onto whichever of the two segments meeting at the nearest
+        vertex is closer; lateral is positive to the left like
+        SaoPauloTrack.get_track_frame.
+        """
+        i = KERNELS.nearest_vertex(self.points, x, y)
+        best = None
+        for j in (i - 1, i, i + 1):
+            j %= len(self.segments)
+            px, py, dx, dy = self.segments[j]
+            length = self.arc[j + 1] - self.arc[j]
+            if length == 0:
+                continue  # Closing duplicate of the first vertex
+            along = min(max(((x - px) * dx + (y - py) * dy) / length, 0.0), length)
+            ex = x - px - along * dx / length
+            ey = y - py - along * dy / length
+            distance_sq = ex * ex + ey * ey
+            if best is None or distance_sq < best[0]:
+                side = 1.0 if dx * ey - dy * ex >= 0 else -1.0
+                best = (distance_sq, self.arc[j] + along, side * distance_sq ** 0.5)
+        return best[1], best[2]
+
+    def run(self, scenario):
+        """Simulate a normalized scenario, returns a result dict with KPIs and failures"""
+        track = self.track
+        dt = scenario["dt"]
+        steps = int(round(scenario["duration"] / dt))
+        loop_length = self.arc[-1]
+        distance = loop_length if scenario["distance"] is None else scenario["distance"]
+        half_lane = track.lane_width / 2
+
+        car = Car(*track.get_start_position(scenario["lane"]))
+        car.track = track
+        car.velocity = scenario["speed"]
+        car.integrator = scenario["integrator"]
+        car.collision = scenario["collision"]
+        camera = CameraSensor(car)
+        lka = PurePursuitLKA(car, camera, lookahead_mode=scenario["lookahead"])
+        if scenario["lka"]:
+            lka.toggle()
+
+        events = sorted(scenario["inputs"], key=lambda event: event["start"])
+        pending_toggles = [event for event in events if "lka" in event]
+
+        thresholds = scenario["thresholds"]
+        max_lateral_offset = 0.0
+        collisions = 0
+        colliding = False
+        finish_time = None
+        first_failure_distance = None
+        progress = 0.0
+        position, _ = self.track_position(car.x, car.y)
+
+        for step in range(steps):
+            t = step * dt
+            while pending_toggles and pending_toggles[0]["start"] <= t:
+                if lka.active != bool(pending_toggles.pop(0)["lka"]):
+                    lka.toggle()
+
+            # Speed hold unless a scripted event sets the throttle
+            throttle = min(max((scenario["speed"] - car.velocity) / (car.acceleration * dt), -1.0), 1.0)
+            steer = 0.0
+            for event in events:
+                if event["start"] <= t < event.get("end", np.inf):
+                    throttle = event.get("throttle", throttle)
+                    steer = event.get("steer", steer)
+
+            lka_steering = lka.calculate_steering(track) if lka.active else None
+            car.drive(dt, throttle, steer, lka_steering, lka)
+
+            if not car.is_on_track(track):
+                car.handle_collision()
+                if not colliding:
+                    collisions += 1
+                colliding = True
+            else:
+                colliding = False
+
+            new_position, lateral = self.track_position(car.x, car.y)
+            lateral_offset = abs(abs(lateral) - half_lane)
+            max_lateral_offset = max(max_lateral_offset, lateral_offset)
+
+            # Unwrap progress across the start line
+            progress += (new_position - position + loop_length / 2) % loop_length - loop_length / 2
+            position = new_position
+
+            if first_failure_distance is None and (
+                    (thresholds["max_lateral_offset"] is not None
+                     and lateral_offset > thresholds["max_lateral_offset"])
+                    or (thresholds["max_collisions"] is not None and collisions > thresholds["max_collisions"])):
+                first_failure_distance = float(progress)
+            if progress >= distance:
+                finish_time = (step + 1) * dt
+                break
+
+        kpis = {
+            "max_lateral_offset": max_lateral_offset,
+            "collisions": collisions,
+            "finish_time": finish_time,
+            "distance": float(progress),
+            "first_failure_distance": first_failure_distance,
+        }
+        failures = check_thresholds(kpis, thresholds)
+        return {"name": scenario["name"], "kpis": kpis, "failures": failures,
+                "status": scenario_status(failures, kpis, scenario["xfail"])}
+
+
+def check_thresholds(kpis, thresholds):
+    """List of human-readable threshold breaches (empty when all pass)"""
+    failures = []
+    if thresholds["max_lateral_offset"] is not None and kpis["max_lateral_offset"] > thresholds["max_lateral_offset"]:
+        failures.append(f"max_lateral_offset {kpis['max_lateral_offset']:.1f} > {thresholds['max_lateral_offset']}")
+    if thresholds["max_collisions"] is not None and kpis["collisions"] > thresholds["max_collisions"]:
+        failures.append(f"collisions {kpis['collisions']} > {thresholds['max_collisions']}")
+    if thresholds["max_finish_time"] is not None:
+        if kpis["finish_time"] is None:
+            failures.append("distance not covered")
+        elif kpis["finish_time"] > thresholds["max_finish_time"]:
+            failures.append(f"finish_time {kpis['finish_time']:.1f} > {thresholds['max_finish_time']}")
+    return failures
+
+
+def scenario_status(failures, kpis, xfail):
+    """PASS or FAIL; for a known failure XFAIL, XPASS (fixed) or FAIL (breached before xfail["after"])
+
+    An early breach is added to `failures`.
+    """
+    if xfail is None:
+        return "FAIL" if failures else "PASS"
+    if not failures:
+        return "XPASS"
+    first = kpis["first_failure_distance"]
+    if first is not None and first < xfail["after"]:
+        failures.insert(0, f"failed at {first:.0f} px, before the known failure after {xfail['after']:.0f} px")
+        return "FAIL"
+    return "XFAIL"
+
+
+_worker_runner = None
+
+
+def _run_in_worker(scenario):
+    """Process pool entry point; each worker builds its track once"""
+    global _worker_runner
+    if _worker_runner is None:
+        _worker_runner = ScenarioRunner()
+    return _worker_runner.run(scenario)
+
+
+def run_scenarios(scenarios, workers=None):
+    """Run scenarios across a process pool (in-process when workers == 1), results in input order"""
+    if workers == 1:
+        runner = ScenarioRunner()
+        return [runner.run(scenario) for scenario in scenarios]
+    from concurrent.futures import ProcessPoolExecutor  # Keeps multiprocessing out of the package import
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(scenarios) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_in_worker, scenarios, chunksize=chunksize))
+
+
+def format_summary(results):
+    """Summary table of KPIs and pass/fail per scenario"""
+    width = max([len("scenario")] + [len(result["name"]) for result in results])
+    lines = [f"{'scenario':<{width}}  {'max_lat':>7}  {'coll':>4}  {'fin_s':>6}  {'dist':>7}  result"]
+    for result in results:
+        kpis = result["kpis"]
+        finish = f"{kpis['finish_time']:6.1f}" if kpis["finish_time"] is not None else f"{'-':>6}"
+        status = result["status"]
+        if status == "XPASS":
+            status += ": known failure no longer fails, remove its xfail"
+        elif result["failures"]:
+            status += ": " + "; ".join(result["failures"])
+        lines.append(f"{result['name']:<{width}}  {kpis['max_lateral_offset']:7.1f}  "
+                     f"{kpis['collisions']:4d}  {finish}  {kpis['distance']:7.0f}  {status}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scenario regression suite")
+    parser.add_argument("scenarios", nargs="?", help="JSON scenario list (default: built-in matrix)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--failures-only", action="store_true", help="only list failing scenarios")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else default_scenarios()
+    start = time.perf_counter()
+    results = run_scenarios(scenarios, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if result["status"] in ("FAIL", "XPASS")]
+    known = sum(result["status"] == "XFAIL" for result in results)
+    shown = failed if args.failures_only else results
+    if shown:
+        print(format_summary(shown))
+    passed = len(results) - len(failed) - known
+    print(f"\n{passed}/{len(results)} scenarios passed, {known} known failures (xfail), "
+          f"{len(failed)} failed in {elapsed:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,743 @@
+"""Camera sensor model for lane detection"""
+
+import math
+
+import numpy as np
+
+from .kernels import KERNELS, boundary_visibility
+from .track import GRID_MIN_SEGMENTS
+
+
+# One lane detection: world position and bearing relative to the camera heading
+DETECTION_DTYPE = np.dtype([("x", np.float64), ("y", np.float64), ("bearing", np.float64)])
+
+# Upper bound on (camera, boundary point) pairs tested at once by the batch APIs
+BATCH_ELEMENTS = 1 << 20
+
+
+def as_records(rows, dtype):
+    """View (..., k) float64 rows as a structured array of an all-float64 dtype (no copy)"""
+    return rows.view(dtype)[..., 0]
+
+
+def as_rows(records):
+    """View a structured array of float64 fields as (..., k) float64 rows (no copy)"""
+    return records.view(np.float64).reshape(records.shape + (len(records.dtype.names),))
+
+
+def cast_rays(origins, ray_angles, seg_start, seg_end, min_range, max_range, grid=None):
+    """Intersect a fan of rays with line segments in one vectorized pass.
+
+    origins: (N, 2) ray origins, ray_angles: (N, R) world-frame ray angles,
+    seg_start/seg_end: (M, 2) segment endpoints.
+    grid: optional SegmentGrid over the same segments; each origin then only
+    tests the segments in the cells within max_range of it, so the cost does
+    not grow with M. Without it every (origin, segment) pair is tested.
+    Returns (N, R) distance to the first hit within [min_range, max_range],
+    or inf where a ray hits nothing.
+    """
+    origins = np.asarray(origins, dtype=float)
+    ray_angles = np.asarray(ray_angles, dtype=float)
+    distances = np.full(ray_angles.shape, np.inf)
+
+    # Candidate (origin, segment) pairs, grouped by origin
+    if grid is not None:
+        origin_idx, seg_idx = grid.segments_near(origins[:, 0], origins[:, 1], max_range)
+    else:
+        origin_idx = np.repeat(np.arange(len(origins)), len(seg_start))
+        seg_idx = np.tile(np.arange(len(seg_start)), len(origins))
+
+    seg_dx = seg_end[seg_idx, 0] - seg_start[seg_idx, 0]
+    seg_dy = seg_end[seg_idx, 1] - seg_start[seg_idx, 1]
+    seg_len_sq = seg_dx**2 + seg_dy**2
+
+    # Vector from the origin to the segment start of each pair
+    to_seg_x = seg_start[seg_idx, 0] - origins[origin_idx, 0]
+    to_seg_y = seg_start[seg_idx, 1] - origins[origin_idx, 1]
+
+    # Only (origin, segment) pairs that come within sensor range can be hit
+    along = np.clip(-(to_seg_x * seg_dx + to_seg_y * seg_dy) / np.where(seg_len_sq > 0, seg_len_sq, 1.0),
+                    0.0, 1.0)
+    near_dist = np.hypot(to_seg_x + along * seg_dx, to_seg_y + along * seg_dy)
+    far_dist = np.maximum(np.hypot(to_seg_x, to_seg_y),
+                          np.hypot(to_seg_x + seg_dx, to_seg_y + seg_dy))
+    candidate = (seg_len_sq > 0) & (near_dist <= max_range) & (far_dist >= min_range)
+
+    # For fans narrower than 180 degrees, segments entirely behind the fan's
+    # central direction cannot be hit either
+    center_x = np.cos(ray_angles).sum(axis=1)
+    center_y = np.sin(ray_angles).sum(axis=1)
+    center_angle = np.arctan2(center_y, center_x)
+    narrow_fan = np.cos(ray_angles - center_angle[:, None]).min(axis=1) > 0
+    center_cos, center_sin = np.cos(center_angle)[origin_idx], np.sin(center_angle)[origin_idx]
+    ahead_start = to_seg_x * center_cos + to_seg_y * center_sin
+    ahead_end = ahead_start + seg_dx * center_cos + seg_dy * center_sin
+    behind = narrow_fan[origin_idx] & (ahead_start <= 0) & (ahead_end <= 0)
+    candidate &= ~behind
+
+    origin_idx, seg_idx = origin_idx[candidate], seg_idx[candidate]
+    if len(origin_idx) == 0:
+        return distances
+
+    # Ray directions (K, R) and pair geometry (K, 1) for the K candidate pairs
+    dir_x = np.cos(ray_angles)[origin_idx]
+    dir_y = np.sin(ray_angles)[origin_idx]
+    pair_dx = seg_dx[candidate, None]
+    pair_dy = seg_dy[candidate, None]
+    pair_to_x = to_seg_x[candidate, None]
+    pair_to_y = to_seg_y[candidate, None]
+
+    # Solve origin + t * dir = seg_start + u * seg_dir using 2D cross products
+    denom = dir_x * pair_dy - dir_y * pair_dx
+    parallel = np.abs(denom) < 1e-12
+    denom = np.where(parallel, 1.0, denom)
+    t = (pair_to_x * pair_dy - pair_to_y * pair_dx) / denom
+    u = (pair_to_x * dir_y - pair_to_y * dir_x) / denom
+
+    hit = ~parallel & (u >= 0.0) & (u <= 1.0) & (t >= min_range) & (t <= max_range)
+    pair_distances = np.where(hit, t, np.inf)
+
+    # Pairs come grouped by origin: reduce each group to the nearest hit per ray
+    starts = np.flatnonzero(np.r_[True, origin_idx[1:] != origin_idx[:-1]])
+    distances[origin_idx[starts]] = np.minimum.reduceat(pair_distances, starts, axis=0)
+    return distances
+
+
+def batch_chunks(count, width):
+    """Slices over `count` items sized so that each chunk times `width` stays within
+    BATCH_ELEMENTS (one empty slice when count is 0)"""
+    step = max(1, BATCH_ELEMENTS // max(width, 1))
+    return [slice(start, min(start + step, count)) for start in range(0, max(count, 1), step)]
+
+
+def pack_rows(count, owners, rows):
+    """Group rows by owner into an (count, K, k) array padded with nan, K the largest group
+
+    owners must be sorted (rows of one owner keep their order). Returns
+    (packed rows, (count,) rows per owner).
+    """
+    counts = np.bincount(owners, minlength=count)
+    packed = np.full((count, counts.max(initial=0), rows.shape[1]), np.nan)
+    slots = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    packed[owners, slots] = rows
+    return packed, counts
+
+
+def _pad_rows(rows, width):
+    """Pad axis 1 of nan-padded rows to width"""
+    return np.pad(rows, ((0, 0), (0, width - rows.shape[1]), (0, 0)), constant_values=np.nan)
+
+
+class LaneDetectionBatch:
+    """CameraSensor.detect_lanes results for N cars (see detect_lanes_batch)
+
+    left, right and center are (N, K) DETECTION_DTYPE arrays padded with nan
+    after each car's left_counts, right_counts and center_counts detections;
+    the rest mirrors the sensor's attributes with one entry per car.
+    lane_center_offset is nan where a lane is missing.
+    """
+    __slots__ = ("left", "right", "center", "left_counts", "right_counts", "center_counts",
+                 "left_lane_detected", "right_lane_detected", "current_lane", "lane_center_offset",
+                 "lane_heading_error")
+
+    def __init__(self, left, right, center, left_counts, right_counts, center_counts,
+                 current_lane, lane_center_offset):
+        self.left = left
+        self.right = right
+        self.center = center
+        self.left_counts = left_counts
+        self.right_counts = right_counts
+        self.center_counts = center_counts
+        self.left_lane_detected = left_counts > 0
+        self.right_lane_detected = right_counts > 0
+        self.current_lane = current_lane
+        self.lane_center_offset = lane_center_offset
+        self.lane_heading_error = lane_center_offset
+
+    def __len__(self):
+        return len(self.left_counts)
+
+    def car(self, index):
+        """Car index's (left, right, center) as detect_lanes returns them"""
+        return tuple(lanes[index, :count] for lanes, count in
+                     ((self.left, self.left_counts[index]), (self.right, self.right_counts[index]),
+                      (self.center, self.center_counts[index])))
+
+
+def _arc_window(arc, first, last, margin):
+    """Unwrapped index range (k_lo, k_hi) of a closed polyline within `margin` arc
+    length of the window first..last (last may run past the end of the loop)
+
+    The range always grows by at least one vertex on each side and is shifted
+    so that 0 <= k_lo < count. Returns None when it would cover the whole loop.
+    """
+    count = len(arc) - 1
+    loop_length = arc[-1]
+    lo = arc[first] - margin
+    hi = arc[last % count] + (last // count) * loop_length + margin
+    if hi - lo >= loop_length:
+        return None
+
+    # Unwrapped vertex k sits at arc[k % count] + (k // count) * loop_length
+    period, rest = divmod(lo, loop_length)
+    k_lo = int(period) * count + int(np.searchsorted(arc[:-1], rest, side="left"))
+    period, rest = divmod(hi, loop_length)
+    k_hi = int(period) * count + int(np.searchsorted(arc[:-1], rest, side="right")) - 1
+    # Always include one vertex past each end so points entering view are seen on sparse polylines
+    k_lo = min(k_lo, first - 1)
+    k_hi = max(k_hi, last + 1)
+    if k_hi - k_lo + 1 >= count:
+        return None
+    shift = (k_lo // count) * count
+    return k_lo - shift, k_hi - shift
+
+
+def _cyclic_range(indices, count):
+    """(first, last) of the shortest cyclic index range covering sorted indices,
+    with last >= first (past the end of the loop when the range wraps)"""
+    gaps = np.diff(np.append(indices, indices[0] + count))
+    j = int(np.argmax(gaps))
+    first = int(indices[(j + 1) % len(indices)])
+    last = int(indices[j])
+    return first, last if last >= first else last + count
+
+
+class LaneTracker:
+    """Temporal lane tracking for CameraSensor's vertex detection
+
+    Keeps, per boundary, the index range of the points that were visible on
+    the previous tick and only tests that range widened by `margin` (arc
+    length) on both sides, so detection cost follows what is visible rather
+    than the track length. A boundary falls back to a full scan when nothing
+    is found in its window and every `refresh_interval` ticks, which also
+    picks up track sections that swing into view from elsewhere. The nearest
+    centerline vertex (for the current lane) is tracked the same way.
+
+    lane_center_offset and lane_heading_error are smoothed with an
+    exponential filter (weight `smoothing` on the new value), restarted
+    whenever a lane is lost.
+
+    Windows, ages and the filter only move when called with advance=True,
+    which CameraSensor.update does once per tick; with advance=False (a
+    detect_lanes query) they are read but left as they are.
+    """
+    __slots__ = ("margin", "smoothing", "refresh_interval", "windows", "filtered",
+                 "full_scans", "window_scans")
+
+    def __init__(self, margin=50.0, smoothing=0.3, refresh_interval=60):
+        self.margin = margin
+        self.smoothing = smoothing
+        self.refresh_interval = refresh_interval
+        self.reset()
+
+    def reset(self):
+        """Forget all windows and the filter state"""
+        self.windows = {}  # key -> [first, last, ticks since full scan]
+        self.filtered = None
+        self.full_scans = 0
+        self.window_scans = 0
+
+    def _window(self, key, arc):
+        """Unwrapped (k_lo, k_hi) to test for `key`, or None for a full scan"""
+        window = self.windows.get(key)
+        if window is None or window[2] >= self.refresh_interval:
+            return None
+        return _arc_window(arc, window[0], window[1], self.margin)
+
+    def _remember(self, key, first, last, scanned_all, count):
+        age = 0 if scanned_all else self.windows[key][2] + 1
+        shift = (first // count) * count
+        self.windows[key] = [first - shift, last - shift, age]
+
+    def detect_boundary(self, camera, track, offset, camera_x, camera_y, camera_angle, out, advance=True):
+        """Write visible (x, y, bearing) rows of the boundary at offset to out, in index
+        order like a full scan; returns the number of rows"""
+        unrolled = track.get_unrolled_boundary(offset)
+        count = len(unrolled) // 2
+        key = ("boundary", offset)
+        window = self._window(key, track.get_boundary_arc_length(offset))
+        args = (camera_x, camera_y, camera_angle, camera.min_range, camera.max_range, camera.field_of_view / 2)
+
+        if window is not None:
+            # The window is one contiguous slice of the unrolled boundary
+            k_lo, k_hi = window
+            visible, bearing = boundary_visibility(unrolled[k_lo:k_hi + 1], *args)
+            hits = np.flatnonzero(visible)
+            if len(hits):
+                if advance:
+                    self.window_scans += 1
+                    self._remember(key, k_lo + int(hits[0]), k_lo + int(hits[-1]), False, count)
+                # Hits past the loop end have the lowest indices: they come first
+                split = int(np.searchsorted(hits, count - k_lo))
+                n = len(hits)
+                out[:n - split, :2] = unrolled[k_lo + hits[split:]]
+                out[:n - split, 2] = bearing[hits[split:]]
+                out[n - split:n, :2] = unrolled[k_lo + hits[:split]]
+                out[n - split:n, 2] = bearing[hits[:split]]
+                return n
+
+        # No window yet, refresh due or lost inside the window: scan everything
+        visible, bearing = boundary_visibility(unrolled[:count], *args)
+        hits = np.flatnonzero(visible)
+        if advance:
+            self.full_scans += 1
+            if len(hits) == 0:
+                self.windows.pop(key, None)
+            else:
+                self._remember(key, *_cyclic_range(hits, count), True, count)
+        if len(hits) == 0:
+            return 0
+        n = len(hits)
+        out[:n, :2] = unrolled[hits]
+        out[:n, 2] = bearing[hits]
+        return n
+
+    def nearest_centerline_vertex(self, track, x, y, advance=True):
+        """Index of the centerline vertex closest to (x, y)"""
+        unrolled = track.get_unrolled_boundary(0)
+        count = len(unrolled) // 2
+        key = "nearest"
+        window = self._window(key, track.get_boundary_arc_length(0))
+
+        if window is not None:
+            k_lo, k_hi = window
+            best = k_lo + KERNELS.nearest_vertex(unrolled[k_lo:min(k_hi, count - 1) + 1], x, y)
+            if k_hi >= count:
+                # Wrapped part holds the lowest indices: it wins ties like a full scan
+                wrapped = count + KERNELS.nearest_vertex(unrolled[count:k_hi + 1], x, y)
+                if (math.hypot(x - unrolled[wrapped, 0], y - unrolled[wrapped, 1]) <=
+                        math.hypot(x - unrolled[best, 0], y - unrolled[best, 1])):
+                    best = wrapped
+            if k_lo < best < k_hi:
+                index = best % count
+                if advance:
+                    self.window_scans += 1
+                    self._remember(key, index, index, False, count)
+                return index
+
+        # Minimum on the window edge may continue outside it: scan everything
+        index = KERNELS.nearest_vertex(unrolled[:count], x, y)
+        if advance:
+            self.full_scans += 1
+            self._remember(key, index, index, True, count)
+        return index
+
+    def smooth(self, center_offset, heading_error, advance=True):
+        """Filtered (lane_center_offset, lane_heading_error)"""
+        if self.filtered is None:
+            filtered = (center_offset, heading_error)
+        else:
+            a = self.smoothing
+            filtered = (self.filtered[0] + a * (center_offset - self.filtered[0]),
+                        self.filtered[1] + a * (heading_error - self.filtered[1]))
+        if advance:
+            self.filtered = filtered
+        return filtered
+
+    def lose(self, advance=True):
+        """A lane was lost: restart the filter on re-acquisition"""
+        if advance:
+            self.filtered = None
+
+
+class CameraSensor:
+    """Camera sensor for lane detection - identical logic to original
+
+    update(track) is the once-per-tick step: it detects, advances the
+    tracker and sets the lane attributes; its result stays in `detections`
+    for everything else that draws or logs the tick. detect_lanes(track) is
+    a query that changes nothing, so calling it twice gives the same result.
+    Both return DETECTION_DTYPE arrays (fields x, y, bearing) that are views
+    into buffers owned by the sensor: they stay valid until the next call of
+    the same method, copy them to keep them longer.
+    """
+    __slots__ = ("car", "field_of_view", "max_range", "min_range", "image_width", "image_height",
+                 "mount_offset", "detection_confidence", "lane_sample_points", "detection_mode",
+                 "num_rays", "tracker", "left_lane_detected", "right_lane_detected",
+                 "left_lane_position", "right_lane_position", "lane_center_offset",
+                 "lane_heading_error", "current_lane", "detections", "detection_rows")
+
+    def __init__(self, car):
+        self.car = car
+        self.field_of_view = np.radians(80)
+        self.max_range = 300
+        self.min_range = 20
+        self.image_width = 1280
+        self.image_height = 720
+        self.mount_offset = self.car.length * 0.10
+        self.detection_confidence = 0.95
+        self.lane_sample_points = 10
+
+        # Detection mode: "vertices" tests boundary vertices (original logic),
+        # "raycast" intersects a fan of evenly spaced rays with boundary segments
+        self.detection_mode = "vertices"
+        self.num_rays = 31
+
+        # Optional LaneTracker: windowed vertex search and smoothed tracking errors
+        self.tracker = None
+
+        self.left_lane_detected = False
+        self.right_lane_detected = False
+        self.left_lane_position = None
+        self.right_lane_position = None
+        self.lane_center_offset = 0.0
+        self.lane_heading_error = 0.0
+        self.current_lane = "UNKNOWN"
+
+        # (3, capacity, 3) rows for the left outer, center and right outer
+        # detections, one buffer for update and one for detect_lanes, reused
+        # every call and grown when a boundary needs more room
+        self.detection_rows = [np.empty((3, 0, 3)), np.empty((3, 0, 3))]
+        empty = as_records(self.detection_rows[0][0], DETECTION_DTYPE)
+        self.detections = (empty, empty, empty)
+
+    def _detection_buffer(self, capacity, advance):
+        """The reusable detection rows of update (advance) or detect_lanes, grown to at
+        least capacity per boundary"""
+        index = 0 if advance else 1
+        if self.detection_rows[index].shape[1] < capacity:
+            self.detection_rows[index] = np.empty((3, capacity, 3))
+        return self.detection_rows[index]
+
+    def get_camera_position(self):
+        """Get camera world position"""
+        camera_x = self.car.x + self.mount_offset * np.cos(self.car.theta)
+        camera_y = self.car.y + self.mount_offset * np.sin(self.car.theta)
+        return camera_x, camera_y
+
+    def update(self, track):
+        """Detect lane lines for this tick - same logic as original
+
+        Call once per simulation tick: it advances the tracker's windows and
+        filter, sets the lane attributes and keeps the result in `detections`.
+        """
+        left_lane_points, right_lane_points, center_points, current_lane, errors = self._detect(track, True)
+
+        self.left_lane_detected = len(left_lane_points) > 0
+        self.right_lane_detected = len(right_lane_points) > 0
+        self.current_lane = current_lane
+
+        if self.left_lane_detected and len(left_lane_points) > 0:
+            self.left_lane_position = self._calculate_lane_position(left_lane_points[0])
+
+        if self.right_lane_detected and len(right_lane_points) > 0:
+            self.right_lane_position = self._calculate_lane_position(right_lane_points[0])
+
+        if errors is not None:
+            self.lane_center_offset, self.lane_heading_error = errors
+
+        self.detections = (left_lane_points, right_lane_points, center_points)
+        return self.detections
+
+    def detect_lanes(self, track):
+        """(left, right, center) lane detections for the current pose, without side effects
+
+        The tracker's windows are searched but not moved, and no attribute
+        changes; update(track) is the per-tick step.
+        """
+        return self._detect(track, False)[:3]
+
+    def _detect(self, track, advance):
+        """(left, right, center, current lane, tracking errors or None) for the current pose"""
+        camera_x, camera_y = self.get_camera_position()
+        camera_angle = self.car.theta
+
+        offsets = (-track.lane_width, 0, track.lane_width)
+        if self.detection_mode == "raycast":
+            # Cast the ray fan against each boundary's segments
+            rows = self._detection_buffer(self.num_rays, advance)
+            counts = [self._raycast_lane_boundary(track, offset, camera_x, camera_y, camera_angle, rows[k])
+                      for k, offset in enumerate(offsets)]
+        elif self.tracker is not None:
+            # Search around last tick's visible points only
+            rows = self._detection_buffer(len(track.centerline), advance)
+            counts = [self.tracker.detect_boundary(self, track, offset, camera_x, camera_y, camera_angle, rows[k],
+                                                   advance)
+                      for k, offset in enumerate(offsets)]
+        else:
+            # Boundaries are offset once per track and cached
+            rows = self._detection_buffer(len(track.centerline), advance)
+            counts = [self._detect_lane_boundary(track.get_boundary_segments(offset)[0],
+                                                 camera_x, camera_y, camera_angle, rows[k])
+                      for k, offset in enumerate(offsets)]
+
+        left_outer_points, center_points, right_outer_points = [
+            as_records(rows[k, :count], DETECTION_DTYPE) for k, count in enumerate(counts)
+        ]
+
+        # Determine current lane
+        car_lateral_offset = self._get_lateral_offset_from_track_center(track, advance)
+
+        if car_lateral_offset < 0:
+            left_lane_points = left_outer_points
+            right_lane_points = center_points
+            current_lane = "LEFT"
+        else:
+            left_lane_points = center_points
+            right_lane_points = right_outer_points
+            current_lane = "RIGHT"
+
+        errors = self._calculate_lane_tracking_errors(left_lane_points, right_lane_points, advance)
+        return left_lane_points, right_lane_points, center_points, current_lane, errors
+
+    def detect_lanes_batch(self, track, xs, ys, thetas):
+        """detect_lanes for N car poses at once, returns a LaneDetectionBatch
+
+        Every pose uses this sensor's settings; its own car is not read and no
+        state is stored, so a tracker is ignored (no windows, no smoothing).
+        In vertex mode each camera only tests the boundary vertices in the
+        boundary's grid cells around it (track.get_boundary_grid), so the cost
+        follows the cars and the points near them, not the track length
+        (boundaries under GRID_MIN_SEGMENTS vertices are tested whole);
+        in raycast mode all ray fans are cast together against the same
+        nearby segments. Detections, lanes and
+        tracking errors match what update gives for each pose.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        thetas = np.asarray(thetas, dtype=float)
+        camera_xs = xs + self.mount_offset * np.cos(thetas)
+        camera_ys = ys + self.mount_offset * np.sin(thetas)
+        count = len(xs)
+
+        offsets = (-track.lane_width, 0, track.lane_width)
+        packed = []
+        for offset in offsets:
+            points, seg_end = track.get_boundary_segments(offset)
+            if self.detection_mode != "raycast":
+                # Range mask over (car, vertex) pairs, then bearings of the pairs in range only,
+                # with the same arithmetic as boundary_visibility
+                grid = self.boundary_grid(track, offset)
+                if grid is not None:
+                    # Only the vertices in the grid cells around each camera
+                    car, vertex = grid.segments_near(camera_xs, camera_ys, self.max_range)
+                    dx = points[vertex, 0] - camera_xs[car]
+                    dy = points[vertex, 1] - camera_ys[car]
+                    distance = np.sqrt(dx**2 + dy**2)
+                    in_range = (distance >= self.min_range) & (distance <= self.max_range)
+                    car, vertex, dx, dy = car[in_range], vertex[in_range], dx[in_range], dy[in_range]
+                else:
+                    # Short boundary: one broadcast over every car and vertex
+                    dx = points[:, 0] - camera_xs[:, None]
+                    dy = points[:, 1] - camera_ys[:, None]
+                    distance = np.sqrt(dx**2 + dy**2)
+                    car, vertex = np.nonzero((distance >= self.min_range) & (distance <= self.max_range))
+                    dx, dy = dx[car, vertex], dy[car, vertex]
+                bearing = np.arctan2(dy, dx) - thetas[car]
+                bearing = np.arctan2(np.sin(bearing), np.cos(bearing))
+                in_view = np.abs(bearing) < self.field_of_view / 2
+                packed.append(pack_rows(count, car[in_view],
+                                        np.column_stack([points[vertex[in_view]], bearing[in_view]])))
+                continue
+
+            # With a grid each camera tests a bounded set of segments, so chunks only cap the dense case
+            grid = self.boundary_grid(track, offset)
+            relative_angles = self.get_ray_angles()
+            owners, rows = [], []
+            for chunk in batch_chunks(count, len(points) if grid is None else GRID_MIN_SEGMENTS):
+                distances = cast_rays(np.column_stack([camera_xs[chunk], camera_ys[chunk]]),
+                                      thetas[chunk, None] + relative_angles[None, :],
+                                      points, seg_end, self.min_range, self.max_range, grid)
+                car, ray = np.nonzero(np.isfinite(distances))
+                hit_angles = thetas[chunk][car] + relative_angles[ray]
+                rows.append(np.column_stack([camera_xs[chunk][car] + distances[car, ray] * np.cos(hit_angles),
+                                             camera_ys[chunk][car] + distances[car, ray] * np.sin(hit_angles),
+                                             relative_angles[ray]]))
+                owners.append(car + chunk.start)
+            packed.append(pack_rows(count, np.concatenate(owners), np.concatenate(rows)))
+
+        # Same padded width for all boundaries so lanes can be picked per car
+        width = max(rows.shape[1] for rows, _ in packed)
+        (left_outer, left_counts), (center, center_counts), (right_outer, right_counts) = [
+            (_pad_rows(rows, width), counts) for rows, counts in packed
+        ]
+
+        # Current lane from the same lateral offset rule as detect_lanes
+        in_left = track.get_track_frame(xs, ys)[0] < 0
+        left = np.where(in_left[:, None, None], left_outer, center)
+        right = np.where(in_left[:, None, None], center, right_outer)
+        left_counts = np.where(in_left, left_counts, center_counts)
+        right_counts = np.where(in_left, center_counts, right_counts)
+
+        # Bearing of the detection closest to straight ahead on each side
+        both = (left_counts > 0) & (right_counts > 0)
+        angles = []
+        for lane in (left, right):
+            bearing = np.where(np.isnan(lane[:, :, 2]), np.inf, np.abs(lane[:, :, 2]))
+            angles.append(np.take_along_axis(lane[:, :, 2], bearing.argmin(axis=1)[:, None], axis=1)[:, 0]
+                          if width else np.full(count, np.nan))
+        lane_center_offset = np.where(both, (angles[1] + angles[0]) / 2, np.nan)
+
+        return LaneDetectionBatch(
+            as_records(left, DETECTION_DTYPE), as_records(right, DETECTION_DTYPE),
+            as_records(center, DETECTION_DTYPE), left_counts, right_counts, center_counts,
+            np.where(in_left, "LEFT", "RIGHT"), lane_center_offset,
+        )
+
+    def _detect_lane_boundary(self, boundary_points, camera_x, camera_y, camera_angle, out):
+        """Write visible lane boundary points to out, returns their count"""
+        return KERNELS.detect_boundary(
+            boundary_points, camera_x, camera_y, camera_angle,
+            self.min_range, self.max_range, self.field_of_view / 2, out
+        )
+
+    def get_ray_angles(self):
+        """Ray angles relative to the camera heading, evenly spaced across the FOV"""
+        # Rays sit at the centers of equal angular bins, strictly inside the FOV
+        bins = (np.arange(self.num_rays) + 0.5) / self.num_rays
+        return (bins - 0.5) * self.field_of_view
+
+    def boundary_grid(self, track, offset):
+        """SegmentGrid the sensing queries use for a boundary, None when the boundary has
+        under GRID_MIN_SEGMENTS segments (testing them all is cheaper than a lookup)"""
+        if len(track.get_boundary_segments(offset)[0]) < GRID_MIN_SEGMENTS:
+            return None
+        return track.get_boundary_grid(offset, self.max_range / 2)
+
+    def _raycast_lane_boundary(self, track, offset, camera_x, camera_y, camera_angle, out):
+        """Intersect the ray fan with a boundary's segments, write hits to out and return their count"""
+        seg_start, seg_end = track.get_boundary_segments(offset)
+        relative_angles = self.get_ray_angles()
+
+        distances = cast_rays(
+            [(camera_x, camera_y)], camera_angle + relative_angles[None, :],
+            seg_start, seg_end, self.min_range, self.max_range, self.boundary_grid(track, offset)
+        )[0]
+
+        hit = np.isfinite(distances)
+        count = int(np.count_nonzero(hit))
+        hit_angles = camera_angle + relative_angles[hit]
+        out[:count, 0] = camera_x + distances[hit] * np.cos(hit_angles)
+        out[:count, 1] = camera_y + distances[hit] * np.sin(hit_angles)
+        out[:count, 2] = relative_angles[hit]
+        return count
+
+    def get_ray_distances(self, track):
+        """Ray-cast ranges of shape (3, num_rays) to the left outer, center and
+        right outer boundaries (inf where a ray hits nothing)"""
+        camera_x, camera_y = self.get_camera_position()
+        ray_angles = self.car.theta + self.get_ray_angles()[None, :]
+
+        return np.concatenate([
+            cast_rays([(camera_x, camera_y)], ray_angles,
+                      *track.get_boundary_segments(offset),
+                      self.min_range, self.max_range, self.boundary_grid(track, offset))
+            for offset in (-track.lane_width, 0, track.lane_width)
+        ])
+
+    def get_projection_matrix(self):
+        """Return the 3x4 pinhole projection matrix K [R | -R c] for the current pose"""
+        # Intrinsics: square pixels, focal length from the horizontal FOV
+        focal = (self.image_width / 2) / np.tan(self.field_of_view / 2)
+        intrinsics = np.array([
+            [focal, 0.0, self.image_width / 2],
+            [0.0, focal, self.image_height / 2],
+            [0.0, 0.0, 1.0],
+        ])
+
+        # Camera axes in world frame: x right, y down, z forward (level with the road)
+        cos_t, sin_t = np.cos(self.car.theta), np.sin(self.car.theta)
+        rotation = np.array([
+            [sin_t, -cos_t, 0.0],
+            [0.0, 0.0, -1.0],
+            [cos_t, sin_t, 0.0],
+        ])
+
+        camera_x, camera_y = self.get_camera_position()
+        center = np.array([camera_x, camera_y, self.car.hood_height])
+
+        return intrinsics @ np.hstack([rotation, -(rotation @ center)[:, None]])
+
+    def project_points(self, points, heights=None, near=1.0):
+        """Project world points into image pixel coordinates.
+
+        points: (N, 2) ground positions; (N, 3) rows and DETECTION_DTYPE arrays
+        are also accepted, the bearing being ignored.
+        heights: optional (N,) world z per point (default 0, on the road).
+        Returns (pixels (M, 2), depths (M,), mask (N,)) where mask selects the
+        input points that land inside the image in front of the camera.
+        """
+        if getattr(points, "dtype", None) is not None and points.dtype.names:
+            points = np.column_stack([points["x"], points["y"]])
+        points = np.asarray(points, dtype=float)
+        if points.size == 0:
+            points = points.reshape(0, 2)
+        count = len(points)
+
+        homogeneous = np.ones((count, 4))
+        homogeneous[:, :2] = points[:, :2]
+        homogeneous[:, 2] = 0.0 if heights is None else heights
+
+        projected = homogeneous @ self.get_projection_matrix().T
+        depths = projected[:, 2]
+
+        in_front = depths > near
+        safe_depths = np.where(in_front, depths, 1.0)
+        u = projected[:, 0] / safe_depths
+        v = projected[:, 1] / safe_depths
+
+        mask = (in_front & (u >= 0) & (u < self.image_width) &
+                (v >= 0) & (v < self.image_height))
+        pixels = np.stack([u[mask], v[mask]], axis=1)
+
+        return pixels, depths[mask], mask
+
+    def project_lane_boundaries(self, track):
+        """Project the full lane boundaries into the image (no rendering needed).
+
+        Returns {"left": ..., "center": ..., "right": ...}, each a
+        (pixels, depths, mask) tuple as returned by project_points.
+        """
+        offsets = {"left": -track.lane_width, "center": 0, "right": track.lane_width}
+        return {
+            name: self.project_points(track.get_boundary_segments(offset)[0])
+            for name, offset in offsets.items()
+        }
+
+    def _calculate_lane_position(self, point_data):
+        """Calculate lane position (angle only)"""
+        return point_data["bearing"]
+
+    def _get_lateral_offset_from_track_center(self, track, advance=True):
+        """Calculate lateral offset from track centerline"""
+        if track.distance_field is not None:
+            return float(track.distance_field.lateral_offset(self.car.x, self.car.y))
+
+        if self.tracker is not None:
+            closest_idx = self.tracker.nearest_centerline_vertex(track, self.car.x, self.car.y, advance)
+        else:
+            closest_idx = KERNELS.nearest_vertex(track.get_boundary_segments(0)[0], self.car.x, self.car.y)
+
+        p_curr = track.centerline[closest_idx]
+        p_next = track.centerline[(closest_idx + 1) % len(track.centerline)]
+
+        dx = p_next[0] - p_curr[0]
+        dy = p_next[1] - p_curr[1]
+        track_angle = np.arctan2(dy, dx)
+
+        to_car_x = self.car.x - p_curr[0]
+        to_car_y = self.car.y - p_curr[1]
+
+        perp_angle = track_angle + np.pi / 2
+        lateral_offset = (to_car_x * np.cos(perp_angle) +
+                         to_car_y * np.sin(perp_angle))
+
+        return lateral_offset
+
+    def _calculate_lane_tracking_errors(self, left_points, right_points, advance=True):
+        """Calculate lateral offset and heading error, None when a lane is missing"""
+        if len(left_points) == 0 or len(right_points) == 0:
+            if self.tracker is not None:
+                self.tracker.lose(advance)
+            return None
+
+        # Bearing of the detection closest to straight ahead on each side
+        left_angle = left_points["bearing"][np.argmin(np.abs(left_points["bearing"]))]
+        right_angle = right_points["bearing"][np.argmin(np.abs(right_points["bearing"]))]
+
+        lane_center_offset = (right_angle + left_angle) / 2
+        lane_heading_error = lane_center_offset
+
+        if self.tracker is not None:
+            return self.tracker.smooth(lane_center_offset, lane_heading_error, advance)
+        return lane_center_offset, lane_heading_error
@@ -0,0 +1,356 @@
+"""Simulation in its own process, publishing snapshots through shared memory
+
+The interactive loop can run physics, sensing and control in a child process
+(`python -m robotics_lab --sim-process`), so a slow frame or a vsync stall in
+the renderer no longer delays the control loop. The child steps at a fixed
+rate on deadlines and publishes every tick into a SnapshotBuffer. The renderer
+copies the newest snapshot into mirror objects (a Car, a SnapshotCamera and a
+PurePursuitLKA) that the existing renderers, HUD and minimap read as usual.
+Keyboard input goes the other way through an InputBlock.
+
+Both blocks live in multiprocessing.shared_memory and each has a single
+writer. Snapshots are handed over with a multiprocessing.Lock, held only to
+swap slot indices, so neither side waits on the other's copy; the input
+block holds independent 8-byte values and needs none. Python has no atomic
+operations on shared memory that order the slot's contents before its index
+on every CPU, so the lock stays; both sides measure how long they wait for
+it (benchmarks/bench_snapshots.py).
+
+The child imports this module and the simulation core only: nothing here or
+in the modules it imports loads pygame or OpenGL. Spawn re-runs a launching
+script (not a package's __main__) in the child as __mp_main__, so
+robotics_lab_3d.py imports the app under its main guard.
+"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .car import Car
+from .config import FPS
+from .controllers import PurePursuitLKA
+from .sensors import DETECTION_DTYPE, CameraSensor, LaneTracker, as_records, as_rows
+from .track import SaoPauloTrack
+
+LANES = ("UNKNOWN", "LEFT", "RIGHT")  # CameraSensor.current_lane values, by code
+
+INPUT_DTYPE = np.dtype([
+    ("throttle", np.float64),
+    ("steer", np.float64),
+    ("toggles", np.int64),  # LKA toggle requests so far; the child toggles on every increment
+    ("quit", np.int64),
+])
+
+
+def snapshot_dtype(capacity):
+    """One published tick with room for `capacity` detections per lane boundary"""
+    return np.dtype([
+        ("tick", np.int64),
+        ("time", np.float64),  # Simulated seconds
+        ("car", np.float64, 5),  # x, y, theta, velocity, steering_angle
+        ("lka_active", np.int64),
+        ("lookahead", np.float64, 3),  # x, y, distance; nan before LKA has steered
+        ("lanes", np.int64, 3),  # left detected, right detected, current lane code
+        ("errors", np.float64, 2),  # lane_center_offset, lane_heading_error
+        ("counts", np.int64, 3),  # Detections in left, right, center
+        ("detections", np.float64, (3, capacity, 3)),
+        ("collisions", np.int64),  # Off-track events (ticks that leave the track)
+        ("work_time", np.float64),  # Seconds of work in this tick
+        ("lock_wait", np.float64, 2),  # Writer's longest and total wait for the lock before this tick
+    ])
+
+
+class SnapshotBuffer:
+    """Single-writer, single-reader triple buffer of simulation snapshots in shared memory
+
+    Three slots: one the writer fills, one the reader copies from and the
+    newest complete snapshot between them. Each side swaps its own slot with
+    the newest one under `lock`, which only guards those few indices; the
+    lock's acquire and release order the slot's contents before the handoff
+    on every platform, so a reader never sees a half-written snapshot. The
+    writer never waits for a copy and the reader never sees a slot being
+    written. Each side only waits while the other swaps two indices, or
+    longer if the other is preempted inside; lock_waits, lock_wait_total
+    and lock_wait_max record this side's waits.
+
+    The owner creates the block and the lock; the other process attaches with
+    the block's name and the same lock (passed to it when it is spawned).
+    """
+    def __init__(self, capacity, name=None, lock=None):
+        self.capacity = capacity
+        self.dtype = snapshot_dtype(capacity)
+        size = 16 + 3 * self.dtype.itemsize
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+            self.lock = multiprocessing.Lock() if lock is None else lock
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            self.lock = lock
+        # Slot of the newest snapshot and how many ticks have been published (0: none yet)
+        self.state = np.ndarray((2,), np.int64, buffer=self.memory.buf)
+        self.slots = np.ndarray((3,), self.dtype, buffer=self.memory.buf, offset=16)
+        if self.owner:
+            self.state[:] = (0, 0)
+        # This process's own slot: the writer fills slot 1 first, the reader holds slot 2
+        self.write_slot = 1
+        self.read_slot = 2
+        self.read_count = 0
+        self.lock_waits = 0
+        self.lock_wait_total = 0.0
+        self.lock_wait_max = 0.0
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def _acquire(self, timeout=None):
+        """Take the lock and record the wait, False if it is not free within timeout"""
+        start = time.perf_counter()
+        acquired = self.lock.acquire(timeout=timeout)
+        wait = time.perf_counter() - start
+        self.lock_waits += 1
+        self.lock_wait_total += wait
+        self.lock_wait_max = max(self.lock_wait_max, wait)
+        return acquired
+
+    def publish(self, tick, sim_time, car, camera, lka, detections, collisions, work_time):
+        """Write one tick; detections is camera.update's (left, right, center)"""
+        slot = self.slots[self.write_slot]  # Structured scalar viewing shared memory
+        slot["tick"] = tick
+        slot["time"] = sim_time
+        slot["car"] = (car.x, car.y, car.theta, car.velocity, car.steering_angle)
+        slot["lka_active"] = lka.active
+        if lka.lookahead_point is None:
+            slot["lookahead"] = np.nan
+        else:
+            slot["lookahead"] = (*lka.lookahead_point, lka.lookahead_distance)
+        slot["lanes"] = (camera.left_lane_detected, camera.right_lane_detected, LANES.index(camera.current_lane))
+        slot["errors"] = (camera.lane_center_offset, camera.lane_heading_error)
+        for k, lane in enumerate(detections):
+            count = min(len(lane), self.capacity)
+            slot["counts"][k] = count
+            slot["detections"][k, :count] = as_rows(lane[:count])
+        slot["collisions"] = collisions
+        slot["work_time"] = work_time
+        slot["lock_wait"] = (self.lock_wait_max, self.lock_wait_total)
+        self._acquire()
+        try:
+            self.write_slot, self.state[0] = int(self.state[0]), self.write_slot
+            self.state[1] = tick + 1
+        finally:
+            self.lock.release()
+
+    def latest(self, out=None, timeout=0.1):
+        """Copy of the newest snapshot (into `out` if given)
+
+        None if nothing is published yet, or if the lock is not free within
+        `timeout` (a writer killed while holding it).
+        """
+        if not self._acquire(timeout):
+            return None
+        try:
+            count = int(self.state[1])
+            if count > self.read_count:
+                # Take the newest slot; the writer gets the one read before
+                self.read_slot, self.state[0] = int(self.state[0]), self.read_slot
+                self.read_count = count
+        finally:
+            self.lock.release()
+        if self.read_count == 0:
+            return None
+        out = np.zeros((), self.dtype) if out is None else out
+        out[...] = self.slots[self.read_slot]  # Only this reader uses the slot until its next swap
+        return out
+
+    def close(self):
+        """Detach; the owner also frees the block"""
+        self.state = self.slots = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class InputBlock:
+    """Latest driver inputs in shared memory, written by the renderer process
+
+    Every field is a single aligned 8-byte value, so a reader never sees half
+    of a field; throttle and steer may be one tick apart, which is harmless.
+    """
+    def __init__(self, name=None):
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=INPUT_DTYPE.itemsize)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.values = np.ndarray((), INPUT_DTYPE, buffer=self.memory.buf)
+        if self.owner:
+            self.values[...] = (0.0, 0.0, 0, 0)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def close(self):
+        """Detach; the owner also frees the block"""
+        self.values = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class SnapshotCamera(CameraSensor):
+    """CameraSensor that reports the latest snapshot's detections instead of detecting"""
+    __slots__ = ()
+
+    def update(self, track):
+        return self.detections
+
+    def detect_lanes(self, track):
+        return self.detections
+
+
+def apply_snapshot(snapshot, car, camera, lka):
+    """Copy a snapshot into mirror objects for rendering
+
+    The camera's lanes are views into `snapshot`, so keep it alive (and
+    unchanged) while they are drawn.
+    """
+    car.x, car.y, car.theta, car.velocity, car.steering_angle = snapshot["car"].tolist()
+    lka.active = bool(snapshot["lka_active"])
+    lookahead = snapshot["lookahead"]
+    if np.isnan(lookahead[0]):
+        lka.lookahead_point = lka.lookahead_distance = None
+    else:
+        lka.lookahead_point = (float(lookahead[0]), float(lookahead[1]))
+        lka.lookahead_distance = float(lookahead[2])
+    left_detected, right_detected, lane = snapshot["lanes"].tolist()
+    camera.left_lane_detected = bool(left_detected)
+    camera.right_lane_detected = bool(right_detected)
+    camera.current_lane = LANES[lane]
+    camera.lane_center_offset, camera.lane_heading_error = snapshot["errors"].tolist()
+    camera.detections = tuple(as_records(snapshot["detections"][k, :count], DETECTION_DTYPE)
+                                  for k, count in enumerate(snapshot["counts"].tolist()))
+
+
+def run_simulation(buffer_name, buffer_lock, input_name, capacity, rate=FPS, lane=1, lookahead_mode="nearest",
+                   track_lanes=False, track_offset=(50, 50)):
+    """Child process body: step the car at `rate` Hz and publish every tick
+
+    Ticks are scheduled on absolute deadlines; if the process falls more than
+    five ticks behind it skips ahead instead of running a catch-up burst.
+    A collision counts once when the car leaves the track, not on every tick
+    it spends off it.
+    Exits when the input block asks to quit or the parent process dies.
+    """
+    snapshots = SnapshotBuffer(capacity, name=buffer_name, lock=buffer_lock)
+    inputs = InputBlock(name=input_name)
+    parent = multiprocessing.parent_process()
+
+    track = SaoPauloTrack(*track_offset)
+    car = Car(*track.get_start_position(lane_number=lane))
+    car.track = track
+    camera = CameraSensor(car)
+    if track_lanes:
+        camera.tracker = LaneTracker()
+    lka = PurePursuitLKA(car, camera, lookahead_mode=lookahead_mode)
+
+    dt = 1.0 / rate
+    tick = 0
+    toggles = 0
+    collisions = 0
+    colliding = False
+    deadline = time.perf_counter()
+    try:
+        while not inputs.values["quit"] and (parent is None or parent.is_alive()):
+            start = time.perf_counter()
+            requested = int(inputs.values["toggles"])
+            while toggles < requested:
+                lka.toggle()
+                toggles += 1
+
+            # Detect once; steer on the same detection and publish the tick's state
+            detections = camera.update(track)
+            lka_steering = lka.calculate_steering(track, detections) if lka.active else None
+            snapshots.publish(tick, tick * dt, car, camera, lka, detections, collisions, time.perf_counter() - start)
+
+            car.drive(dt, float(inputs.values["throttle"]), float(inputs.values["steer"]), lka_steering, lka)
+            if not car.is_on_track(track):
+                car.handle_collision()
+                if not colliding:
+                    collisions += 1
+                colliding = True
+            else:
+                colliding = False
+            tick += 1
+
+            deadline += dt
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -5 * dt:
+                deadline = time.perf_counter()
+    finally:
+        inputs.close()
+        snapshots.close()
+
+
+class SimulationProcess:
+    """Owns the shared memory blocks and the child process running run_simulation"""
+    def __init__(self, capacity, rate=FPS, **options):
+        # Spawn, not fork: the parent may already hold SDL and OpenGL state
+        context = multiprocessing.get_context("spawn")
+        self.snapshots = SnapshotBuffer(capacity, lock=context.Lock())
+        self.inputs = InputBlock()
+        # Reader's copies, double-buffered: mirrors keep viewing the last good
+        # snapshot while the next one is copied (or a read fails)
+        self.snapshot = np.zeros((), self.snapshots.dtype)
+        self.scratch = np.zeros((), self.snapshots.dtype)
+        self.process = context.Process(
+            target=run_simulation, name="robotics-lab-simulation", daemon=True,
+            args=(self.snapshots.name, self.snapshots.lock, self.inputs.name, capacity, rate), kwargs=options,
+        )
+
+    def start(self):
+        self.process.start()
+
+    def send_inputs(self, throttle, steer):
+        self.inputs.values["throttle"] = throttle
+        self.inputs.values["steer"] = steer
+
+    def toggle_lka(self):
+        self.inputs.values["toggles"] += 1
+
+    def latest(self):
+        """Newest snapshot (one of two reused arrays), None before the first tick or after a failed read"""
+        if self.snapshots.latest(self.scratch) is None:
+            return None
+        self.snapshot, self.scratch = self.scratch, self.snapshot
+        return self.snapshot
+
+    def wait_for_snapshot(self, timeout=10.0):
+        """Block until the child publishes (it imports and builds the track first); None on timeout"""
+        limit = time.perf_counter() + timeout
+        while time.perf_counter() < limit and self.process.is_alive():
+            snapshot = self.latest()
+            if snapshot is not None:
+                return snapshot
+            time.sleep(0.01)
+        return None
+
+    def stop(self, timeout=2.0):
+        """Ask the child to quit, wait for it and free the shared memory; returns the last snapshot"""
+        self.inputs.values["quit"] = 1
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        last = self.latest()
+        last = None if last is None else last.copy()
+        self.inputs.close()
+        self.snapshots.close()
+        return last
@@ -0,0 +1,306 @@
+"""Live telemetry for local dashboards: per-tick state as JSON lines over TCP or a Unix socket
+
+`python -m robotics_lab --telemetry tcp:127.0.0.1:8765` (or
+`unix:/tmp/robotics_lab.sock`) starts a TelemetryPublisher. Every tick the
+main loop hands it the car state, LKA status and that tick's lane
+detections; each subscriber receives them as one JSON object per line:
+
+    {"tick": 812, "time": 13.53,
+     "car": {"x": 811.2, "y": 648.9, "theta": -2.11, "velocity": 60.0, "steering_angle": 0.04},
+     "lka": {"active": true, "lookahead": [760.3, 571.8], "lookahead_distance": 92.1},
+     "lanes": {"current": "LEFT", "left_detected": true, "right_detected": true,
+               "center_offset": 0.012, "heading_error": 0.012},
+     "detections": {"left": {"count": 2, "nearest": [759.4, 579.2, -0.24]},
+                    "right": {"count": 3, "nearest": [800.0, 550.0, 0.23]},
+                    "center": {"count": 3, "nearest": [800.0, 550.0, 0.23]}}}
+
+"detections" summarizes the three arrays of camera.update (the current lane's left
+and right boundaries and the track centerline): how many points each has
+and the one closest to the camera as [x, y, bearing], null when empty.
+
+The server runs on an asyncio loop in a background thread. publish() only
+copies a few numbers and the detection rows and appends them to a bounded inbox, so the tick never
+waits on encoding or sockets. Each subscriber has its own bounded queue;
+when a slow consumer falls behind, its oldest records are dropped (and
+counted) instead of holding up the others or the simulation.
+
+`python -m robotics_lab.telemetry tcp:127.0.0.1:8765` prints a live stream.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import threading
+from collections import deque
+
+import numpy as np
+
+QUEUE_SIZE = 256  # Records buffered per subscriber before the oldest are dropped
+INBOX_SIZE = 1024  # Records handed over by the main loop and not yet fanned out
+
+
+def parse_endpoint(text):
+    """"tcp:HOST:PORT", "tcp:PORT" (loopback) or "unix:PATH" to ("tcp", host, port) or ("unix", path)"""
+    kind, _, address = text.partition(":")
+    if kind == "unix" and address:
+        return "unix", address
+    if kind == "tcp" and address:
+        host, _, port = address.rpartition(":")
+        if port.isdigit():
+            return "tcp", host or "127.0.0.1", int(port)
+    raise ValueError(f"Bad telemetry endpoint {text!r}: use tcp:HOST:PORT, tcp:PORT or unix:PATH")
+
+
+def _finite(value):
+    """value as a float, None for NaN and infinities (JSON has no spelling for them)"""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+DETECTION_CLASSES = ("left", "right", "center")  # camera.update's arrays, in order
+
+
+def detection_summary(points, camera_x, camera_y):
+    """Count of a detection array and its point closest to the camera as [x, y, bearing] (None if empty)"""
+    if len(points) == 0:
+        return {"count": 0, "nearest": None}
+    nearest = points[np.argmin((points["x"] - camera_x)**2 + (points["y"] - camera_y)**2)]
+    return {"count": len(points),
+            "nearest": [float(nearest["x"]), float(nearest["y"]), float(nearest["bearing"])]}
+
+
+def state_values(tick, time, car, camera, lka, detections):
+    """The per-tick fields as a flat tuple of plain Python values (cheap to take on the main loop)
+
+    detections is this tick's (left, right, center) from camera.update;
+    the arrays are copied, since the camera reuses their buffers next tick.
+    """
+    lookahead = lka.lookahead_point
+    camera_x, camera_y = camera.get_camera_position()
+    return (int(tick), float(time),
+            float(car.x), float(car.y), float(car.theta), float(car.velocity), float(car.steering_angle),
+            bool(lka.active),
+            None if lookahead is None else (float(lookahead[0]), float(lookahead[1])),
+            _finite(lka.lookahead_distance),
+            camera.current_lane, bool(camera.left_lane_detected), bool(camera.right_lane_detected),
+            _finite(camera.lane_center_offset), _finite(camera.lane_heading_error),
+            float(camera_x), float(camera_y), tuple(points.copy() for points in detections))
+
+
+def state_record(values):
+    """A state_values tuple as the nested telemetry record (on the publisher thread)"""
+    (tick, time, x, y, theta, velocity, steering_angle, active, lookahead, lookahead_distance,
+     lane, left_detected, right_detected, center_offset, heading_error,
+     camera_x, camera_y, detections) = values
+    return {
+        "tick": tick,
+        "time": time,
+        "car": {"x": x, "y": y, "theta": theta, "velocity": velocity, "steering_angle": steering_angle},
+        "lka": {"active": active, "lookahead": lookahead, "lookahead_distance": lookahead_distance},
+        "lanes": {"current": lane, "left_detected": left_detected, "right_detected": right_detected,
+                  "center_offset": center_offset, "heading_error": heading_error},
+        "detections": {name: detection_summary(points, camera_x, camera_y)
+                       for name, points in zip(DETECTION_CLASSES, detections)},
+    }
+
+
+class Subscriber:
+    """One connected client: its bounded queue of encoded lines and a wakeup for its writer task"""
+    __slots__ = ("writer", "queue", "ready", "sent", "dropped")
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, line):
+        """Queue a line, dropping the oldest one when the queue is full"""
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(line)
+        self.ready.set()
+
+
+class TelemetryPublisher:
+    """Serves per-tick telemetry to local subscribers from an asyncio loop in a daemon thread
+
+    Only publish() is called from the simulation thread. It does nothing
+    while no one is connected; otherwise it appends a tuple to the inbox (a
+    deque, safe to share between the two threads) and wakes the loop at most
+    once per batch. The loop encodes each record once and pushes it to every
+    subscriber's queue.
+    """
+    def __init__(self, endpoint, queue_size=QUEUE_SIZE):
+        self.endpoint = parse_endpoint(endpoint) if isinstance(endpoint, str) else endpoint
+        self.queue_size = queue_size
+        self.inbox = deque(maxlen=INBOX_SIZE)
+        self.subscribers = []
+        self.client_tasks = set()
+        self.published = 0
+        # Each counter has one writer thread: the loop adds a subscriber's drops
+        # when it disconnects, publish() counts inbox overflow
+        self.dropped = 0
+        self.inbox_dropped = 0
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.wake_pending = False
+        self.started = threading.Event()
+        self.error = None
+
+    def start(self, timeout=5.0):
+        """Start the server thread and wait until it listens; raises OSError if it cannot bind"""
+        self.thread = threading.Thread(target=self._run, name="robotics-lab-telemetry", daemon=True)
+        self.thread.start()
+        if not self.started.wait(timeout):
+            raise OSError("Telemetry server did not start")
+        if self.error is not None:
+            raise self.error
+
+    def address(self):
+        """Where subscribers connect, as "tcp:HOST:PORT" or "unix:PATH" (the bound port for tcp:...:0)"""
+        if self.endpoint[0] == "unix":
+            return f"unix:{self.endpoint[1]}"
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"tcp:{host}:{port}"
+
+    def publish(self, tick, time, car, camera, lka, detections):
+        """Hand this tick's state to the publisher thread (no-op without subscribers)
+
+        detections is this tick's (left, right, center) from camera.update.
+        """
+        if not self.subscribers:
+            return
+        if len(self.inbox) == INBOX_SIZE:
+            self.inbox_dropped += 1  # The publisher thread is starved; the oldest record goes for everyone
+        self.inbox.append(state_values(tick, time, car, camera, lka, detections))
+        if not self.wake_pending:
+            self.wake_pending = True
+            self.loop.call_soon_threadsafe(self._fan_out)
+
+    def stop(self, timeout=2.0):
+        """Disconnect subscribers and stop the thread; returns (published, dropped) record counts"""
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.stopping.set)
+            self.thread.join(timeout)
+        return self.published, self.dropped + self.inbox_dropped
+
+    # --- Publisher thread ---
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self.stopping = asyncio.Event()
+        try:
+            if self.endpoint[0] == "unix":
+                if os.path.exists(self.endpoint[1]):
+                    os.unlink(self.endpoint[1])  # Stale socket from an earlier run
+                self.server = await asyncio.start_unix_server(self._serve_client, self.endpoint[1])
+            else:
+                self.server = await asyncio.start_server(self._serve_client, *self.endpoint[1:])
+        except OSError as e:
+            self.error = e
+            self.started.set()
+            return
+        self.started.set()
+
+        await self.stopping.wait()
+        self.server.close()
+        # Wake every writer task to finish on its own (a stalled drain() fails on the aborted socket)
+        for subscriber in self.subscribers:
+            subscriber.writer.transport.abort()
+            subscriber.ready.set()
+        await asyncio.gather(*self.client_tasks, return_exceptions=True)
+        await self.server.wait_closed()
+        if self.endpoint[0] == "unix" and os.path.exists(self.endpoint[1]):
+            os.unlink(self.endpoint[1])
+
+    def _fan_out(self):
+        """Encode the inbox once per record and queue it for every subscriber"""
+        # Cleared first: a record appended after this point schedules another call
+        self.wake_pending = False
+        while self.inbox:
+            values = self.inbox.popleft()
+            line = (json.dumps(state_record(values), separators=(",", ":")) + "\n").encode()
+            for subscriber in self.subscribers:
+                subscriber.push(line)
+            self.published += 1
+
+    async def _serve_client(self, reader, writer):
+        """Writer task of one subscriber: send its queue as it fills, until it disconnects"""
+        subscriber = Subscriber(writer, self.queue_size)
+        self.subscribers = self.subscribers + [subscriber]  # Replaced, never mutated: publish() reads it
+        task = asyncio.current_task()
+        self.client_tasks.add(task)
+        try:
+            while not self.stopping.is_set():
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.queue:
+                    writer.write(subscriber.queue.popleft())
+                    subscriber.sent += 1
+                    # Waits only for this subscriber's socket; the others keep streaming
+                    await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.subscribers = [s for s in self.subscribers if s is not subscriber]
+            self.client_tasks.discard(task)
+            self.dropped += subscriber.dropped
+            writer.close()
+
+
+async def _print_stream(endpoint, limit):
+    """Connect to a publisher and print its records until it closes (or after `limit` records)"""
+    if endpoint[0] == "unix":
+        reader, writer = await asyncio.open_unix_connection(endpoint[1])
+    else:
+        reader, writer = await asyncio.open_connection(*endpoint[1:])
+    count = 0
+    while limit is None or count < limit:
+        line = await reader.readline()
+        if not line:
+            break
+        record = json.loads(line)
+        car, lka, lanes, detections = record["car"], record["lka"], record["lanes"], record["detections"]
+        print(f"tick {record['tick']:6d}  t {record['time']:7.2f}s  v {car['velocity']:6.1f}  "
+              f"steer {car['steering_angle']:+.3f}  LKA {'on ' if lka['active'] else 'off'}  "
+              f"lane {lanes['current']:<7} detections L {detections['left']['count']:2d} "
+              f"R {detections['right']['count']:2d} C {detections['center']['count']:2d}")
+        count += 1
+    writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the telemetry stream of a running simulation")
+    parser.add_argument("endpoint", help="tcp:HOST:PORT, tcp:PORT or unix:PATH")
+    parser.add_argument("--count", type=int, default=None, help="stop after this many records")
+    args = parser.parse_args(argv)
+    try:
+        endpoint = parse_endpoint(args.endpoint)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(_print_stream(endpoint, args.count))
+    except (ConnectionError, FileNotFoundError) as e:
+        print(f"Cannot connect to {args.endpoint}: {e}")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,612 @@
+"""Track geometry and the signed distance field raster"""
+
+import hashlib
+import os
+from bisect import bisect_left
+
+import numpy as np
+
+from .kernels import KERNELS
+
+# Boundaries with fewer segments are scanned whole by the batch queries: a
+# grid lookup costs more than testing a few hundred points
+GRID_MIN_SEGMENTS = 256
+
+
+def dash_segments(points, dash_length=20, gap_length=15):
+    """Start/end points (M, 2, 2) of a dash pattern along a closed polyline
+
+    The pattern runs by arc length from the first vertex and is not wrapped at
+    the end; dashes are split where they cross a vertex, so every dash lies on
+    one straight segment.
+    """
+    points = np.asarray(points, dtype=float)
+    following = np.roll(points, -1, axis=0)
+    seg_length = np.hypot(*(following - points).T)
+    vertex_s = np.concatenate([[0.0], np.cumsum(seg_length)])
+    total_length = vertex_s[-1]
+
+    # Breakpoints: vertices plus every dash start/end, in arc length
+    period = dash_length + gap_length
+    starts = np.arange(0.0, total_length, period)
+    ends = np.minimum(starts + dash_length, total_length)
+    breaks = np.unique(np.concatenate([vertex_s, starts, ends]))
+
+    # Keep pieces whose midpoint falls inside a dash
+    lo, hi = breaks[:-1], breaks[1:]
+    mid = (lo + hi) / 2
+    keep = (hi > lo) & (np.mod(mid, period) < dash_length)
+    lo, hi, mid = lo[keep], hi[keep], mid[keep]
+
+    segment = np.clip(np.searchsorted(vertex_s, mid, side="right") - 1, 0, len(points) - 1)
+    direction = (following - points)[segment] / seg_length[segment, None]
+    origin = points[segment]
+    start = origin + direction * (lo - vertex_s[segment])[:, None]
+    end = origin + direction * (hi - vertex_s[segment])[:, None]
+    return np.stack([start, end], axis=1)
+
+
+class TrackDistanceField:
+    """Raster of signed distance to the road edge around a closed centerline
+
+    Grid nodes store the signed distance to the road edge (negative on the
+    road), the signed lateral offset from the centerline and the index of the
+    nearest centerline segment. Queries are O(1) bilinear lookups that work on
+    scalars or arrays of any shape. Points outside the grid are clamped to its
+    border, nodes farther than the band around the road read as band distance.
+    """
+    def __init__(self, origin, resolution, edge_distance, lateral, segment, fingerprint=""):
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = float(resolution)
+        self.edge_distance = edge_distance
+        self.lateral = lateral
+        self.segment = segment
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def fingerprint_for(centerline, track_width, resolution, margin):
+        """Identify the inputs a field was built from (used to validate disk caches)"""
+        digest = hashlib.sha1(np.asarray(centerline, dtype=float).tobytes())
+        digest.update(repr((float(track_width), float(resolution), float(margin))).encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, centerline, track_width, resolution=2.0, margin=None):
+        """Rasterize the field for a closed centerline"""
+        margin = track_width if margin is None else margin
+        band = track_width / 2 + margin
+        points = np.asarray(centerline, dtype=float)
+        next_points = np.roll(points, -1, axis=0)
+
+        origin = points.min(axis=0) - band
+        shape_x, shape_y = (np.ceil((points.max(axis=0) + band - origin) / resolution).astype(int) + 1)
+
+        distance = np.full((shape_y, shape_x), np.inf)
+        lateral = np.full((shape_y, shape_x), band)
+        segment = np.full((shape_y, shape_x), -1, dtype=np.int32)
+
+        # Each segment only updates the nodes within the band around it
+        for idx, (start, end) in enumerate(zip(points, next_points)):
+            seg_dx, seg_dy = end - start
+            seg_len_sq = seg_dx**2 + seg_dy**2
+            if seg_len_sq == 0:
+                continue
+
+            lo = np.floor((np.minimum(start, end) - band - origin) / resolution).astype(int)
+            hi = np.ceil((np.maximum(start, end) + band - origin) / resolution).astype(int) + 1
+            lo = np.maximum(lo, 0)
+            hi = np.minimum(hi, (shape_x, shape_y))
+
+            grid_x = origin[0] + np.arange(lo[0], hi[0]) * resolution - start[0]
+            grid_y = origin[1] + np.arange(lo[1], hi[1]) * resolution - start[1]
+            rel_x, rel_y = np.meshgrid(grid_x, grid_y)
+
+            along = np.clip((rel_x * seg_dx + rel_y * seg_dy) / seg_len_sq, 0.0, 1.0)
+            seg_dist = np.hypot(rel_x - along * seg_dx, rel_y - along * seg_dy)
+            side = np.where(seg_dx * rel_y - seg_dy * rel_x >= 0, 1.0, -1.0)
+
+            window = (slice(lo[1], hi[1]), slice(lo[0], hi[0]))
+            closer = seg_dist < distance[window]
+            distance[window][closer] = seg_dist[closer]
+            lateral[window][closer] = (side * seg_dist)[closer]
+            segment[window][closer] = idx
+
+        distance = np.minimum(distance, band)
+        fingerprint = cls.fingerprint_for(centerline, track_width, resolution, margin)
+        return cls(origin, resolution, (distance - track_width / 2).astype(np.float32),
+                   lateral.astype(np.float32), segment, fingerprint)
+
+    def save(self, path):
+        """Write the raster to an .npz file"""
+        np.savez_compressed(path, origin=self.origin, resolution=self.resolution,
+                            edge_distance=self.edge_distance, lateral=self.lateral,
+                            segment=self.segment, fingerprint=self.fingerprint)
+
+    @classmethod
+    def load(cls, path):
+        """Read a raster written by save()"""
+        with np.load(path) as data:
+            return cls(data["origin"], data["resolution"], data["edge_distance"],
+                       data["lateral"], data["segment"], str(data["fingerprint"]))
+
+    def _grid_coordinates(self, xs, ys):
+        """Continuous grid coordinates of world points, clamped to the raster"""
+        shape_y, shape_x = self.edge_distance.shape
+        grid_x = np.clip((np.asarray(xs, dtype=float) - self.origin[0]) / self.resolution, 0, shape_x - 1)
+        grid_y = np.clip((np.asarray(ys, dtype=float) - self.origin[1]) / self.resolution, 0, shape_y - 1)
+        return grid_x, grid_y
+
+    def _bilinear(self, grid, xs, ys):
+        """Bilinearly interpolate a raster at world points"""
+        grid_x, grid_y = self._grid_coordinates(xs, ys)
+        shape_y, shape_x = grid.shape
+        ix = np.minimum(grid_x.astype(int), shape_x - 2)
+        iy = np.minimum(grid_y.astype(int), shape_y - 2)
+        tx = grid_x - ix
+        ty = grid_y - iy
+
+        top = grid[iy, ix] * (1 - tx) + grid[iy, ix + 1] * tx
+        bottom = grid[iy + 1, ix] * (1 - tx) + grid[iy + 1, ix + 1] * tx
+        return top * (1 - ty) + bottom * ty
+
+    def signed_distance(self, xs, ys):
+        """Signed distance to the road edge (negative on the road)"""
+        return self._bilinear(self.edge_distance, xs, ys)
+
+    def lateral_offset(self, xs, ys):
+        """Signed lateral offset from the centerline"""
+        return self._bilinear(self.lateral, xs, ys)
+
+    def nearest_segment(self, xs, ys):
+        """Index of the nearest centerline segment (-1 beyond the band)"""
+        grid_x, grid_y = self._grid_coordinates(xs, ys)
+        return self.segment[np.rint(grid_y).astype(int), np.rint(grid_x).astype(int)]
+
+
+class SegmentGrid:
+    """Uniform grid over line segments for swept (continuous) collision queries
+
+    Each segment is listed in every cell its bounding box overlaps. Only
+    non-empty cells are stored, as sorted keys with ranges into one segment
+    index array, so memory follows the number of segments rather than the
+    area they cover. A query intersects a moving point's path with the
+    segments in the cells under the path's bounding box only;
+    segments_near gives the candidates around points for sensing.
+
+    Segments are one-sided: a path hits one only when it crosses from the
+    segment's left to its right (walls are oriented with the road on their
+    left), so a point that is already outside can still come back in.
+    """
+    def __init__(self, starts, ends, cell_size):
+        self.starts = np.asarray(starts, dtype=float)
+        self.directions = np.asarray(ends, dtype=float) - self.starts
+        self.cell_size = float(cell_size)
+
+        lo = np.minimum(self.starts, self.starts + self.directions)
+        hi = np.maximum(self.starts, self.starts + self.directions)
+        self.origin = lo.min(axis=0)
+        cell_lo = self._cells(lo)
+        cell_hi = self._cells(hi)
+        self.shape = cell_hi.max(axis=0) + 1
+
+        keys, segment = self._expand(cell_lo, cell_hi)
+        order = np.argsort(keys, kind="stable")
+        self.cell_keys, first = np.unique(keys[order], return_index=True)
+        self.cell_bounds = np.append(first, len(keys))
+        self.cell_segments = segment[order]
+
+        # Plain Python copies for the scalar query, which runs once per car per tick
+        self._origin = self.origin.tolist()
+        self._key_list = self.cell_keys.tolist()
+        self._bound_list = self.cell_bounds.tolist()
+
+    def _cells(self, points):
+        """(N, 2) integer cell coordinates of points"""
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _expand(self, cell_lo, cell_hi):
+        """(key, owner) for every cell of each inclusive [cell_lo, cell_hi] box, owner is the box index"""
+        span = cell_hi - cell_lo + 1
+        counts = span[:, 0] * span[:, 1]
+        owner = np.repeat(np.arange(len(counts)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = cell_lo[owner, 0] + within // span[owner, 1]
+        cell_y = cell_lo[owner, 1] + within % span[owner, 1]
+        return cell_x * self.shape[1] + cell_y, owner
+
+    def _box_segments(self, cell_lo, cell_hi):
+        """(owner, segment) pairs for the segments listed in each inclusive cell box (clipped
+        to the grid), grouped by owner; a segment spanning several cells repeats"""
+        cell_lo = np.maximum(cell_lo, 0)
+        cell_hi = np.minimum(cell_hi, self.shape - 1)
+        inside = (cell_lo <= cell_hi).all(axis=1)
+        keys, owner = self._expand(cell_lo[inside], cell_hi[inside])
+        owner = np.flatnonzero(inside)[owner]
+
+        # Every (owner, cell) pair becomes (owner, segment) pairs for the cell's segments
+        slot = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        found = self.cell_keys[slot] == keys
+        lo = self.cell_bounds[slot[found]]
+        counts = self.cell_bounds[slot[found] + 1] - lo
+        owner = np.repeat(owner[found], counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return owner, self.cell_segments[np.repeat(lo, counts) + within]
+
+    def segments_near(self, xs, ys, radius):
+        """Index arrays (point, segment), sorted by point then segment, of the segments
+        listed in cells within `radius` (per axis) of each point
+
+        A superset of the segments that come within radius of a point; since a
+        segment's start lies in its own cells, also of the starts within radius.
+        """
+        points = np.column_stack([np.ravel(xs), np.ravel(ys)]).astype(float)
+        owner, segment = self._box_segments(self._cells(points - radius), self._cells(points + radius))
+        # Sorted and deduplicated (a sort is cheaper than np.unique's hashing here)
+        pairs = np.sort(owner * len(self.starts) + segment)
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+        return pairs // len(self.starts), pairs % len(self.starts)
+
+    def time_of_impact(self, x0, y0, x1, y1):
+        """Fraction of the way from (x0, y0) to (x1, y1) where the path first crosses a segment,
+        None if it crosses none"""
+        x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)  # NumPy scalars are slow here
+        ox, oy = self._origin
+        size = self.cell_size
+        width, height = self.shape.tolist()
+        cx0 = max(int((min(x0, x1) - ox) // size), 0)
+        cy0 = max(int((min(y0, y1) - oy) // size), 0)
+        cx1 = min(int((max(x0, x1) - ox) // size), width - 1)
+        cy1 = min(int((max(y0, y1) - oy) // size), height - 1)
+
+        candidates = []
+        for cell_x in range(cx0, cx1 + 1):
+            for cell_y in range(cy0, cy1 + 1):
+                key = cell_x * height + cell_y
+                slot = bisect_left(self._key_list, key)
+                if slot < len(self._key_list) and self._key_list[slot] == key:
+                    candidates.append(self.cell_segments[self._bound_list[slot]:self._bound_list[slot + 1]])
+        if not candidates:
+            return None
+
+        segment = np.concatenate(candidates)
+        dx, dy = x1 - x0, y1 - y0
+        best = None
+        for (ax, ay), (ex, ey) in zip(self.starts[segment].tolist(), self.directions[segment].tolist()):
+            # Crossing from the segment's left to its right: path x segment direction > 0
+            denom = dx * ey - dy * ex
+            if denom <= 0:
+                continue
+            wx, wy = ax - x0, ay - y0
+            t = (wx * ey - wy * ex) / denom
+            u = (wx * dy - wy * dx) / denom
+            if 0 <= t <= 1 and 0 <= u <= 1 and (best is None or t < best):
+                best = t
+        return best
+
+    def time_of_impact_batch(self, x0, y0, x1, y1):
+        """time_of_impact for arrays of paths, NaN where a path crosses nothing"""
+        x0, y0, x1, y1 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x0, y0, x1, y1)))
+        impact = np.full(x0.shape, np.inf)
+
+        path, segment = self._box_segments(
+            self._cells(np.column_stack([np.minimum(x0, x1).ravel(), np.minimum(y0, y1).ravel()])),
+            self._cells(np.column_stack([np.maximum(x0, x1).ravel(), np.maximum(y0, y1).ravel()])))
+
+        px, py = x0.ravel()[path], y0.ravel()[path]
+        dx, dy = x1.ravel()[path] - px, y1.ravel()[path] - py
+        ex, ey = self.directions[segment].T
+        wx, wy = self.starts[segment, 0] - px, self.starts[segment, 1] - py
+        denom = dx * ey - dy * ex
+        crossing = denom > 0
+        denom = np.where(crossing, denom, 1.0)
+        t = (wx * ey - wy * ex) / denom
+        u = (wx * dy - wy * dx) / denom
+        hit = crossing & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        np.minimum.at(impact.reshape(-1), path[hit], t[hit])
+        return np.where(np.isinf(impact), np.nan, impact)
+
+
+class SaoPauloTrack:
+    """São Paulo F1 Circuit - identical to original"""
+    def __init__(self, offset_x=100, offset_y=100):
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.lane_width = 50
+        self.track_width = 2 * self.lane_width
+
+        scale = 1.0
+        self.centerline = [
+            (800, 600), (750, 500), (650, 400), (550, 350), (450, 330),
+            (350, 300), (250, 250), (200, 180), (180, 120), (200, 60),
+            (300, 30), (500, 30), (700, 30), (900, 30), (1100, 50),
+            (1150, 100), (1180, 200), (1180, 300), (1180, 400), (1150, 500),
+            (1100, 550), (1000, 600), (900, 600), (800, 600),
+        ]
+
+        self.centerline = [(x * scale + offset_x, y * scale + offset_y)
+                          for x, y in self.centerline]
+
+        # Boundary segment arrays, built on first use (track is static)
+        self._segment_cache = {}
+
+        # Optional raster for O(1) on-track/offset queries (see build_distance_field)
+        self.distance_field = None
+
+    def build_distance_field(self, resolution=2.0, margin=None, cache_path=None):
+        """Rasterize the signed distance field once, optionally cached on disk
+
+        resolution: grid spacing in world units
+        margin: how far beyond the road edge the field is exact (default track width)
+        cache_path: .npz file reused when it matches this track and settings
+        """
+        margin = self.track_width if margin is None else margin
+        fingerprint = TrackDistanceField.fingerprint_for(
+            self.centerline, self.track_width, resolution, margin
+        )
+
+        field = None
+        if cache_path and os.path.exists(cache_path):
+            field = TrackDistanceField.load(cache_path)
+            if field.fingerprint != fingerprint:
+                field = None
+
+        if field is None:
+            field = TrackDistanceField.build(self.centerline, self.track_width, resolution, margin)
+            if cache_path:
+                field.save(cache_path)
+
+        self.distance_field = field
+        return field
+
+    def distance_off_track(self, xs, ys):
+        """How far points are beyond the road edge (0 on the road), needs the distance field"""
+        return np.maximum(self.distance_field.signed_distance(xs, ys), 0.0)
+
+    def within_bounds(self, xs, ys, margin):
+        """The collision rule: are points (xs, ys) within half the track width plus margin of the centerline?
+
+        The lateral offset comes from get_track_frame; with the distance field
+        the test is the signed distance to the road edge instead. Car.is_on_track
+        and VectorLaneKeepingEnv both decide crashes here. Returns a bool array
+        shaped like xs.
+        """
+        if self.distance_field is not None:
+            return self.distance_field.signed_distance(xs, ys) <= margin
+        lateral_offset, _ = self.get_track_frame(xs, ys)
+        return np.abs(lateral_offset) <= self.track_width / 2 + margin
+
+    def get_boundary_segments(self, offset):
+        """Return (start, end) arrays of shape (M, 2) for the closed boundary at offset"""
+        if offset not in self._segment_cache:
+            if offset == 0:
+                points = np.asarray(self.centerline, dtype=float)
+            else:
+                points = np.asarray(self._offset_line(self.centerline, offset), dtype=float)
+            self._segment_cache[offset] = (points, np.roll(points, -1, axis=0))
+        return self._segment_cache[offset]
+
+    def get_unrolled_boundary(self, offset):
+        """Boundary points at offset repeated twice, (2N, 2): any cyclic index range is one contiguous slice"""
+        key = ("unrolled", offset)
+        if key not in self._segment_cache:
+            points = self.get_boundary_segments(offset)[0]
+            self._segment_cache[key] = np.concatenate([points, points])
+        return self._segment_cache[key]
+
+    def get_boundary_arc_length(self, offset):
+        """Cumulative arc length (N + 1,) along the closed boundary at offset, last entry is the loop length"""
+        key = ("arc", offset)
+        if key not in self._segment_cache:
+            points, next_points = self.get_boundary_segments(offset)
+            seg_length = np.hypot(*(next_points - points).T)
+            self._segment_cache[key] = np.concatenate([[0.0], np.cumsum(seg_length)])
+        return self._segment_cache[key]
+
+    def get_collision_walls(self, margin):
+        """SegmentGrid of the two boundaries at +-(track_width / 2 + margin), road on their left,
+        computed once per margin"""
+        key = ("walls", margin)
+        if key not in self._segment_cache:
+            offset = self.track_width / 2 + margin
+            left, left_next = self.get_boundary_segments(offset)
+            right, right_next = self.get_boundary_segments(-offset)
+            # The +offset boundary has the road on its right, so it is walked backwards
+            starts = np.concatenate([left_next, right])
+            ends = np.concatenate([left, right_next])
+            self._segment_cache[key] = SegmentGrid(starts, ends, cell_size=self.track_width)
+        return self._segment_cache[key]
+
+    def get_boundary_grid(self, offset, cell_size):
+        """SegmentGrid of the closed boundary at offset (segment i starts at vertex i), computed
+        once per offset and cell size"""
+        key = ("grid", offset, cell_size)
+        if key not in self._segment_cache:
+            self._segment_cache[key] = SegmentGrid(*self.get_boundary_segments(offset), cell_size=cell_size)
+        return self._segment_cache[key]
+
+    def nearest_centerline_vertices(self, xs, ys):
+        """Index of the centerline vertex nearest each point (xs, ys), the lowest on ties
+
+        Candidates are the vertices in grid cells within one track width of
+        the point; points with no candidate that close (far off the road),
+        and all points on centerlines under GRID_MIN_SEGMENTS vertices, test
+        every vertex. Returns an int array shaped like xs.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        points = self.get_boundary_segments(0)[0]
+        flat_x, flat_y = xs.ravel(), ys.ravel()
+        closest_idx = np.full(flat_x.shape, -1)
+
+        if len(points) >= GRID_MIN_SEGMENTS:
+            grid = self.get_boundary_grid(0, self.track_width)
+            owner, vertex = grid.segments_near(flat_x, flat_y, self.track_width)
+        else:
+            owner = vertex = np.zeros(0, dtype=int)
+        if len(owner):
+            # Distances, not squares, so ties resolve exactly as in the kernel
+            dist = np.sqrt((flat_x[owner] - points[vertex, 0])**2 + (flat_y[owner] - points[vertex, 1])**2)
+            order = np.lexsort((vertex, dist, owner))
+            first = order[np.r_[True, owner[order][1:] != owner[order][:-1]]]
+            # Exact when the best candidate is within the searched radius
+            found = dist[first] <= self.track_width
+            closest_idx[owner[first[found]]] = vertex[first[found]]
+
+        rest = np.flatnonzero(closest_idx < 0)
+        if len(rest):
+            dist = np.sqrt((flat_x[rest, None] - points[:, 0])**2 + (flat_y[rest, None] - points[:, 1])**2)
+            closest_idx[rest] = np.argmin(dist, axis=-1)
+        return closest_idx.reshape(xs.shape)
+
+    def get_centerline_dashes(self, dash_length=20, gap_length=15):
+        """Dashed center line pattern as (M, 2, 2) start/end points, computed once"""
+        key = ("dashes", dash_length, gap_length)
+        if key not in self._segment_cache:
+            self._segment_cache[key] = dash_segments(self.centerline, dash_length, gap_length)
+        return self._segment_cache[key]
+
+    def get_track_frame(self, xs, ys):
+        """Vectorized lateral offset and track direction at positions (xs, ys)
+
+        Uses the same nearest-centerline-vertex rule as
+        CameraSensor._get_lateral_offset_from_track_center, or the distance
+        field when one has been built.
+        Returns (lateral_offset, track_angle) arrays shaped like xs.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        points, next_points = self.get_boundary_segments(0)
+
+        if self.distance_field is not None:
+            # O(1) raster lookups instead of scanning the centerline
+            closest_idx = np.maximum(self.distance_field.nearest_segment(xs, ys), 0)
+            p_curr = points[closest_idx]
+            p_next = next_points[closest_idx]
+            track_angle = np.arctan2(p_next[..., 1] - p_curr[..., 1],
+                                     p_next[..., 0] - p_curr[..., 0])
+            return self.distance_field.lateral_offset(xs, ys), track_angle
+
+        if xs.ndim == 0:
+            # One point (Car.is_on_track): the scalar kernel, no (1, M) temporaries
+            closest_idx = KERNELS.nearest_vertex(points, float(xs), float(ys))
+        else:
+            closest_idx = self.nearest_centerline_vertices(xs, ys)
+
+        p_curr = points[closest_idx]
+        p_next = next_points[closest_idx]
+        track_angle = np.arctan2(p_next[..., 1] - p_curr[..., 1],
+                                 p_next[..., 0] - p_curr[..., 0])
+
+        perp_angle = track_angle + np.pi / 2
+        lateral_offset = ((xs - p_curr[..., 0]) * np.cos(perp_angle) +
+                          (ys - p_curr[..., 1]) * np.sin(perp_angle))
+
+        return lateral_offset, track_angle
+
+    def _offset_line(self, points, offset):
+        """Offset a line perpendicular to its direction, returns an (N, 2) array"""
+        return KERNELS.offset_line(np.asarray(points, dtype=float), offset)
+
+    def get_start_position(self, lane_number=1):
+        """Get starting position"""
+        start_point = self.centerline[0]
+        next_point = self.centerline[1]
+
+        dx = next_point[0] - start_point[0]
+        dy = next_point[1] - start_point[1]
+        theta = np.arctan2(dy, dx)
+
+        perp_angle = theta + np.pi / 2
+        if lane_number == 1:
+            offset = -self.lane_width / 2
+        else:
+            offset = self.lane_width / 2
+
+        x = start_point[0] + offset * np.cos(perp_angle)
+        y = start_point[1] + offset * np.sin(perp_angle)
+
+        return x, y, theta
+
+
+class ProceduralTrack(SaoPauloTrack):
+    """Generated closed loop with any number of vertices, for stress tests
+
+    The centerline is a star-shaped curve r(phi) = R + A * wiggle(phi) around a
+    center point: a circle with three neighbouring harmonics of random phase
+    that add bends roughly every bend_length along the loop. A star-shaped
+    curve never crosses itself, and the bend amplitude is set so the peak
+    curvature is `curvature`, which keeps the road edges from folding over.
+    Vertices are spaced uniformly by arc length, segment_length apart, so
+    detection work per tick stays the same while the vertex count grows.
+
+    Same interface as SaoPauloTrack; centerline is an (N, 2) array instead of
+    a list of tuples and has no closing duplicate vertex.
+    """
+    def __init__(self, vertex_count=1000, segment_length=20.0, curvature=1 / 250, bend_length=600.0,
+                 lane_width=50, seed=0, offset_x=100, offset_y=100):
+        super().__init__(offset_x, offset_y)
+        self.lane_width = lane_width
+        self.track_width = 2 * lane_width
+        if vertex_count < 3:
+            raise ValueError(f"vertex_count must be at least 3, got {vertex_count}")
+        if curvature * lane_width >= 1:
+            raise ValueError(f"curvature {curvature} folds the road edges: keep it below 1 / lane_width")
+
+        radius = vertex_count * segment_length / (2 * np.pi)
+        if 1 / radius > curvature:
+            raise ValueError(f"{vertex_count} vertices {segment_length} apart make a loop tighter than "
+                             f"curvature {curvature}: use more vertices or a longer segment_length")
+
+        rng = np.random.default_rng(seed)
+        base = max(2, int(round(2 * np.pi * radius / bend_length)))
+        harmonics = base + np.arange(3)
+        phases = rng.uniform(0, 2 * np.pi, len(harmonics))
+        weights = rng.uniform(0.5, 1.0, len(harmonics))
+        weights /= weights.sum()
+
+        # Peak curvature of a bend is about 1/R + A k^2 / R^2; refine A once with the exact value.
+        # The curve is scaled to the requested spacing afterwards, which tightens it by 1 / scale,
+        # so the amplitude is solved twice: the arc length depends on it.
+        phi = np.linspace(0, 2 * np.pi, max(2 * vertex_count, 10000), endpoint=False)
+        scale = 1.0
+        for _ in range(2):
+            target = curvature * scale
+            amplitude = max(min((target - 1 / radius) * radius**2 / harmonics[-1]**2, radius / 2), 0.0)
+            peak = self._peak_curvature(phi, radius, amplitude, harmonics, phases, weights)
+            if peak > 1 / radius:
+                amplitude = min(amplitude * (target - 1 / radius) / (peak - 1 / radius), radius / 2)
+
+            r, dr, _ = self._polar(phi, radius, amplitude, harmonics, phases, weights)
+            speed = np.hypot(r, dr)
+            arc = np.concatenate([[0.0], np.cumsum((speed + np.roll(speed, -1)) / 2) * (phi[1] - phi[0])])
+            scale = vertex_count * segment_length / arc[-1]
+
+        # Resample uniformly by arc length at the requested spacing
+        points = np.column_stack([r * np.cos(phi), r * np.sin(phi)])
+        targets = np.arange(vertex_count) * (arc[-1] / vertex_count)
+        closed = np.vstack([points, points[:1]])
+        centerline = np.column_stack([np.interp(targets, arc, closed[:, 0]), np.interp(targets, arc, closed[:, 1])])
+        centerline *= scale
+        self.curvature = self._peak_curvature(phi, radius, amplitude, harmonics, phases, weights) / scale  # Peak, 1/px
+
+        # Bounding box of the road starts at (offset_x, offset_y)
+        centerline += (offset_x, offset_y) - centerline.min(axis=0) + self.track_width / 2
+        self.centerline = centerline
+        self.centerline.flags.writeable = False
+
+    @staticmethod
+    def _polar(phi, radius, amplitude, harmonics, phases, weights):
+        """r, dr/dphi and d2r/dphi2 of the centerline"""
+        angle = harmonics[:, None] * phi + phases[:, None]
+        k = harmonics[:, None]
+        w = weights[:, None]
+        r = radius + amplitude * np.sum(w * np.sin(angle), axis=0)
+        dr = amplitude * np.sum(w * k * np.cos(angle), axis=0)
+        ddr = -amplitude * np.sum(w * k**2 * np.sin(angle), axis=0)
+        return r, dr, ddr
+
+    @classmethod
+    def _peak_curvature(cls, phi, radius, amplitude, harmonics, phases, weights):
+        """Largest |curvature| of the polar curve over the samples phi"""
+        r, dr, ddr = cls._polar(phi, radius, amplitude, harmonics, phases, weights)
+        return np.max(np.abs(r**2 + 2 * dr**2 - r * ddr) / (r**2 + dr**2) ** 1.5)
@@ -0,0 +1,282 @@
+"""Multi-car simulation with broadphase car-to-car collision"""
+
+import numpy as np
+
+from .car import Car
+from .config import FPS
+from .controllers import PurePursuitLKA
+from .metrics import KPIAggregator
+from .sensors import CameraSensor
+
+
+class SpatialHash:
+    """Uniform grid broadphase for car-to-car collision
+
+    Cars are bucketed by the grid cell of their center. With a cell size of at
+    least the largest car diagonal, two cars can only touch if their cells are
+    neighbours, so candidate pairs come from each cell and half of its eight
+    neighbours (every unordered pair is produced once). Cost is linear in the
+    number of cars instead of quadratic.
+    """
+    # Self cell plus half of the neighbourhood
+    NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+
+    def candidate_pairs(self, xs, ys):
+        """Return index arrays (i, j) of cars sharing or neighbouring a cell"""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        count = len(xs)
+        if count < 2:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        # Non-negative cell coordinates with a one-cell border for neighbour lookups
+        cell_x = np.floor(xs / self.cell_size).astype(np.int64)
+        cell_y = np.floor(ys / self.cell_size).astype(np.int64)
+        cell_x -= cell_x.min() - 1
+        cell_y -= cell_y.min() - 1
+        stride = cell_y.max() + 2
+
+        keys = cell_x * stride + cell_y
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        sorted_pos = np.empty(count, dtype=np.int64)
+        sorted_pos[order] = np.arange(count)
+
+        first, second = [], []
+        for dx, dy in self.NEIGHBOUR_OFFSETS:
+            if dx == 0 and dy == 0:
+                # Same cell: only partners after this car in sorted order
+                lo = sorted_pos + 1
+                hi = np.searchsorted(sorted_keys, keys, side="right")
+            else:
+                target = (cell_x + dx) * stride + (cell_y + dy)
+                lo = np.searchsorted(sorted_keys, target, side="left")
+                hi = np.searchsorted(sorted_keys, target, side="right")
+
+            counts = np.maximum(hi - lo, 0)
+            total = counts.sum()
+            if total == 0:
+                continue
+
+            # Expand each car's [lo, hi) range of partners into explicit pairs
+            starts = np.repeat(lo, counts)
+            within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            first.append(np.repeat(np.arange(count), counts))
+            second.append(order[starts + within])
+
+        if not first:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        return np.concatenate(first), np.concatenate(second)
+
+
+def oriented_boxes_overlap(x1, y1, theta1, x2, y2, theta2, length, width):
+    """Separating-axis test for pairs of equally sized oriented boxes (vectorized)"""
+    half_length, half_width = length / 2, width / 2
+
+    # Box axes (forward and sideways) for both boxes of every pair
+    axes_1 = [(np.cos(theta1), np.sin(theta1)), (-np.sin(theta1), np.cos(theta1))]
+    axes_2 = [(np.cos(theta2), np.sin(theta2)), (-np.sin(theta2), np.cos(theta2))]
+    between_x = x2 - x1
+    between_y = y2 - y1
+
+    overlap = np.ones(np.shape(x1), dtype=bool)
+    for axis_x, axis_y in axes_1 + axes_2:
+        radius_1 = (half_length * np.abs(axes_1[0][0] * axis_x + axes_1[0][1] * axis_y) +
+                    half_width * np.abs(axes_1[1][0] * axis_x + axes_1[1][1] * axis_y))
+        radius_2 = (half_length * np.abs(axes_2[0][0] * axis_x + axes_2[0][1] * axis_y) +
+                    half_width * np.abs(axes_2[1][0] * axis_x + axes_2[1][1] * axis_y))
+        distance = np.abs(between_x * axis_x + between_y * axis_y)
+        overlap &= distance <= radius_1 + radius_2
+
+    return overlap
+
+
+class TrafficSimulation:
+    """Many cars sharing one track, each driven by its own PurePursuitLKA
+
+    Each tick every car runs its LKA, drives at a cruise speed and is checked
+    against the track (is_on_track/handle_collision). Car-to-car collisions
+    are found with a SpatialHash broadphase and an oriented-box narrowphase.
+    Only the car that drove into the other (the one heading towards it) is
+    reverted and stopped like a track hit, so the car in front drives on and
+    overlapping cars come apart. car_collisions and track_collisions count
+    collision events: a pair or car in contact on consecutive ticks counts once.
+
+    With batched=True (default) all cars' steering comes from one
+    calculate_steering_batch call per tick, which gives the same commands;
+    the per-car cameras' and controllers' display state (detected flags,
+    lookahead_point) is then not updated. Use batched=False to keep it.
+
+    With kpis=True a KPIAggregator (self.kpis) is fed every tick, so fleet
+    metrics are available from self.kpis.snapshot() without storing traces.
+
+    With collision="swept" track collisions check each car's whole step (see
+    Car.is_on_track), so a large dt cannot carry a car across the road edge.
+    """
+    def __init__(self, track, cruise_speed=60.0, dt=1.0 / FPS, integrator="arc", batched=True, kpis=False,
+                 collision="endpoint"):
+        self.track = track
+        self.cruise_speed = cruise_speed
+        self.dt = dt
+        self.integrator = integrator
+        self.collision = collision
+        self.batched = batched
+
+        self.cars = []
+        self.cameras = []
+        self.controllers = []
+
+        # Cell size covers the car diagonal so touching cars are in neighbouring cells
+        prototype = Car(0, 0, 0)
+        self.car_length, self.car_width = prototype.length, prototype.width
+        self.broadphase = SpatialHash(np.hypot(prototype.length, prototype.width))
+
+        self.last_collision_pairs = (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        self.car_collisions = 0
+        self.track_collisions = 0
+        # Contact on the previous tick: (i, j) pairs with i < j, and cars off the track
+        self.touching = set()
+        self.off_track = np.zeros(0, dtype=bool)
+        self.kpis = KPIAggregator(track, dt=dt) if kpis else None
+
+    def add_car(self, x, y, theta, velocity=0.0):
+        """Add a car with its own camera and active LKA, returns the car"""
+        car = Car(x, y, theta)
+        car.track = self.track
+        car.velocity = velocity
+        car.integrator = self.integrator
+        car.collision = self.collision
+        camera = CameraSensor(car)
+        lka = PurePursuitLKA(car, camera)
+        lka.toggle()
+
+        self.cars.append(car)
+        self.cameras.append(camera)
+        self.controllers.append(lka)
+        self.off_track = np.append(self.off_track, False)
+        if self.kpis is not None:
+            self.kpis.add_cars(x, y)
+        return car
+
+    def spawn_evenly(self, num_cars, velocity=None, allow_overlap=False):
+        """Spread num_cars evenly along the track, alternating between the two lanes
+
+        Raises ValueError when the fleet is too large for the track, so that
+        some cars (new or already added) would overlap; allow_overlap=True
+        places them anyway (for steering benchmarks that never step).
+        """
+        points = np.asarray(self.track.centerline, dtype=float)
+        next_points = np.roll(points, -1, axis=0)
+        seg_lengths = np.hypot(*(next_points - points).T)
+        cumulative = np.concatenate([[0.0], np.cumsum(seg_lengths)])
+
+        velocity = self.cruise_speed if velocity is None else velocity
+        poses = []
+        for k in range(num_cars):
+            distance = k * cumulative[-1] / num_cars
+            seg = min(np.searchsorted(cumulative, distance, side="right") - 1, len(points) - 1)
+            frac = (distance - cumulative[seg]) / (seg_lengths[seg] or 1)
+            cx, cy = points[seg] + frac * (next_points[seg] - points[seg])
+
+            theta = np.arctan2(next_points[seg][1] - points[seg][1], next_points[seg][0] - points[seg][0])
+            offset = -self.track.lane_width / 2 if k % 2 == 0 else self.track.lane_width / 2
+            poses.append((cx - offset * np.sin(theta), cy + offset * np.cos(theta), theta))
+
+        if not allow_overlap:
+            xs, ys, thetas = np.array([(car.x, car.y, car.theta) for car in self.cars] + poses).reshape(-1, 3).T
+            first, _ = self.overlapping_pairs(xs, ys, thetas)
+            if len(first):
+                raise ValueError(f"{num_cars} cars do not fit on the track: {len(first)} pairs would overlap "
+                                 f"(pass allow_overlap=True to place them anyway)")
+        for x, y, theta in poses:
+            self.add_car(x, y, theta, velocity)
+
+    def step(self):
+        """Advance every car by one tick and resolve collisions"""
+        if self.batched:
+            steering = self.batch_steering()
+        for index, (car, lka) in enumerate(zip(self.cars, self.controllers)):
+            if self.batched:
+                lka_steering = None if np.isnan(steering[index]) else float(steering[index])
+            else:
+                lka_steering = lka.calculate_steering(self.track)
+            throttle = np.clip((self.cruise_speed - car.velocity) / (car.acceleration * self.dt), -1.0, 1.0)
+            car.drive(self.dt, throttle, 0.0, lka_steering, lka)
+
+        if self.collision == "endpoint":
+            # Car.is_on_track's endpoint rule for the whole fleet in one call
+            xs, ys = np.array([(car.x, car.y) for car in self.cars]).reshape(-1, 2).T
+            collided = ~self.track.within_bounds(xs, ys, self.car_width)
+        else:
+            collided = np.array([not car.is_on_track(self.track) for car in self.cars], dtype=bool)
+        for index in np.flatnonzero(collided):
+            self.cars[index].handle_collision()
+        self.track_collisions += int(np.count_nonzero(collided & ~self.off_track))
+        self.off_track = collided.copy()
+
+        first, second = self.find_collisions()
+        self.resolve_collisions(first, second)
+
+        touching = set(zip(np.minimum(first, second).tolist(), np.maximum(first, second).tolist()))
+        self.car_collisions += len(touching - self.touching)
+        self.touching = touching
+        self.last_collision_pairs = (first, second)
+
+        if self.kpis is not None:
+            collided[first] = collided[second] = True
+            self.kpis.update_cars(self.cars, self.controllers, collided)
+
+    def resolve_collisions(self, first, second):
+        """Revert the car of each overlapping pair that drove into the other
+
+        That is the car whose heading points at the other one (both in a
+        head-on collision); reverting both would pin an overlapping pair for
+        good. A reverted car can back into the car behind it, so pairs are
+        checked again until no car that is still moved drove into another.
+        """
+        reverted = np.zeros(len(self.cars), dtype=bool)
+        while len(first):
+            xs, ys, thetas = np.array([(car.x, car.y, car.theta) for car in self.cars]).T
+            between_x, between_y = xs[second] - xs[first], ys[second] - ys[first]
+            first_into = np.cos(thetas[first]) * between_x + np.sin(thetas[first]) * between_y > 0
+            second_into = np.cos(thetas[second]) * between_x + np.sin(thetas[second]) * between_y < 0
+            at_fault = np.unique(np.concatenate([first[first_into], second[second_into]]))
+            at_fault = at_fault[~reverted[at_fault]]
+            if len(at_fault) == 0:
+                break
+            for index in at_fault:
+                self.cars[index].handle_collision()
+            reverted[at_fault] = True
+            first, second = self.find_collisions()
+
+    def batch_steering(self):
+        """LKA steering of every car from its pose before this tick, nan where none"""
+        if not self.cars:
+            return np.zeros(0)
+        xs, ys, thetas, velocities = np.array([(car.x, car.y, car.theta, car.velocity) for car in self.cars]).T
+        # Controllers share their settings, so the first one steers the whole fleet
+        steering = self.controllers[0].calculate_steering_batch(self.track, xs, ys, thetas, velocities)
+        active = np.array([lka.active for lka in self.controllers])
+        return np.where(active, steering, np.nan)
+
+    def find_collisions(self):
+        """Return index arrays (i, j) of overlapping car pairs"""
+        return self.overlapping_pairs([car.x for car in self.cars], [car.y for car in self.cars],
+                                      [car.theta for car in self.cars])
+
+    def overlapping_pairs(self, xs, ys, thetas):
+        """Index arrays (i, j) of overlapping pairs among car poses (xs, ys, thetas)"""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        thetas = np.asarray(thetas, dtype=float)
+        if len(xs) < 2:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        first, second = self.broadphase.candidate_pairs(xs, ys)
+        overlap = oriented_boxes_overlap(xs[first], ys[first], thetas[first],
+                                         xs[second], ys[second], thetas[second],
+                                         self.car_length, self.car_width)
+        return first[overlap], second[overlap]